@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'project_core.middleware.login.LoginRequiredMiddleware',
+    'project_core.middleware.performance.PerformanceMonitoringMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'simple_history.middleware.HistoryRequestMiddleware',
@@ -347,6 +348,7 @@ REVIEWER_GROUP_NAME = 'reviewer'
 MANAGEMENT_GROUP_NAME = 'management'
 
 REVIEWER_CAN_ACCESS_VIEW_NAMES = ['logged-proposal-list',
+                                  'logged-proposal-list-json',
                                   'logged-proposal-detail',
                                   'logged-export-proposals-csv-summary-all',
                                   'logged-export-proposals-csv-summary-call',
@@ -364,6 +366,74 @@ SPI_MEDIA_GALLERY_IMPORT_CALLBACK = os.getenv('SPI_MEDIA_GALLERY_IMPORT_CALLBACK
 SELF_HTTP_USERNAME = os.getenv('SELF_HTTP_USERNAME', None)
 SELF_HTTP_PASSWORD = os.getenv('SELF_HTTP_PASSWORD', None)
 
+# 'http': wkhtmltopdf downloads the proposal from this application (using SELF_HTTP_USERNAME if needed).
+# 'in_process': the proposal is rendered in the request and sent to wkhtmltopdf through its standard input, the
+# static files are read from STATIC_ROOT
+PROPOSAL_PDF_RENDERING = os.getenv('PROPOSAL_PDF_RENDERING', 'http')
+
+# When exporting the proposals of a call in a ZIP file: maximum number of PDFs generated at the same time
+# and seconds after which the generation of one PDF is aborted
+PROPOSAL_PDF_CONCURRENCY = int(os.getenv('PROPOSAL_PDF_CONCURRENCY', 4))
+PROPOSAL_PDF_TIMEOUT = int(os.getenv('PROPOSAL_PDF_TIMEOUT', 120))
+
+# The PDFs of submitted proposals are kept once generated. PROPOSAL_PDF_CACHE_STORAGE: 'local' (in
+# PROPOSAL_PDF_CACHE_DIRECTORY), 's3' (in the object storage, under AWS_LOCATION) or 'none' to disable it.
+# The evictproposalpdfs command deletes the oldest PDFs when they use more than PROPOSAL_PDF_CACHE_MAX_SIZE bytes
+PROPOSAL_PDF_CACHE_STORAGE = os.getenv('PROPOSAL_PDF_CACHE_STORAGE', 'local')
+PROPOSAL_PDF_CACHE_DIRECTORY = os.getenv('PROPOSAL_PDF_CACHE_DIRECTORY',
+                                         os.path.join(tempfile.gettempdir(), 'project-application-proposal-pdfs'))
+PROPOSAL_PDF_CACHE_MAX_SIZE = int(os.getenv('PROPOSAL_PDF_CACHE_MAX_SIZE', 1024 * 1024 * 1024))
+
 # This part is created on creating a call
 CALL_DEFAULT_PART_QUESTIONS_ANSWERS = 'Proposed {{ activity }} description'
 DOCUMENTATION_URL = os.getenv('DOCUMENTATION_URL', None)
+
+# The reporting tables are cached (and invalidated when the data changes). This is the maximum time
+# that they are kept in the cache. They can be pre-calculated using the management command warmreportingcache
+REPORTING_CACHE_TIMEOUT = int(os.getenv('REPORTING_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# If enabled: the number of queries, SQL time, template rendering time and total time of each request are
+# recorded (see project_core/middleware/performance.py). Requests slower than
+# PERFORMANCE_MONITORING_SLOW_REQUEST_SECONDS are logged and management users can see the statistics of the
+# last PERFORMANCE_MONITORING_SAMPLES requests of each view in /logged/performance/
+PERFORMANCE_MONITORING = os.getenv('PERFORMANCE_MONITORING', '0') == '1'
+PERFORMANCE_MONITORING_SLOW_REQUEST_SECONDS = float(os.getenv('PERFORMANCE_MONITORING_SLOW_REQUEST_SECONDS', 2))
+PERFORMANCE_MONITORING_SAMPLES = int(os.getenv('PERFORMANCE_MONITORING_SAMPLES', 500))
+
+# The parts and answers of submitted proposals are cached (and invalidated when they change, see
+# project_core/signals.py). This is the maximum time that they are kept in the cache
+PROPOSAL_DETAIL_CACHE_TIMEOUT = int(os.getenv('PROPOSAL_DETAIL_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# The values of the variable templates of each call are cached (and invalidated when they change, see
+# variable_templates/signals.py). This is the maximum time that they are kept in the cache
+VARIABLE_TEMPLATES_CACHE_TIMEOUT = int(os.getenv('VARIABLE_TEMPLATES_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# The responses of the public projects API are cached (and invalidated when the data changes, see
+# project_core/signals.py). It needs to be shorter than the time that the signed URLs of the media are valid
+# after being returned (SIGNED_URL_CACHE_MARGIN)
+PROJECT_API_CACHE_TIMEOUT = int(os.getenv('PROJECT_API_CACHE_TIMEOUT', 60 * 10))
+
+# If enabled the files of the answers of the proposals are uploaded by the browser directly to the bucket
+# (see project_core/direct_upload.py). The bucket needs a CORS rule that allows POST requests from the site.
+# PROPOSAL_FILES_DIRECT_UPLOAD_EXPIRE: seconds that the presigned POST is valid.
+# PROPOSAL_FILES_DIRECT_UPLOAD_RATE_LIMIT: presigned POSTs per hour for each client address
+PROPOSAL_FILES_DIRECT_UPLOAD = os.getenv('PROPOSAL_FILES_DIRECT_UPLOAD', '0') == '1'
+PROPOSAL_FILES_DIRECT_UPLOAD_EXPIRE = int(os.getenv('PROPOSAL_FILES_DIRECT_UPLOAD_EXPIRE', 60 * 60))
+PROPOSAL_FILES_DIRECT_UPLOAD_RATE_LIMIT = int(os.getenv('PROPOSAL_FILES_DIRECT_UPLOAD_RATE_LIMIT', 60))
+
+# The emails to the applicants are queued in the database and sent by the sendqueuedemails command (see
+# project_core/email_queue.py). The failed emails are retried EMAIL_QUEUE_MAX_ATTEMPTS times: the first retry
+# after EMAIL_QUEUE_RETRY_SECONDS and doubling the wait for each of the next ones.
+# EMAIL_QUEUE_LEASE_SECONDS: a batch being sent is not picked up by another sendqueuedemails during this time (if
+# the command is killed while sending the emails of the batch are sent again after it). Longer than sending a batch
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv('EMAIL_QUEUE_BATCH_SIZE', 50))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', 8))
+EMAIL_QUEUE_RETRY_SECONDS = int(os.getenv('EMAIL_QUEUE_RETRY_SECONDS', 60))
+EMAIL_QUEUE_LEASE_SECONDS = int(os.getenv('EMAIL_QUEUE_LEASE_SECONDS', 10 * 60))
+
+# The signed URLs of the files (SpiS3Boto3Storage) are cached in memory by each process (the
+# SIGNED_URL_CACHE_MAX_ENTRIES most recently used) until SIGNED_URL_CACHE_MARGIN seconds before they expire
+# (AWS_QUERYSTRING_EXPIRE: 1 hour by default): a URL is valid at least this time after being returned. It needs to
+# be longer than PROJECT_API_CACHE_TIMEOUT: the API responses are cached with the URLs
+SIGNED_URL_CACHE_MARGIN = int(os.getenv('SIGNED_URL_CACHE_MARGIN', 60 * 20))
+SIGNED_URL_CACHE_MAX_ENTRIES = int(os.getenv('SIGNED_URL_CACHE_MAX_ENTRIES', 10000))
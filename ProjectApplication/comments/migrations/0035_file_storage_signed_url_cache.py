@@ -0,0 +1,42 @@
+# Generated by Django 3.2.11 on 2026-10-18 23:01
+
+import comments.models
+import django.core.validators
+from django.db import migrations, models
+import project_core.utils.SpiS3Boto3Storage
+import project_core.utils.utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0034_add_file_validation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='callattachment',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=comments.models.call_attachment_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='grantagreementattachment',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=comments.models.grant_agreement_attachment_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='projectattachment',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=comments.models.project_attachment_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='proposalattachment',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=comments.models.proposal_attachment_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='proposalevaluationattachment',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=comments.models.proposal_evaluation_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 3.2.11 on 2026-10-18 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0035_file_storage_signed_url_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callattachment',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='callattachment',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='callattachment',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+        migrations.AddField(
+            model_name='grantagreementattachment',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='grantagreementattachment',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='grantagreementattachment',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+        migrations.AddField(
+            model_name='projectattachment',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='projectattachment',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='projectattachment',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalattachment',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalattachment',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalattachment',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalevaluationattachment',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalevaluationattachment',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalevaluationattachment',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+    ]
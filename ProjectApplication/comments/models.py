@@ -1,11 +1,11 @@
 from django.contrib.auth.models import User
 from django.db import models
-from storages.backends.s3boto3 import S3Boto3Storage
 
 from colours.models import ColourPair
 from evaluation.models import ProposalEvaluation, CallEvaluation
 from grant_management.models import Invoice, GrantAgreement
-from project_core.models import CreateModifyOn, Proposal, Call, Project
+from project_core.models import CreateModifyOn, Proposal, Call, Project, FileMetadata
+from project_core.utils.SpiS3Boto3Storage import SpiS3Boto3Storage
 # Models used by Proposal, Call...
 from project_core.utils.utils import management_file_validator
 
@@ -41,7 +41,7 @@ class AbstractComment(CreateModifyOn):
         return text
 
 
-class AbstractAttachment(CreateModifyOn):
+class AbstractAttachment(CreateModifyOn, FileMetadata):
     text = models.TextField(help_text='Comment of the attachment', null=True, blank=True)
     created_by = models.ForeignKey(User, help_text='User by which the entry was created',
                                    related_name="%(app_label)s_%(class)s_created_by_related", blank=True, null=True,
@@ -83,7 +83,7 @@ class ProposalComment(AbstractComment):
 
     @staticmethod
     def category_queryset():
-        return ProposalCommentCategory.objects.all()
+        return ProposalCommentCategory.objects.select_related('category')
 
 
 class ProposalAttachmentCategory(CreateModifyOn):
@@ -101,7 +101,7 @@ def proposal_attachment_rename(instance, filename):
 
 
 class ProposalAttachment(AbstractAttachment):
-    file = models.FileField(storage=S3Boto3Storage(),
+    file = models.FileField(storage=SpiS3Boto3Storage(),
                             upload_to=proposal_attachment_rename,
                             validators=[*management_file_validator()])
 
@@ -118,7 +118,7 @@ class ProposalAttachment(AbstractAttachment):
 
     @staticmethod
     def category_queryset():
-        return ProposalAttachmentCategory.objects.all()
+        return ProposalAttachmentCategory.objects.select_related('category')
 
 
 # Call
@@ -150,7 +150,7 @@ class CallComment(AbstractComment):
 
     @staticmethod
     def category_queryset():
-        return CallCommentCategory.objects.all()
+        return CallCommentCategory.objects.select_related('category')
 
 
 class CallAttachmentCategory(CreateModifyOn):
@@ -168,7 +168,7 @@ def call_attachment_rename(instance, filename):
 
 
 class CallAttachment(AbstractAttachment):
-    file = models.FileField(storage=S3Boto3Storage(),
+    file = models.FileField(storage=SpiS3Boto3Storage(),
                             upload_to=call_attachment_rename,
                             validators=[*management_file_validator()])
     call = models.ForeignKey(Call, help_text='Call that this attachment belongs to',
@@ -184,7 +184,7 @@ class CallAttachment(AbstractAttachment):
 
     @staticmethod
     def category_queryset():
-        return CallAttachmentCategory.objects.all()
+        return CallAttachmentCategory.objects.select_related('category')
 
 
 # ProposalEvaluation
@@ -215,7 +215,7 @@ class ProposalEvaluationComment(AbstractComment):
 
     @staticmethod
     def category_queryset():
-        return ProposalEvaluationCommentCategory.objects.all()
+        return ProposalEvaluationCommentCategory.objects.select_related('category')
 
 
 class ProposalEvaluationAttachmentCategory(CreateModifyOn):
@@ -233,7 +233,7 @@ def proposal_evaluation_rename(instance, filename):
 
 
 class ProposalEvaluationAttachment(AbstractAttachment):
-    file = models.FileField(storage=S3Boto3Storage(),
+    file = models.FileField(storage=SpiS3Boto3Storage(),
                             upload_to=proposal_evaluation_rename,
                             validators=[*management_file_validator()])
     proposal_evaluation = models.ForeignKey(ProposalEvaluation,
@@ -247,7 +247,7 @@ class ProposalEvaluationAttachment(AbstractAttachment):
 
     @staticmethod
     def category_queryset():
-        return ProposalEvaluationAttachmentCategory.objects.all()
+        return ProposalEvaluationAttachmentCategory.objects.select_related('category')
 
 
 # Project
@@ -278,7 +278,7 @@ class ProjectComment(AbstractComment):
 
     @staticmethod
     def category_queryset():
-        return ProjectCommentCategory.objects.all()
+        return ProjectCommentCategory.objects.select_related('category')
 
 
 class ProjectAttachmentCategory(CreateModifyOn):
@@ -296,7 +296,7 @@ def project_attachment_rename(instance, filename):
 
 
 class ProjectAttachment(AbstractAttachment):
-    file = models.FileField(storage=S3Boto3Storage(),
+    file = models.FileField(storage=SpiS3Boto3Storage(),
                             upload_to=project_attachment_rename,
                             validators=[*management_file_validator()])
     project = models.ForeignKey(Project,
@@ -310,7 +310,7 @@ class ProjectAttachment(AbstractAttachment):
 
     @staticmethod
     def category_queryset():
-        return ProjectAttachmentCategory.objects.all()
+        return ProjectAttachmentCategory.objects.select_related('category')
 
 
 # CallEvaluation
@@ -344,7 +344,7 @@ class CallEvaluationComment(AbstractComment):
 
     @staticmethod
     def category_queryset():
-        return CallEvaluationCommentCategory.objects.all()
+        return CallEvaluationCommentCategory.objects.select_related('category')
 
 
 # Invoice
@@ -378,7 +378,7 @@ class InvoiceComment(AbstractComment):
 
     @staticmethod
     def category_queryset():
-        return InvoiceCommentCategory.objects.all()
+        return InvoiceCommentCategory.objects.select_related('category')
 
 
 # GrantAgreement
@@ -412,7 +412,7 @@ class GrantAgreementComment(AbstractComment):
 
     @staticmethod
     def category_queryset():
-        return GrantAgreementCommentCategory.objects.all()
+        return GrantAgreementCommentCategory.objects.select_related('category')
 
 
 class GrantAgreementAttachmentCategory(CreateModifyOn):
@@ -430,7 +430,7 @@ def grant_agreement_attachment_rename(instance, filename):
 
 
 class GrantAgreementAttachment(AbstractAttachment):
-    file = models.FileField(storage=S3Boto3Storage(),
+    file = models.FileField(storage=SpiS3Boto3Storage(),
                             upload_to=grant_agreement_attachment_rename,
                             validators=[*management_file_validator()])
     grant_agreement = models.ForeignKey(GrantAgreement,
@@ -447,4 +447,4 @@ class GrantAgreementAttachment(AbstractAttachment):
 
     @staticmethod
     def category_queryset():
-        return GrantAgreementAttachmentCategory.objects.all()
+        return GrantAgreementAttachmentCategory.objects.select_related('category')
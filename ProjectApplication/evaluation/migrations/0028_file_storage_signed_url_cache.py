@@ -0,0 +1,25 @@
+# Generated by Django 3.2.11 on 2026-10-18 23:01
+
+from django.db import migrations, models
+import evaluation.models
+import project_core.utils.SpiS3Boto3Storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluation', '0027_criterion_improve_description'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='callevaluation',
+            name='post_panel_management_table',
+            field=models.FileField(blank=True, help_text='File in which the panel review information is contained', null=True, storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=evaluation.models.post_panel_management_table_rename),
+        ),
+        migrations.AlterField(
+            model_name='proposalevaluation',
+            name='decision_letter',
+            field=models.FileField(blank=True, help_text='Decision letter file sent to applicant', null=True, storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=evaluation.models.proposal_evaluation_eligibility_letter_rename),
+        ),
+    ]
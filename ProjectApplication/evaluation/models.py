@@ -1,14 +1,13 @@
-import storages
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models, transaction
 from django.utils import timezone
 from simple_history.models import HistoricalRecords
-from storages.backends.s3boto3 import S3Boto3Storage
 
 from ProjectApplication import settings
 from project_core.models import Call, Proposal, CreateModifyOn, ProposalStatus, PhysicalPerson, Project
+from project_core.utils.SpiS3Boto3Storage import SpiS3Boto3Storage
 from project_core.utils.utils import user_is_in_group_name
 
 
@@ -85,7 +84,7 @@ class ProposalEvaluation(CreateModifyOn):
     board_decision = models.CharField(choices=BOARD_DECISION, max_length=7, help_text='Decision made by the board',
                                       blank=True, null=True)
     decision_date = models.DateField(help_text="Date on which the board's decision was made", blank=True, null=True)
-    decision_letter = models.FileField(storage=storages.backends.s3boto3.S3Boto3Storage(),
+    decision_letter = models.FileField(storage=SpiS3Boto3Storage(),
                                        upload_to=proposal_evaluation_eligibility_letter_rename,
                                        help_text='Decision letter file sent to applicant',
                                        blank=True, null=True)
@@ -156,7 +155,7 @@ class CallEvaluation(CreateModifyOn):
 
     panel_date = models.DateField(help_text='Date on which the panel review meeting will take place')
 
-    post_panel_management_table = models.FileField(storage=S3Boto3Storage(),
+    post_panel_management_table = models.FileField(storage=SpiS3Boto3Storage(),
                                                    upload_to=post_panel_management_table_rename,
                                                    help_text='File in which the panel review information is contained',
                                                    blank=True, null=True)
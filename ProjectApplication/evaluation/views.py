@@ -645,7 +645,9 @@ class CallEvaluationValidation(TemplateView):
 
         call = Call.objects.get(id=kwargs['call_id'])
 
-        proposals = Proposal.objects.filter(call=call)
+        # The lists of proposals show the applicant and link to the evaluation
+        proposals = Proposal.objects.filter(call=call). \
+            select_related('proposalevaluation', 'applicant__person', 'applicant__academic_title')
         eligible_proposals = proposals.filter(eligibility=Proposal.ELIGIBLE)
 
         proposal_validations = []
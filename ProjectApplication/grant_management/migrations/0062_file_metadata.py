@@ -0,0 +1,28 @@
+# Generated by Django 3.2.11 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grant_management', '0061_key_and_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medium',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='medium',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='medium',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.11 on 2026-10-18 23:01
+
+import django.core.validators
+from django.db import migrations, models
+import grant_management.models
+import project_core.utils.SpiS3Boto3Storage
+import project_core.utils.utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grant_management', '0062_file_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='financialreport',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=grant_management.models.finance_report_file_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='grantagreement',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=grant_management.models.grant_agreement_file_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='invoice',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=grant_management.models.invoice_file_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='medium',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=grant_management.models.medium_file_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+        migrations.AlterField(
+            model_name='scientificreport',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to=grant_management.models.scientific_report_file_rename, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'docx', 'odt', 'jpg', 'jpeg', 'png']), project_core.utils.utils.file_size_validator]),
+        ),
+    ]
@@ -6,22 +6,23 @@ from django.db import models, transaction
 from django.db.models import Sum, Q
 from django.utils.datetime_safe import datetime
 from simple_history.models import HistoricalRecords
-from storages.backends.s3boto3 import S3Boto3Storage
 
-from project_core.models import CreateModifyOn, PhysicalPerson, Project
-from project_core.utils.utils import management_file_validator, calculate_md5_from_file_field
+from project_core.models import CreateModifyOn, PhysicalPerson, Project, FileMetadata
+from project_core.utils.SpiS3Boto3Storage import SpiS3Boto3Storage
+from project_core.utils.utils import management_file_validator, calculate_md5_and_size_from_file_field, \
+    save_file_field_calculating_md5
 
 
 def grant_agreement_file_rename(instance, filename):
     return f'grant_management/GrantAgreement/Project-{instance.project.key}-{filename}'
 
 
-class GrantAgreement(CreateModifyOn):
+class GrantAgreement(CreateModifyOn, FileMetadata):
     project = models.OneToOneField(Project, help_text='Project this Grant Agreement belongs to',
                                    on_delete=models.PROTECT)
     signed_date = models.DateField(help_text='Date the grant agreement was signed', null=True, blank=True)
     signed_by = models.ManyToManyField(PhysicalPerson, help_text='People who signed the grant agreement', blank=True)
-    file = models.FileField(storage=S3Boto3Storage(), upload_to=grant_agreement_file_rename,
+    file = models.FileField(storage=SpiS3Boto3Storage(), upload_to=grant_agreement_file_rename,
                             validators=[*management_file_validator()])
 
     def __str__(self):
@@ -87,10 +88,10 @@ def invoice_file_rename(instance, filename):
     return f'grant_management/Invoice/Project-{instance.project.key}-{filename}'
 
 
-class Invoice(AbstractProjectDueReceivedDate):
+class Invoice(AbstractProjectDueReceivedDate, FileMetadata):
     sent_for_payment_date = models.DateField(help_text='Date the invoice was sent for payment', null=True, blank=True)
 
-    file = models.FileField(storage=S3Boto3Storage(), upload_to=invoice_file_rename, null=True,
+    file = models.FileField(storage=SpiS3Boto3Storage(), upload_to=invoice_file_rename, null=True,
                             validators=[*management_file_validator()],
                             blank=True)
     paid_date = models.DateField(help_text='Date the invoice was paid', null=True, blank=True)
@@ -155,8 +156,8 @@ def finance_report_file_rename(instance, filename):
     return f'grant_management/FinancialReport/Project-{instance.project.key}-{filename}'
 
 
-class FinancialReport(AbstractProjectReport):
-    file = models.FileField(storage=S3Boto3Storage(), upload_to=finance_report_file_rename,
+class FinancialReport(AbstractProjectReport, FileMetadata):
+    file = models.FileField(storage=SpiS3Boto3Storage(), upload_to=finance_report_file_rename,
                             validators=[*management_file_validator()],
                             blank=True, null=True)
 
@@ -165,8 +166,8 @@ def scientific_report_file_rename(instance, filename):
     return f'grant_management/ScientificReport/Project-{instance.project.key}-{filename}'
 
 
-class ScientificReport(AbstractProjectReport):
-    file = models.FileField(storage=S3Boto3Storage(), upload_to=scientific_report_file_rename,
+class ScientificReport(AbstractProjectReport, FileMetadata):
+    file = models.FileField(storage=SpiS3Boto3Storage(), upload_to=scientific_report_file_rename,
                             validators=[*management_file_validator()],
                             blank=True, null=True)
 
@@ -228,7 +229,7 @@ def medium_file_rename(instance, filename):
     return f'grant_management/Medium/Project-{instance.project.key}-{filename}'
 
 
-class Medium(CreateModifyOn):
+class Medium(CreateModifyOn, FileMetadata):
     project = models.ForeignKey(Project, help_text='Project that this medium belongs to', on_delete=models.PROTECT)
     received_date = models.DateField(help_text='Date that the medium was received')
     photographer = models.ForeignKey(PhysicalPerson, help_text='Person who took the photo/video',
@@ -238,7 +239,7 @@ class Medium(CreateModifyOn):
     copyright = models.CharField(max_length=1024,
                                  help_text='Owner of copyright if it is not the photographer (e.g. institution)',
                                  null=True, blank=True)
-    file = models.FileField(storage=S3Boto3Storage(), upload_to=medium_file_rename,
+    file = models.FileField(storage=SpiS3Boto3Storage(), upload_to=medium_file_rename,
                             validators=[*management_file_validator()])
     file_md5 = models.CharField(max_length=32, null=True, blank=True)
 
@@ -255,7 +256,13 @@ class Medium(CreateModifyOn):
         return f'{self.project}-{self.photographer}'
 
     def save(self, *args, **kwargs):
-        self.file_md5 = calculate_md5_from_file_field(self.file)
+        if not self.file._committed:
+            # The md5 and size are calculated while the file is uploaded
+            self.file_md5, size = save_file_field_calculating_md5(self.file)
+            self.set_file_metadata(size)
+        elif not self.file_md5:
+            self.file_md5, _ = calculate_md5_and_size_from_file_field(self.file)
+
         # Be sure only one primary_image per project
         if self.primary_image:
           with transaction.atomic():
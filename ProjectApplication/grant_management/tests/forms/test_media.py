@@ -1,3 +1,4 @@
+import hashlib
 from datetime import datetime
 
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -28,5 +29,9 @@ class MediumModelFormTest(TestCase):
         self.assertEqual(Medium.objects.all().count(), 0)
         medium_form = MediumModelForm(data=data, files=file, project=self._project)
         self.assertTrue(medium_form.is_valid())
-        medium_form.save()
+        medium = medium_form.save()
         self.assertEqual(Medium.objects.all().count(), 1)
+
+        # Calculated while the file was uploaded
+        self.assertEqual(medium.file_md5, hashlib.md5(b'This should contain a JPEG for example.').hexdigest())
+        self.assertEqual(medium.file_size, 39)
@@ -1,5 +1,10 @@
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from storages.backends.s3boto3 import S3Boto3Storage
 
+from project_core.templatetags.filesizeformat_safe import filesizeformat_safe
 from project_core.tests import database_population
 from ..models import Invoice, Installment
 
@@ -28,3 +33,25 @@ class InvoiceTest(TestCase):
 
         self.assertIsNone(invoice.installment_number())
 
+
+    def test_file_metadata(self):
+        invoice = Invoice.objects.create(project=self._project,
+                                         due_date=self._project.end_date,
+                                         file=SimpleUploadedFile('invoice.pdf', b'This should be a PDF'))
+
+        invoice = Invoice.objects.get(id=invoice.id)
+        self.assertEqual(invoice.file_size, 20)
+        self.assertEqual(invoice.file_content_type, 'application/pdf')
+        self.assertIsNotNone(invoice.file_uploaded_on)
+
+        # The size is not read from the storage
+        with mock.patch.object(S3Boto3Storage, 'size') as size:
+            self.assertEqual(filesizeformat_safe(invoice.file), '20\xa0bytes')
+        size.assert_not_called()
+
+    def test_file_metadata_without_file(self):
+        invoice = Invoice.objects.create(project=self._project,
+                                         due_date=self._project.end_date)
+
+        self.assertIsNone(invoice.file_size)
+        self.assertIsNone(invoice.file_content_type)
@@ -8,7 +8,7 @@ from django.urls import reverse
 from django.utils.datastructures import MultiValueDict
 
 from ProjectApplication import settings
-from grant_management.models import GrantAgreement, Installment, Invoice, LaySummaryType, LaySummary
+from grant_management.models import GrantAgreement, Installment, Invoice, LaySummaryType, LaySummary, Medium
 from project_core.tests import database_population
 from project_core.tests.utils_for_tests import dict_to_multivalue_dict
 
@@ -24,6 +24,25 @@ class ProjectListTest(TestCase):
 
         self.assertContains(response, self._project.title)
 
+    def test_get_json(self):
+        response = self._client_management.get(
+            reverse('logged-grant_management-project-list-json', kwargs={'status': 'ongoing'}))
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['recordsTotal'], 1)
+        self.assertEqual(data['data'][0][1], self._project.title)
+        self.assertIn(reverse('logged-grant_management-project-detail', kwargs={'pk': self._project.id}),
+                      data['data'][0][4])
+
+        response = self._client_management.get(
+            reverse('logged-grant_management-project-list-json', kwargs={'status': 'closed'}))
+        self.assertEqual(response.json()['recordsTotal'], 0)
+
+        response = self._client_management.get(
+            reverse('logged-grant_management-project-list-json', kwargs={'status': 'unknown'}))
+        self.assertEqual(response.status_code, 404)
+
 
 class ProjectDetailsTest(TestCase):
     def setUp(self):
@@ -391,7 +410,7 @@ class TestApiListMediaView(TestCase):
         )
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content, b'[]')
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
 
     def test_get_one_medium(self):
         project = database_population.create_project()
@@ -404,7 +423,7 @@ class TestApiListMediaView(TestCase):
 
         self.assertEqual(response.status_code, 200)
 
-        json_body = json.loads(response.content)
+        json_body = json.loads(b''.join(response.streaming_content))
 
         self.assertEqual(len(json_body), 1)
 
@@ -414,3 +433,62 @@ class TestApiListMediaView(TestCase):
         self.assertEqual(medium_json['copyright'], medium.copyright)
         self.assertEqual(medium_json['file_md5'], medium.file_md5)
         self.assertEqual(medium_json['descriptive_text'], medium.descriptive_text)
+
+    def test_get_media_pages(self):
+        project = database_population.create_project()
+        medium1 = database_population.create_medium(project)
+        medium2 = Medium.objects.create(project=project, received_date=medium1.received_date,
+                                        photographer=medium1.photographer,
+                                        file=SimpleUploadedFile('photo_expedition_2.jpg', b'Another photo'))
+
+        response = self._client.get(reverse('api-list-media-view'),
+                                    {'modified_since': '2017-01-28T21:00:00+00:00', 'limit': 1},
+                                    HTTP_ApiKey=settings.API_SECRET_KEY)
+
+        self.assertEqual([medium['id'] for medium in json.loads(b''.join(response.streaming_content))], [medium1.id])
+        self.assertIn('rel="next"', response['Link'])
+
+        next_page_url = response['Link'][1:response['Link'].index('>')]
+        response = self._client.get(next_page_url, HTTP_ApiKey=settings.API_SECRET_KEY)
+
+        self.assertEqual([medium['id'] for medium in json.loads(b''.join(response.streaming_content))], [medium2.id])
+
+        next_page_url = response['Link'][1:response['Link'].index('>')]
+        response = self._client.get(next_page_url, HTTP_ApiKey=settings.API_SECRET_KEY)
+
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+        self.assertFalse(response.has_header('Link'))
+
+    def test_get_media_invalid_parameters(self):
+        response = self._client.get(reverse('api-list-media-view'), {'cursor': 'not-a-cursor'},
+                                    HTTP_ApiKey=settings.API_SECRET_KEY)
+        self.assertEqual(response.status_code, 400)
+
+        response = self._client.get(reverse('api-list-media-view'),
+                                    {'modified_since': '2017-01-28T21:00:00+00:00', 'limit': 0},
+                                    HTTP_ApiKey=settings.API_SECRET_KEY)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_media_not_modified(self):
+        project = database_population.create_project()
+        medium = database_population.create_medium(project)
+        parameters = {'modified_since': '2017-01-28T21:00:00+00:00'}
+
+        response = self._client.get(reverse('api-list-media-view'), parameters, HTTP_ApiKey=settings.API_SECRET_KEY)
+        etag = response['ETag']
+
+        response = self._client.get(reverse('api-list-media-view'), parameters, HTTP_ApiKey=settings.API_SECRET_KEY,
+                                    HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        medium_id = medium.id
+        medium.delete()
+
+        response = self._client.get(reverse('api-list-media-view'), parameters, HTTP_ApiKey=settings.API_SECRET_KEY,
+                                    HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+        response = self._client.get(reverse('api-list-media-deleted-view'), parameters,
+                                    HTTP_ApiKey=settings.API_SECRET_KEY)
+        self.assertEqual(json.loads(b''.join(response.streaming_content))[0]['id'], medium_id)
@@ -6,6 +6,9 @@ urlpatterns = [
     path('logged/grant-management/project/list/',
          grant_management.views.ProjectList.as_view(),
          name='logged-grant_management-project-list'),
+    path('logged/grant-management/project/list/<str:status>/json/',
+         grant_management.views.ProjectListJson.as_view(),
+         name='logged-grant_management-project-list-json'),
     path('logged/grant-management/project/<int:pk>/',
          grant_management.views.ProjectDetail.as_view(),
          name='logged-grant_management-project-detail'),
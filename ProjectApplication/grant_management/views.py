@@ -1,12 +1,19 @@
 import abc
+import base64
+import hashlib
+import json
 from datetime import datetime
+from urllib.parse import urlencode
 
 from dal import autocomplete
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import JsonResponse, HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Count, Max
+from django.http import HttpResponse, Http404, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
 from django.views import View
 from django.views.generic import TemplateView, DetailView, UpdateView, CreateView
 
@@ -21,7 +28,10 @@ from grant_management.forms.reports import FinancialReportsInlineFormSet, Scient
 from grant_management.models import GrantAgreement, MilestoneCategory, Medium, MediumDeleted
 from project_core.decorators import api_key_required
 from project_core.models import Project
+from project_core.utils.utils import iterate_in_chunks
+from project_core.views.common.datatables import AbstractDataTableJson
 from project_core.views.common.formset_inline_view import InlineFormsetUpdateView
+from project_core.views.logged.project import ProjectDataTable
 from .forms.close_project import CloseProjectModelForm
 from .forms.datasets import DatasetInlineFormSet
 from .forms.locations import LocationsInlineFormSet
@@ -32,14 +42,26 @@ from .forms.publications import PublicationsInlineFormSet
 from .forms.social_network import SocialNetworksInlineFormSet
 
 
+def grant_management_project_data_table(status):
+    if status == 'ongoing':
+        projects = Project.objects.filter(status=Project.ONGOING)
+    elif status == 'closed':
+        projects = Project.objects.exclude(status=Project.ONGOING)
+    else:
+        raise Http404
+
+    return ProjectDataTable(projects, 'logged-grant_management-project-detail')
+
+
 class ProjectList(TemplateView):
     template_name = 'grant_management/project-list.tmpl'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context['projects_active'] = Project.objects.all().filter(status=Project.ONGOING)
-        context['projects_inactive'] = Project.objects.all().exclude(status=Project.ONGOING)
+        # Only the first page of each table is rendered here: DataTables requests the rest from ProjectListJson
+        context['projects_active_table'] = grant_management_project_data_table('ongoing').page({})
+        context['projects_inactive_table'] = grant_management_project_data_table('closed').page({})
 
         context.update({'active_section': 'grant_management',
                         'active_subsection': 'project-list',
@@ -53,6 +75,11 @@ class ProjectList(TemplateView):
         return context
 
 
+class ProjectListJson(AbstractDataTableJson):
+    def data_table(self):
+        return grant_management_project_data_table(self.kwargs['status'])
+
+
 class ProjectDetail(DetailView):
     template_name = 'grant_management/project-detail.tmpl'
     context_object_name = 'project'
@@ -430,86 +457,162 @@ class GrantAgreementCommentAdd(AbstractGrantAgreement):
         return result
 
 
+def encode_cursor(obj):
+    # The position of obj in the lists ordered by modified_on and id
+    cursor = f'{obj.modified_on.isoformat()}|{obj.id}'
+
+    return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Returns (modified_on, id). Raises ValueError if the cursor is not valid"""
+    modified_on_str, id_str = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+
+    return datetime.fromisoformat(modified_on_str), int(id_str)
+
+
 class ApiList(abc.ABC, View):
+    """
+    Returns a JSON array with the objects modified after the modified_since parameter, ordered by modified_on and id.
+
+    If the limit parameter is used only the first limit objects are returned. If there might be more objects the
+    Link header contains the URL of the next page: it uses the parameter cursor instead of modified_since.
+
+    The responses have an ETag: if nothing has changed the response is a 304 (Not Modified).
+    """
+
     @api_key_required
     def get(self, request, *args, **kwargs):
-        modified_since_str = request.GET['modified_since']
-        modified_since_str = modified_since_str.replace('Z', '+00:00')
+        objects = self.get_queryset()
+
+        if 'cursor' in request.GET:
+            try:
+                modified_on, last_id = decode_cursor(request.GET['cursor'])
+            except ValueError:
+                return HttpResponse(status=400, content='Invalid cursor')
+
+            objects = objects.filter(Q(modified_on__gt=modified_on) | Q(modified_on=modified_on, id__gt=last_id))
+        else:
+            modified_since_str = request.GET['modified_since']
+            modified_since_str = modified_since_str.replace('Z', '+00:00')
+
+            try:
+                modified_since = datetime.fromisoformat(modified_since_str)
+            except ValueError:
+                return HttpResponse(status=400,
+                                    content='Invalid date format, please use %Y-%m-%dT%H:%M:%S%z E.g.: 2017-01-28T21:00:00+00:00')
 
-        try:
-            modified_since = datetime.fromisoformat(modified_since_str)
-        except ValueError:
-            return HttpResponse(status=400,
-                                content='Invalid date format, please use %Y-%m-%dT%H:%M:%S%z E.g.: 2017-01-28T21:00:00+00:00')
+            objects = objects.filter(modified_on__gt=modified_since)
 
-        return self.generate_json(modified_since)
+        limit = None
+        if 'limit' in request.GET:
+            limit = request.GET['limit']
+
+            if not limit.isdigit() or int(limit) == 0:
+                return HttpResponse(status=400, content='Invalid limit, please use a positive integer')
+
+            limit = int(limit)
+
+        objects = objects.order_by('modified_on', 'id')
+
+        etag = ApiList._etag(request, objects)
+
+        not_modified_response = get_conditional_response(request, etag=etag)
+        if not_modified_response is not None:
+            return not_modified_response
+
+        if limit is None:
+            page = iterate_in_chunks(objects)
+        else:
+            page = list(objects[:limit])
+
+        response = StreamingHttpResponse(self._json_array(page), content_type='application/json')
+        response['ETag'] = etag
+
+        if limit is not None and len(page) == limit:
+            next_page_parameters = urlencode({'cursor': encode_cursor(page[-1]), 'limit': limit})
+            next_page_url = request.build_absolute_uri(f'{request.path}?{next_page_parameters}')
+            response['Link'] = f'<{next_page_url}>; rel="next"'
+
+        return response
+
+    @staticmethod
+    def _etag(request, objects):
+        # Any change in the listed objects changes the number of objects or the last modified_on
+        summary = objects.aggregate(count=Count('id'), last_modified_on=Max('modified_on'), last_id=Max('id'))
+
+        etag = f'{request.get_full_path()}|{summary["count"]}|{summary["last_modified_on"]}|{summary["last_id"]}'
+
+        return f'"{hashlib.md5(etag.encode("utf-8")).hexdigest()}"'
+
+    def _json_array(self, objects):
+        # The array is written while the response is sent (compact JSON: the consumer is another application)
+        yield '['
+
+        for index, obj in enumerate(objects):
+            if index > 0:
+                yield ','
+
+            yield json.dumps(self.object_to_json(obj), cls=DjangoJSONEncoder, separators=(',', ':'))
+
+        yield ']'
+
+    @abc.abstractmethod
+    def get_queryset(self):
+        """ Subclass should implement and return the QuerySet of the objects to list """
 
     @abc.abstractmethod
-    def generate_json(self, modified_since):
-        """ Subclass should implement and return a JsonResponse """
+    def object_to_json(self, obj):
+        """ Subclass should implement and return a dictionary with the information of obj """
 
 
 class ApiListMediaView(ApiList):
-    def generate_json(self, modified_since):
-        media = Medium.objects.filter(modified_on__gt=modified_since).order_by('modified_on')
-
-        data = []
-        for medium in media:
-            medium_info = {}
-            medium_info['id'] = medium.id
-            medium_info['received_date'] = medium.received_date
-
-            if medium.license:
-                medium_info['license'] = medium.license.spdx_identifier
-            else:
-                medium_info['license'] = None
-
-            medium_info['copyright'] = medium.copyright
-            medium_info['file_url'] = medium.file.url
-            medium_info['file_md5'] = medium.file_md5
-            medium_info['original_file_path'] = medium.file.name
-            medium_info['modified_on'] = medium.modified_on
-            medium_info['descriptive_text'] = medium.descriptive_text
-
-            project_info = {}
-            project_info['key'] = medium.project.key
-            project_info['title'] = medium.project.title
-            project_info['funding_instrument'] = medium.project.call.funding_instrument.long_name
-            project_info['finance_year'] = medium.project.call.finance_year
-            project_info['pi'] = medium.project.principal_investigator.person.full_name()
-            medium_info['project'] = project_info
-
-            photographer_info = {}
-            photographer_info['first_name'] = medium.photographer.first_name
-            photographer_info['last_name'] = medium.photographer.surname
-
-            medium_info['photographer'] = photographer_info
-
-            data.append(medium_info)
-
-        # safe=False... but it's safe in this case. See:
-        # https://docs.djangoproject.com/en/3.1/ref/request-response/#serializing-non-dictionary-objects
-        # Besides it's safe in modern browsers: this call is only used internally (it's protected) and the
-        # consumer is another Django application, not a browser
-        return JsonResponse(data=data, status=200, json_dumps_params={'indent': 2}, safe=False)
+    def get_queryset(self):
+        return Medium.objects.select_related('license', 'photographer', 'project__call__funding_instrument',
+                                             'project__principal_investigator__person')
 
+    def object_to_json(self, medium):
+        medium_info = {}
+        medium_info['id'] = medium.id
+        medium_info['received_date'] = medium.received_date
 
-class ApiListMediaDeletedView(ApiList):
-    def generate_json(self, modified_since):
-        media_deleted = MediumDeleted.objects.filter(modified_on__gt=modified_since).order_by('created_on')
+        if medium.license:
+            medium_info['license'] = medium.license.spdx_identifier
+        else:
+            medium_info['license'] = None
+
+        medium_info['copyright'] = medium.copyright
+        medium_info['file_url'] = medium.file.url
+        medium_info['file_md5'] = medium.file_md5
+        medium_info['original_file_path'] = medium.file.name
+        medium_info['modified_on'] = medium.modified_on
+        medium_info['descriptive_text'] = medium.descriptive_text
 
-        data = []
+        project_info = {}
+        project_info['key'] = medium.project.key
+        project_info['title'] = medium.project.title
+        project_info['funding_instrument'] = medium.project.call.funding_instrument.long_name
+        project_info['finance_year'] = medium.project.call.finance_year
+        project_info['pi'] = medium.project.principal_investigator.person.full_name()
+        medium_info['project'] = project_info
 
-        for medium_deleted in media_deleted:
-            medium_deleted_info = {}
+        photographer_info = {}
+        photographer_info['first_name'] = medium.photographer.first_name
+        photographer_info['last_name'] = medium.photographer.surname
+
+        medium_info['photographer'] = photographer_info
+
+        return medium_info
+
+
+class ApiListMediaDeletedView(ApiList):
+    def get_queryset(self):
+        return MediumDeleted.objects.all()
 
-            medium_deleted_info['id'] = medium_deleted.original_id
-            medium_deleted_info['deleted_on'] = medium_deleted.created_on
+    def object_to_json(self, medium_deleted):
+        medium_deleted_info = {}
 
-            data.append(medium_deleted_info)
+        medium_deleted_info['id'] = medium_deleted.original_id
+        medium_deleted_info['deleted_on'] = medium_deleted.created_on
 
-        # safe=False... but it's safe in this case. See:
-        # https://docs.djangoproject.com/en/3.1/ref/request-response/#serializing-non-dictionary-objects
-        # Besides it's safe in modern browsers: this call is only used internally (it's protected) and the
-        # consumer is another Django application, not a browser
-        return JsonResponse(data=data, status=200, json_dumps_params={'indent': 2}, safe=False)
+        return medium_deleted_info
@@ -328,6 +328,14 @@ class ProposalQAFileAdmin(admin.ModelAdmin):
     readonly_fields = ('created_on', 'modified_on',)
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    search_fields = ('subject', 'recipients', 'last_error',)
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_on', 'sent_on', 'proposal',
+                    'purpose', 'created_on',)
+    ordering = ('-created_on',)
+    readonly_fields = ('created_on', 'modified_on',)
+
+
 class ProjectAdmin(admin.ModelAdmin):
     search_fields = ('title', 'key', 'uuid', 'location', 'principal_investigator__person__first_name',
                      'principal_investigator__person__surname',)
@@ -419,6 +427,7 @@ admin.site.register(project_core.models.CallCareerStage, CallCareerStageAdmin)
 admin.site.register(project_core.models.Role, RoleAdmin)
 admin.site.register(project_core.models.ProposalPartner, ProposalPartnerAdmin)
 admin.site.register(project_core.models.ProposalQAFile, ProposalQAFileAdmin)
+admin.site.register(project_core.models.OutgoingEmail, OutgoingEmailAdmin)
 admin.site.register(project_core.models.Project, ProjectAdmin)
 admin.site.register(project_core.models.ProjectPartner, ProjectPartnerAdmin)
 admin.site.register(project_core.models.FinancialKey, FinancialKeyAdmin)
@@ -0,0 +1,62 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# The responses of the public API are cached using keys that contain the current version. Changing the version
+# (see invalidate()) makes all the cached responses unreachable: they expire with PROJECT_API_CACHE_TIMEOUT.
+VERSION_KEY = 'api-version'
+
+
+def _new_version():
+    version = uuid.uuid4().hex
+    cache.set(VERSION_KEY, version, timeout=None)
+
+    return version
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        version = _new_version()
+
+    return version
+
+
+def invalidate():
+    _new_version()
+
+
+def invalidate_now_and_on_commit():
+    # Now: the transaction that did the changes sees them. On commit: another request could have cached
+    # the responses again before the changes were committed
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def _request_key(request):
+    # The host is part of the key: the responses contain absolute URLs (e.g. next page)
+    parameters = urlencode(sorted(request.GET.lists()), doseq=True)
+    request_id = f'{request.get_host()}{request.path}?{parameters}'
+
+    return hashlib.md5(request_id.encode('utf-8')).hexdigest()
+
+
+def get_response_data(request, calculate_function):
+    """
+    Returns the data of the response to request: the result of calculate_function if it is not in the cache.
+    The query parameters are part of the key (their order does not matter).
+    """
+    key = f'api-{_current_version()}-{_request_key(request)}'
+
+    data = cache.get(key)
+
+    if data is None:
+        data = calculate_function()
+        cache.set(key, data, settings.PROJECT_API_CACHE_TIMEOUT)
+
+    return data
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ProjectCoreConfig(AppConfig):
     name = 'project_core'
+
+    def ready(self):
+        # Connects the signals that invalidate the cached details of submitted proposals
+        from . import signals
@@ -0,0 +1,167 @@
+import os
+import re
+import time
+import uuid
+from datetime import timedelta
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from project_core.models import ProposalQAFile
+from project_core.utils.utils import FILE_SIZE_LIMIT, EXTERNAL_FILE_ALLOWED_EXTENSIONS, bytes_to_human_readable
+
+# The files of the answers of the proposals can be uploaded by the browser directly to the bucket (with a
+# presigned POST) instead of through the server. The browser then sends a signed token with the key of the
+# uploaded object: the server verifies the object (size, extension) and records the ProposalQAFile.
+# The token can only be used in the session that requested it. Objects that are not used by a ProposalQAFile
+# are deleted by the deleteunuseddirectuploads command.
+# The bucket needs to allow (CORS) POST requests from the site: see PROPOSAL_FILES_DIRECT_UPLOAD.
+SIGNING_SALT = 'project_core.direct_upload'
+
+MD5_ETAG_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Names of the objects uploaded directly: upload_to, uuid4 hex and the name of the file
+DIRECT_UPLOAD_NAME_RE = re.compile(r'^[0-9a-f]{32}-')
+
+
+class DirectUploadedFile:
+    """File uploaded directly to the bucket. It is used as the cleaned value of the file fields"""
+
+    def __init__(self, name, size, md5):
+        # name is relative to the storage location (as FileField.name)
+        self.name = name
+        self.size = size
+        self.md5 = md5
+
+
+def is_enabled():
+    return settings.PROPOSAL_FILES_DIRECT_UPLOAD
+
+
+def _storage():
+    return ProposalQAFile._meta.get_field('file').storage
+
+
+def _upload_to():
+    return ProposalQAFile._meta.get_field('file').upload_to
+
+
+def _token_max_age():
+    # The token is valid longer than the presigned POST: the applicant might take time to save the form
+    return settings.PROPOSAL_FILES_DIRECT_UPLOAD_EXPIRE * 24
+
+
+def file_name_is_allowed(file_name):
+    extension = os.path.splitext(file_name)[1][1:].lower()
+    return extension in EXTERNAL_FILE_ALLOWED_EXTENSIONS
+
+
+def presigned_post_is_allowed(client_address):
+    """Counts the presigned POSTs requested by client_address. Returns False if it has requested more than
+    PROPOSAL_FILES_DIRECT_UPLOAD_RATE_LIMIT during the current hour"""
+    key = f'direct-upload-rate-{client_address}-{int(time.time() // 3600)}'
+
+    # Not atomic: a few more might be allowed if there are concurrent requests
+    count = cache.get(key, 0) + 1
+    cache.set(key, count, 3600)
+
+    return count <= settings.PROPOSAL_FILES_DIRECT_UPLOAD_RATE_LIMIT
+
+
+def create_presigned_post(call_question, file_name, session_key):
+    """
+    Returns a dictionary with the 'url' and 'fields' that the browser uses to POST the file to the bucket
+    and the 'token' that it sends with the proposal form (only valid in the session session_key)
+    """
+    storage = _storage()
+
+    name = f'{_upload_to()}{uuid.uuid4().hex}-{get_valid_filename(os.path.basename(file_name))}'
+
+    presigned_post = storage.bucket.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=storage._normalize_name(name),
+        Fields={'acl': settings.AWS_DEFAULT_ACL},
+        Conditions=[{'acl': settings.AWS_DEFAULT_ACL},
+                    ['content-length-range', 1, FILE_SIZE_LIMIT]],
+        ExpiresIn=settings.PROPOSAL_FILES_DIRECT_UPLOAD_EXPIRE)
+
+    result = {}
+    result['url'] = presigned_post['url']
+    result['fields'] = presigned_post['fields']
+    result['token'] = signing.dumps({'name': name, 'call_question': call_question.id, 'session': session_key},
+                                    salt=SIGNING_SALT)
+
+    return result
+
+
+def md5_from_etag(s3_object):
+    """Returns the md5 of the object from its ETag, or None if the ETag is not the md5"""
+    # For non-multipart uploads the ETag is the md5 of the file, unless the object is encrypted with
+    # SSE-KMS or SSE-C
+    if s3_object.server_side_encryption == 'aws:kms' or s3_object.sse_customer_algorithm:
+        return None
+
+    etag = s3_object.e_tag.strip('"')
+
+    return etag if MD5_ETAG_RE.match(etag) else None
+
+
+def uploaded_file_from_token(token, call_question, session_key):
+    """Returns the DirectUploadedFile of the token after verifying the object in the bucket. Raises
+    ValidationError if the token is not valid (or from another session) or the object does not exist or is not
+    acceptable"""
+    try:
+        data = signing.loads(token, salt=SIGNING_SALT, max_age=_token_max_age())
+    except signing.BadSignature:
+        raise ValidationError('The uploaded file has expired, please upload it again')
+
+    name = data['name']
+
+    if data['call_question'] != call_question.id or data.get('session') != session_key \
+            or not name.startswith(_upload_to()) or not file_name_is_allowed(name):
+        raise ValidationError('Invalid uploaded file, please upload it again')
+
+    storage = _storage()
+
+    try:
+        s3_object = storage.bucket.Object(storage._normalize_name(name))
+        s3_object.load()
+    except (ClientError, EndpointConnectionError):
+        raise ValidationError('The uploaded file could not be found, please upload it again')
+
+    if s3_object.content_length > FILE_SIZE_LIMIT:
+        raise ValidationError(f'Maximum file size is {bytes_to_human_readable(FILE_SIZE_LIMIT)}')
+
+    # If md5 is None ProposalQAFile calculates it reading the object
+    return DirectUploadedFile(name, s3_object.content_length, md5_from_etag(s3_object))
+
+
+def delete_unused_uploads():
+    """Deletes the objects uploaded directly that are not used by any ProposalQAFile and whose token has
+    expired. Returns the number of deleted objects"""
+    storage = _storage()
+    uploaded_before = timezone.now() - timedelta(seconds=_token_max_age())
+
+    prefix = storage._normalize_name(_upload_to())
+
+    names = []
+    for s3_object in storage.bucket.objects.filter(Prefix=prefix):
+        name = _upload_to() + s3_object.key[len(prefix):]
+
+        if DIRECT_UPLOAD_NAME_RE.match(name[len(_upload_to()):]) and s3_object.last_modified < uploaded_before:
+            names.append(name)
+
+    used_names = set(ProposalQAFile.objects.filter(file__in=names).values_list('file', flat=True))
+
+    deleted = 0
+    for name in names:
+        if name not in used_names:
+            storage.delete(name)
+            deleted += 1
+
+    return deleted
@@ -0,0 +1,102 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from project_core.models import OutgoingEmail
+
+logger = logging.getLogger('project_core')
+
+# The emails are saved in the database (OutgoingEmail) and sent by the sendqueuedemails command: SMTP latency or
+# errors do not affect the requests. The failed emails are retried with a backoff (see OutgoingEmail.mark_failed).
+# Several sendqueuedemails can run at the same time: each batch is claimed in a short transaction (rows locked by
+# another worker are skipped) by moving its next_attempt_on EMAIL_QUEUE_LEASE_SECONDS forward. The emails are sent
+# outside of any transaction and each result is saved (committed) as soon as it is known.
+
+
+def queue_email(subject, body, recipient_list, proposal=None, purpose=None):
+    """Saves the email to be sent by the sendqueuedemails command. If purpose is a proposal purpose the proposal's
+    flag is set once the email is sent. Returns the OutgoingEmail"""
+    return OutgoingEmail.objects.create(subject=subject,
+                                        body=body,
+                                        from_email=settings.DEFAULT_FROM_EMAIL,
+                                        recipients=','.join(recipient_list),
+                                        proposal=proposal,
+                                        purpose=purpose)
+
+
+def proposal_email_is_queued(proposal, purpose):
+    return OutgoingEmail.objects.filter(proposal=proposal, purpose=purpose, status=OutgoingEmail.PENDING).exists()
+
+
+def send_queued_emails(batch_size=None):
+    """Sends the pending emails that are due (at most batch_size) using one SMTP connection. Returns the number of
+    emails sent and the number of emails that failed"""
+    if batch_size is None:
+        batch_size = settings.EMAIL_QUEUE_BATCH_SIZE
+
+    emails = _claim_emails(batch_size)
+
+    if not emails:
+        return 0, 0
+
+    return _send_emails(emails)
+
+
+def _claim_emails(batch_size):
+    with transaction.atomic():
+        emails = list(OutgoingEmail.objects.
+                      select_for_update(skip_locked=True).
+                      filter(status=OutgoingEmail.PENDING, next_attempt_on__lte=timezone.now()).
+                      order_by('next_attempt_on', 'id')[:batch_size])
+
+        lease_until = timezone.now() + timedelta(seconds=settings.EMAIL_QUEUE_LEASE_SECONDS)
+        OutgoingEmail.objects.filter(id__in=[email.id for email in emails]).update(next_attempt_on=lease_until)
+
+    for email in emails:
+        email.next_attempt_on = lease_until
+
+    return emails
+
+
+def _send_emails(emails):
+    sent = failed = 0
+
+    connection = get_connection()
+
+    try:
+        connection.open()
+    except Exception as exception:
+        # The SMTP server is not available: all the emails are retried later
+        logger.warning(f'NOTIFY: Cannot connect to the SMTP server: {exception}')
+
+        for email in emails:
+            email.mark_failed(f'Cannot connect: {exception}')
+
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            message = EmailMessage(subject=email.subject,
+                                   body=email.body,
+                                   from_email=email.from_email,
+                                   to=email.recipient_list(),
+                                   connection=connection)
+            try:
+                message.send()
+            except Exception as exception:
+                logger.warning(f'NOTIFY: Sending email {email.id} failed: {exception}')
+                email.mark_failed(str(exception))
+                failed += 1
+            else:
+                # The email and the proposal's flag are committed together
+                with transaction.atomic():
+                    email.mark_sent()
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
@@ -4,21 +4,104 @@ import botocore
 from botocore.exceptions import EndpointConnectionError
 from crispy_forms.helper import FormHelper
 from django import forms
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import Form
+from django.urls import reverse
+from django.utils import timezone
 
+import project_core.proposal_detail_cache
+from project_core import direct_upload
 from project_core.models import ProposalQAFile, ProposalQAText, CallQuestion, CallPart
 from project_core.utils.utils import external_file_validator
 
 logger = logging.getLogger('project_core')
 
 
+class ProposalAnswers:
+    """Text and file answers of a proposal. They are read with two queries and shared by the Questions
+    forms of all the parts"""
+
+    def __init__(self, proposal):
+        self._texts = {}
+        self._files = {}
+
+        if proposal is not None:
+            for proposal_qa_text in ProposalQAText.objects.filter(proposal=proposal):
+                self._texts[proposal_qa_text.call_question_id] = proposal_qa_text
+
+            for proposal_qa_file in ProposalQAFile.objects.filter(proposal=proposal):
+                self._files[proposal_qa_file.call_question_id] = proposal_qa_file
+
+    def text(self, call_question):
+        """Returns the ProposalQAText or None"""
+        return self._texts.get(call_question.id)
+
+    def file(self, call_question):
+        """Returns the ProposalQAFile or None"""
+        return self._files.get(call_question.id)
+
+    def save_texts(self, proposal, answers):
+        """answers is a list of (CallQuestion, text). Only new or changed answers are written: with one
+        query for the new ones and one for the changed ones"""
+        to_create = []
+        to_update = []
+
+        for call_question, answer in answers:
+            proposal_qa_text = self.text(call_question)
+
+            if proposal_qa_text is None:
+                proposal_qa_text = ProposalQAText(proposal=proposal, call_question=call_question, answer=answer)
+                to_create.append(proposal_qa_text)
+                self._texts[call_question.id] = proposal_qa_text
+            elif proposal_qa_text.answer != answer:
+                proposal_qa_text.answer = answer
+                # bulk_update does not set the auto_now fields
+                proposal_qa_text.modified_on = timezone.now()
+                to_update.append(proposal_qa_text)
+
+        ProposalQAText.objects.bulk_create(to_create)
+        ProposalQAText.objects.bulk_update(to_update, ['answer', 'modified_on'])
+
+        if to_create or to_update:
+            # bulk_create and bulk_update do not send the post_save signal
+            project_core.proposal_detail_cache.invalidate_proposal_on_commit(proposal)
+
+    def save_file(self, proposal, call_question, file):
+        proposal_qa_file = self.file(call_question)
+
+        if proposal_qa_file is None:
+            proposal_qa_file = ProposalQAFile(proposal=proposal, call_question=call_question)
+
+        if isinstance(file, direct_upload.DirectUploadedFile):
+            # The object is already in the bucket
+            proposal_qa_file.file = file.name
+            proposal_qa_file.md5 = file.md5
+            proposal_qa_file.set_file_metadata(file.size)
+        else:
+            proposal_qa_file.file = file
+
+        proposal_qa_file.save()
+
+        self._files[call_question.id] = proposal_qa_file
+
+    def delete_file(self, call_question):
+        proposal_qa_file = self._files.pop(call_question.id, None)
+
+        if proposal_qa_file is not None:
+            proposal_qa_file.delete()
+
+
 class Questions(Form):
     def __init__(self, *args, **kwargs):
         self._call = kwargs.pop('call', None)
         self._proposal = kwargs.pop('proposal', None)
         self._call_part: CallPart = kwargs.pop('call_part')
         only_files = kwargs.pop('only_files', False)
+        # Session of the request: the tokens of the files uploaded directly are only valid in their session
+        self._session_key = kwargs.pop('session_key', None)
+        # ProposalParts passes the same answers to the forms of all the parts
+        self._answers = kwargs.pop('answers', None) or ProposalAnswers(self._proposal)
 
         assert self._call or self._proposal
 
@@ -26,6 +109,9 @@ class Questions(Form):
 
         self._questions_answers_text = []
         self._questions_answers_file = []
+        self._call_questions = {}
+        # Name of the hidden field with the token of the direct upload: name of the file field
+        self._direct_upload_fields = {}
 
         if self._proposal:
             self._call = self._proposal.call
@@ -33,11 +119,9 @@ class Questions(Form):
         if only_files is False:
             for question in self._call_part.questions_type_text():
                 answer = None
-                if self._proposal:
-                    try:
-                        answer = ProposalQAText.objects.get(proposal=self._proposal, call_question=question).answer
-                    except ObjectDoesNotExist:
-                        pass
+                proposal_qa_text = self._answers.text(question)
+                if proposal_qa_text is not None:
+                    answer = proposal_qa_text.answer
 
                 question_text = question.question_text
                 if question.answer_max_length:
@@ -48,22 +132,24 @@ class Questions(Form):
                                                                                  initial=answer,
                                                                                  help_text=question.question_description,
                                                                                  required=question.answer_required)
+                self._call_questions['question_{}'.format(question.pk)] = question
 
                 self._questions_answers_text.append({'question': question, 'answer': answer})
 
         for question in self._call_part.questions_type_files():
             question_label = 'question_{}'.format(question.pk)
 
-            try:
-                file = ProposalQAFile.objects.get(proposal=self._proposal, call_question=question).file
+            proposal_qa_file = self._answers.file(question)
+
+            if proposal_qa_file is not None:
                 # TODO: refactor to avoid repetition
                 self.fields['question_{}'.format(question.pk)] = forms.FileField(label=question.question_text,
                                                                                  help_text=question.question_description,
-                                                                                 initial=file,
+                                                                                 initial=proposal_qa_file.file,
                                                                                  required=question.answer_required,
                                                                                  validators=[*external_file_validator()])
 
-            except ObjectDoesNotExist:
+            else:
                 question_label_with_prefix = kwargs['prefix'] + '-' + question_label
 
                 if question_label_with_prefix in self.files:
@@ -80,6 +166,11 @@ class Questions(Form):
                                                                   required=question.answer_required,
                                                                   validators=[*external_file_validator()])
 
+            self._call_questions[question_label] = question
+
+            if direct_upload.is_enabled():
+                self._setup_direct_upload(question_label, question)
+
             self._questions_answers_file.append({'question': question,
                                                  'answer': self.fields[question_label].initial}
                                                 )
@@ -87,6 +178,22 @@ class Questions(Form):
         self.helper = FormHelper(self)
         self.helper.form_tag = False
 
+    def _setup_direct_upload(self, question_label, question):
+        # The browser uploads the file to the bucket (static/js/direct_upload.js) and sets the token in
+        # the hidden field: the file field is then submitted empty
+        token_field = f'{question_label}_uploaded'
+
+        self.fields[token_field] = forms.CharField(widget=forms.HiddenInput(), required=False)
+        self._direct_upload_fields[token_field] = question_label
+
+        file_field = self.fields[question_label]
+        file_field.widget.attrs['data-direct-upload-url'] = reverse('proposal-question-answer-file-upload')
+        file_field.widget.attrs['data-call-question'] = question.pk
+        file_field.widget.attrs['data-direct-upload-token-input'] = f'id_{self.add_prefix(token_field)}'
+
+        if self.data.get(self.add_prefix(token_field)):
+            file_field.required = False
+
     def questions_answers_text(self):
         return self._questions_answers_text
 
@@ -96,35 +203,26 @@ class Questions(Form):
     def save_answers(self, proposal):
         all_good = True
 
+        text_answers = []
+
         for question, answer in self.cleaned_data.items():
-            call_question = CallQuestion.objects.get(id=int(question[len('question_'):]))
+            call_question = self._call_questions[question]
 
             if call_question.answer_type == CallQuestion.TEXT:
-                ProposalQAText.objects.update_or_create(
-                    proposal=proposal, call_question=call_question,
-                    defaults={'answer': answer}
-                )
+                text_answers.append((call_question, answer))
             elif call_question.answer_type == CallQuestion.FILE:
                 if not answer:
                     # Probably the user had uploaded an optional File,
                     # then editting the draft the user clicked on "Clear"
                     # now we should delete this file
-                    file_to_delete = None
-                    try:
-                        file_to_delete = ProposalQAFile.objects.get(proposal=proposal, call_question=call_question)
-                    except ObjectDoesNotExist:
-                        pass
+                    self._answers.delete_file(call_question)
 
-                    if file_to_delete:
-                        file_to_delete.delete()
-
-                else:
-                    if '/' not in answer.name:
+                elif isinstance(answer, (UploadedFile, direct_upload.DirectUploadedFile)):
+                    # Otherwise it is the file already saved (initial value of the field): nothing to do
+                    if isinstance(answer, UploadedFile) and '/' not in answer.name:
                         answer.name = f'{self._call.id}-{proposal.id}-{answer.name}'
                     try:
-                        ProposalQAFile.objects.update_or_create(
-                            proposal=proposal, call_question=call_question,
-                            defaults={'file': answer})
+                        self._answers.save_file(proposal, call_question, answer)
                     except EndpointConnectionError:
                         all_good = False
                         logger.warning(
@@ -134,17 +232,27 @@ class Questions(Form):
                         logger.warning(
                             f'NOTIFY: Saving file for question failed (proposal: {proposal.id} call_question: {call_question.id}) -ClientError')
 
+        self._answers.save_texts(proposal, text_answers)
+
         return all_good
 
     def clean(self):
         cleaned_data = super().clean()
 
+        for token_field, question_label in self._direct_upload_fields.items():
+            token = cleaned_data.pop(token_field, None)
+
+            if token:
+                try:
+                    cleaned_data[question_label] = direct_upload.uploaded_file_from_token(
+                        token, self._call_questions[question_label], self._session_key)
+                except ValidationError as error:
+                    self.add_error(question_label, error)
+
         # list because otherwise dictionary size changes during execution
         # (need to check why exactly)
         for question_number in list(cleaned_data.keys()):
-            question_id = question_number[len('question_'):]
-
-            call_question = CallQuestion.objects.get(id=question_id)
+            call_question = self._call_questions[question_number]
 
             if call_question.answer_type == CallQuestion.TEXT:
                 answer = cleaned_data[question_number]
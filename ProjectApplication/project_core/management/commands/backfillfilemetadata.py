@@ -0,0 +1,54 @@
+import mimetypes
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from project_core.models import FileMetadata
+from project_core.utils.utils import iterate_in_chunks
+
+
+def file_metadata_from_storage(field_file):
+    """Returns (size, content type, last modified) of field_file reading them from the storage"""
+    storage = field_file.storage
+
+    if isinstance(storage, S3Boto3Storage):
+        # One HEAD request for the three of them: opening it only reads its metadata
+        with storage.open(field_file.name, 'rb') as s3_file:
+            s3_object = s3_file.obj
+            return s3_object.content_length, s3_object.content_type, s3_object.last_modified
+
+    return storage.size(field_file.name), mimetypes.guess_type(field_file.name)[0], \
+        storage.get_modified_time(field_file.name)
+
+
+class Command(BaseCommand):
+    help = 'Reads from the storage the size, content type and upload date of the files that do not have them ' \
+           '(files saved before they were stored in the database)'
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if issubclass(model, FileMetadata):
+                updated, failed = self._backfill_file_metadata(model)
+
+                self.stdout.write(f'{model.__name__}: updated: {updated} failed: {failed}')
+
+    def _backfill_file_metadata(self, model):
+        updated = failed = 0
+
+        for instance in iterate_in_chunks(model.objects.filter(file_size__isnull=True).exclude(file='')):
+            try:
+                size, content_type, uploaded_on = file_metadata_from_storage(instance.file)
+            except (ClientError, EndpointConnectionError) as exception:
+                self.stderr.write(f'Cannot read the metadata of {model.__name__} {instance.pk}: {exception}')
+                failed += 1
+                continue
+
+            # update(): it does not change modified_on
+            model.objects.filter(pk=instance.pk).update(file_size=size,
+                                                        file_content_type=content_type or 'application/octet-stream',
+                                                        file_uploaded_on=uploaded_on)
+            updated += 1
+
+        return updated, failed
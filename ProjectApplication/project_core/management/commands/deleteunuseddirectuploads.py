@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from project_core.direct_upload import delete_unused_uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes the files uploaded directly to the bucket that have not been saved in any proposal ' \
+           '(e.g. the applicant closed the form)'
+
+    def handle(self, *args, **options):
+        deleted = delete_unused_uploads()
+
+        self.stdout.write(f'Deleted files: {deleted}')
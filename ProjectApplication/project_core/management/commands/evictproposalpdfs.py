@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from project_core.views.common.proposal_pdf import ProposalPdfCache
+
+
+class Command(BaseCommand):
+    help = 'Deletes the PDFs of the proposals cached for previous versions of the proposals and the oldest ones ' \
+           'if they use more than PROPOSAL_PDF_CACHE_MAX_SIZE'
+
+    def handle(self, *args, **options):
+        if settings.PROPOSAL_PDF_CACHE_STORAGE == 'none':
+            return
+
+        deleted = ProposalPdfCache().evict()
+
+        self.stdout.write(f'Deleted PDFs: {deleted}')
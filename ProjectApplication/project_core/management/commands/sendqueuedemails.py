@@ -0,0 +1,46 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from project_core.email_queue import send_queued_emails
+
+logger = logging.getLogger('project_core')
+
+
+class Command(BaseCommand):
+    help = 'Sends the queued emails (e.g. proposal draft saved or submitted). Use --loop to keep sending them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Maximum number of emails sent with one SMTP connection')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep sending the queued emails (waits --sleep seconds when there are none)')
+        parser.add_argument('--sleep', type=int, default=10,
+                            help='Seconds to wait when there are no emails to send (with --loop)')
+
+    def handle(self, *args, **options):
+        while True:
+            if options['loop']:
+                # The database connection might have been closed by the server while waiting
+                close_old_connections()
+
+                try:
+                    sent, failed = send_queued_emails(options['batch_size'])
+                except Exception:
+                    # E.g. the database is not available: tries again later
+                    logger.exception('NOTIFY: Sending the queued emails failed')
+                    time.sleep(options['sleep'])
+                    continue
+            else:
+                sent, failed = send_queued_emails(options['batch_size'])
+
+            if sent or failed:
+                self.stdout.write(f'Emails sent: {sent} failed: {failed}')
+
+            if not options['loop']:
+                break
+
+            if sent == 0:
+                time.sleep(options['sleep'])
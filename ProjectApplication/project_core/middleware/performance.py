@@ -0,0 +1,165 @@
+import contextlib
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger('project_core.performance')
+
+_current_request = threading.local()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.number_of_queries = 0
+        self.sql_seconds = 0
+        self.template_seconds = 0
+        self._template_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.number_of_queries += 1
+
+    def render_template(self, render, *args, **kwargs):
+        if self._template_depth > 0:
+            # Templates rendered from other templates (e.g. render_to_string in a template tag) are already timed
+            return render(*args, **kwargs)
+
+        self._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(*args, **kwargs)
+        finally:
+            self.template_seconds += time.perf_counter() - start
+            self._template_depth -= 1
+
+
+def _percentile(sorted_values, percentile):
+    # Nearest-rank method
+    index = max(math.ceil(percentile / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+class PerformanceStatistics:
+    """Keeps the metrics of the last PERFORMANCE_MONITORING_SAMPLES requests of each view. It is kept in the
+    memory of the process: each worker process has its own statistics and they are lost on restart"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def add(self, url_name, total_seconds, metrics):
+        with self._lock:
+            if url_name not in self._samples:
+                self._samples[url_name] = deque(maxlen=settings.PERFORMANCE_MONITORING_SAMPLES)
+
+            self._samples[url_name].append((total_seconds, metrics.number_of_queries, metrics.sql_seconds,
+                                            metrics.template_seconds))
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+
+    def summary(self):
+        """Returns a list of dictionaries (one per view) sorted by the 95th percentile of the total time"""
+        with self._lock:
+            samples = {url_name: list(view_samples) for url_name, view_samples in self._samples.items()}
+
+        result = []
+
+        for url_name, view_samples in samples.items():
+            total_times = sorted(sample[0] for sample in view_samples)
+            number_of_samples = len(view_samples)
+
+            view_summary = {}
+            view_summary['url_name'] = url_name
+            view_summary['requests'] = number_of_samples
+            view_summary['total_ms_p50'] = _percentile(total_times, 50) * 1000
+            view_summary['total_ms_p95'] = _percentile(total_times, 95) * 1000
+            view_summary['total_ms_max'] = total_times[-1] * 1000
+            view_summary['queries_average'] = sum(sample[1] for sample in view_samples) / number_of_samples
+            view_summary['queries_max'] = max(sample[1] for sample in view_samples)
+            view_summary['sql_ms_average'] = sum(sample[2] for sample in view_samples) / number_of_samples * 1000
+            view_summary['template_ms_average'] = \
+                sum(sample[3] for sample in view_samples) / number_of_samples * 1000
+
+            result.append(view_summary)
+
+        result.sort(key=lambda view_summary: view_summary['total_ms_p95'], reverse=True)
+
+        return result
+
+
+performance_statistics = PerformanceStatistics()
+
+_original_template_render = Template.render
+
+
+def _instrumented_template_render(self, *args, **kwargs):
+    metrics = getattr(_current_request, 'metrics', None)
+
+    if metrics is None:
+        return _original_template_render(self, *args, **kwargs)
+
+    return metrics.render_template(_original_template_render, self, *args, **kwargs)
+
+
+class PerformanceMonitoringMiddleware:
+    """Records, for each request, the number of queries, the SQL time, the template rendering time and the total
+    time. Enabled with settings.PERFORMANCE_MONITORING.
+
+    The total time is until the view returns the response: the content of streaming responses is not included"""
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_MONITORING:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+        Template.render = _instrumented_template_render
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        _current_request.metrics = metrics
+
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.execute_wrapper))
+
+                response = self.get_response(request)
+        finally:
+            _current_request.metrics = None
+
+        total_seconds = time.perf_counter() - start
+
+        url_name = _url_name(request)
+        performance_statistics.add(url_name, total_seconds, metrics)
+
+        if total_seconds >= settings.PERFORMANCE_MONITORING_SLOW_REQUEST_SECONDS:
+            logger.warning('Slow request: url_name=%s method=%s path=%s status=%d total_ms=%.1f queries=%d '
+                           'sql_ms=%.1f template_ms=%.1f',
+                           url_name, request.method, request.path, response.status_code, total_seconds * 1000,
+                           metrics.number_of_queries, metrics.sql_seconds * 1000, metrics.template_seconds * 1000)
+
+        return response
+
+
+def _url_name(request):
+    resolver_match = getattr(request, 'resolver_match', None)
+
+    if resolver_match is None:
+        return '(not resolved)'
+
+    return resolver_match.url_name or resolver_match.view_name
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.11 on 2026-10-18 21:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_core', '0177_add_on_webite_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True, help_text='Date and time at which the entry was created')),
+                ('modified_on', models.DateTimeField(auto_now=True, help_text='Date and time at which the entry was modified', null=True)),
+                ('subject', models.CharField(help_text='Subject of the email', max_length=255)),
+                ('body', models.TextField(help_text='Body of the email')),
+                ('from_email', models.CharField(help_text='Sender of the email', max_length=254)),
+                ('recipients', models.TextField(help_text='Recipients of the email (separated by commas)')),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Sent', 'Sent'), ('Failed', 'Failed')], db_index=True, default='Pending', help_text='Pending: not sent yet. Failed: it could not be sent after all the attempts', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of failed attempts to send the email')),
+                ('next_attempt_on', models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Date and time from which the email can be sent')),
+                ('sent_on', models.DateTimeField(blank=True, help_text='Date and time at which the email was sent', null=True)),
+                ('last_error', models.TextField(blank=True, help_text='Error of the last failed attempt', null=True)),
+                ('purpose', models.CharField(blank=True, choices=[('ProposalDraftSaved', 'Proposal draft saved'), ('ProposalSubmitted', 'Proposal submitted')], help_text='Used to update the proposal when the email has been sent', max_length=20, null=True)),
+                ('proposal', models.ForeignKey(blank=True, help_text='Proposal that the email is about', null=True, on_delete=django.db.models.deletion.CASCADE, to='project_core.proposal')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
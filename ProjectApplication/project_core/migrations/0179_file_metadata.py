@@ -0,0 +1,43 @@
+# Generated by Django 3.2.11 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_core', '0178_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callpartfile',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='callpartfile',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='callpartfile',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalqafile',
+            name='file_content_type',
+            field=models.CharField(blank=True, help_text='Content type of the file', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalqafile',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='proposalqafile',
+            name='file_uploaded_on',
+            field=models.DateTimeField(blank=True, help_text='Date and time at which the file was uploaded', null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.11 on 2026-10-18 23:01
+
+import django.core.validators
+from django.db import migrations, models
+import project_core.utils.SpiS3Boto3Storage
+import project_core.utils.utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_core', '0179_file_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='proposalqafile',
+            name='file',
+            field=models.FileField(storage=project_core.utils.SpiS3Boto3Storage.SpiS3Boto3Storage(), upload_to='proposals_qa/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf']), project_core.utils.utils.file_size_validator]),
+        ),
+    ]
@@ -1,8 +1,9 @@
 import calendar
 import logging
+import mimetypes
 import os
 import uuid as uuid_lib
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List
 
 import unidecode as unidecode
@@ -18,13 +19,12 @@ from django.urls import reverse
 from django.utils import timezone
 from phonenumber_field.phonenumber import PhoneNumber
 from simple_history.models import HistoricalRecords
-from storages.backends.s3boto3 import S3Boto3Storage
 
 from . import utils
 from .utils.SpiS3Boto3Storage import SpiS3Boto3Storage
 from .utils.orcid import raise_error_if_orcid_invalid
-from .utils.utils import bytes_to_human_readable, external_file_validator, calculate_md5_from_file_field, \
-    management_file_validator, user_is_in_group_name
+from .utils.utils import bytes_to_human_readable, external_file_validator, calculate_md5_and_size_from_file_field, \
+    management_file_validator, user_is_in_group_name, save_file_field_calculating_md5
 
 logger = logging.getLogger('project_core')
 
@@ -52,6 +52,36 @@ class CreateModifyOn(models.Model):
         abstract = True
 
 
+class FileMetadata(models.Model):
+    """Size, content type and upload date of the file of the model (field 'file'). They are stored when a new
+    file is saved: showing them does not need requests to the object storage"""
+
+    file_size = models.BigIntegerField(help_text='Size of the file in bytes', null=True, blank=True)
+    file_content_type = models.CharField(max_length=255, help_text='Content type of the file', null=True, blank=True)
+    file_uploaded_on = models.DateTimeField(help_text='Date and time at which the file was uploaded', null=True,
+                                            blank=True)
+
+    class Meta:
+        abstract = True
+
+    def set_file_metadata(self, size, content_type=None):
+        if content_type is None:
+            content_type = mimetypes.guess_type(self.file.name)[0] or 'application/octet-stream'
+
+        self.file_size = size
+        self.file_content_type = content_type
+        self.file_uploaded_on = timezone.now()
+
+    def save(self, *args, **kwargs):
+        if not self.file:
+            self.file_size = self.file_content_type = self.file_uploaded_on = None
+        elif not self.file._committed:
+            # New file: its size is known without asking the storage
+            self.set_file_metadata(self.file.size)
+
+        super().save(*args, **kwargs)
+
+
 class FinancialKey(CreateModifyOn):
     name = models.CharField(max_length=20, help_text='Code used by finance (e.g. ECON, TRAVEL) or funding instrument',
                             unique=True)
@@ -652,7 +682,8 @@ class PersonPosition(CreateModifyOn):
             return None
 
     def organisations_ordered_by_name(self):
-        return self.organisation_names.all().order_by('name')
+        # Sorted here: uses organisation_names if they were prefetched (e.g. in the exports)
+        return sorted(self.organisation_names.all(), key=lambda x: x.name.casefold())
 
     def organisations_display_names(self):
         organisations = []
@@ -860,15 +891,19 @@ class Proposal(CreateModifyOn):
         return reverse('proposal-update', kwargs={'uuid': self.uuid})
 
     def keywords_enumeration(self):
-        keywords = self.keywords.all().order_by('name')
+        # Sorted here: uses keywords if they were prefetched (e.g. in the exports)
+        keywords = sorted(self.keywords.all(), key=lambda x: x.name.casefold())
 
         if keywords:
             return ', '.join([keyword.name for keyword in keywords])
         else:
             return '-'
 
+    def geographical_areas_ordered_by_name(self):
+        return sorted(self.geographical_areas.all(), key=lambda x: x.name.casefold())
+
     def geographical_areas_enumeration(self):
-        geographical_areas = self.geographical_areas.all().order_by('name')
+        geographical_areas = self.geographical_areas_ordered_by_name()
         if geographical_areas:
             return ', '.join([geographical_area.name for geographical_area in geographical_areas])
         else:
@@ -887,7 +922,10 @@ class Proposal(CreateModifyOn):
         if self.call.overall_budget_question:
             return self.overall_budget
 
-        # TODO: do this in the database
+        if hasattr(self, 'budget_items_total'):
+            # Annotated by the exports: Proposal.objects.annotate(budget_items_total=Sum('proposedbudgetitem__amount'))
+            return self.budget_items_total or 0
+
         budget_items = self.proposedbudgetitem_set.all()
 
         total = 0
@@ -1007,10 +1045,10 @@ class ProposalQAText(CreateModifyOn):
         return 'Q: {}; A: {}'.format(self.call_question, self.answer)
 
 
-class ProposalQAFile(CreateModifyOn):
+class ProposalQAFile(CreateModifyOn, FileMetadata):
     proposal = models.ForeignKey(Proposal, help_text='Proposal that this file is attached to', on_delete=models.PROTECT)
     call_question = models.ForeignKey(CallQuestion, help_text='Question from the call', on_delete=models.PROTECT)
-    file = models.FileField(storage=S3Boto3Storage(),
+    file = models.FileField(storage=SpiS3Boto3Storage(),
                             upload_to='proposals_qa/',
                             validators=[*external_file_validator()])
     # Using md5 so it matches (usually) ETags
@@ -1020,15 +1058,23 @@ class ProposalQAFile(CreateModifyOn):
         return 'Q: {}; A: file'.format(self.call_question)
 
     def save(self, *args, **kwargs):
-        if self.file:
-            self.md5 = calculate_md5_from_file_field(self.file)
-        else:
+        if not self.file:
             # Actually if there is no file this should not be called
             self.md5 = None
+        elif not self.file._committed:
+            # The md5 and size are calculated while the file is uploaded
+            self.md5, size = save_file_field_calculating_md5(self.file)
+            self.set_file_metadata(size)
+        elif not self.md5:
+            # Files uploaded directly to the bucket are already committed: their md5 is usually set from the ETag
+            self.md5, _ = calculate_md5_and_size_from_file_field(self.file)
 
         super().save(*args, **kwargs)
 
     def human_file_size(self):
+        if self.file_size is not None:
+            return bytes_to_human_readable(self.file_size)
+
         try:
             return bytes_to_human_readable(self.file.size)
         except EndpointConnectionError:
@@ -1052,6 +1098,75 @@ class ProposalQAFile(CreateModifyOn):
         return filename
 
 
+class OutgoingEmail(CreateModifyOn):
+    """Email queued to be sent by the sendqueuedemails command (see project_core/email_queue.py): the requests
+    do not wait for the SMTP server"""
+    PENDING = 'Pending'
+    SENT = 'Sent'
+    FAILED = 'Failed'
+
+    STATUS = (
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    PROPOSAL_DRAFT_SAVED = 'ProposalDraftSaved'
+    PROPOSAL_SUBMITTED = 'ProposalSubmitted'
+
+    PURPOSES = (
+        (PROPOSAL_DRAFT_SAVED, 'Proposal draft saved'),
+        (PROPOSAL_SUBMITTED, 'Proposal submitted'),
+    )
+
+    subject = models.CharField(max_length=255, help_text='Subject of the email')
+    body = models.TextField(help_text='Body of the email')
+    from_email = models.CharField(max_length=254, help_text='Sender of the email')
+    recipients = models.TextField(help_text='Recipients of the email (separated by commas)')
+    status = models.CharField(max_length=10, choices=STATUS, default=PENDING, db_index=True,
+                              help_text='Pending: not sent yet. Failed: it could not be sent after all the attempts')
+    attempts = models.PositiveIntegerField(default=0, help_text='Number of failed attempts to send the email')
+    next_attempt_on = models.DateTimeField(default=timezone.now, db_index=True,
+                                           help_text='Date and time from which the email can be sent')
+    sent_on = models.DateTimeField(null=True, blank=True, help_text='Date and time at which the email was sent')
+    last_error = models.TextField(null=True, blank=True, help_text='Error of the last failed attempt')
+    proposal = models.ForeignKey(Proposal, null=True, blank=True, on_delete=models.CASCADE,
+                                 help_text='Proposal that the email is about')
+    purpose = models.CharField(max_length=20, choices=PURPOSES, null=True, blank=True,
+                               help_text='Used to update the proposal when the email has been sent')
+
+    def __str__(self):
+        return f'{self.subject} - {self.recipients}'
+
+    def recipient_list(self):
+        return self.recipients.split(',')
+
+    def mark_sent(self):
+        self.status = OutgoingEmail.SENT
+        self.sent_on = timezone.now()
+        self.last_error = None
+        self.save()
+
+        # update() instead of saving the proposal: the applicant might be modifying it
+        if self.purpose == OutgoingEmail.PROPOSAL_DRAFT_SAVED:
+            Proposal.objects.filter(id=self.proposal_id).update(draft_saved_mail_sent=True)
+        elif self.purpose == OutgoingEmail.PROPOSAL_SUBMITTED:
+            Proposal.objects.filter(id=self.proposal_id).update(submitted_mail_sent=True)
+
+    def mark_failed(self, error):
+        self.attempts += 1
+        self.last_error = error
+
+        if self.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+            self.status = OutgoingEmail.FAILED
+        else:
+            # Exponential backoff: EMAIL_QUEUE_RETRY_SECONDS, twice that, etc.
+            delay = settings.EMAIL_QUEUE_RETRY_SECONDS * 2 ** (self.attempts - 1)
+            self.next_attempt_on = timezone.now() + timedelta(seconds=delay)
+
+        self.save()
+
+
 class BudgetItem(models.Model):
     """Itemised line in a budget, comprising of a category, full details and the amount"""
 
@@ -1214,15 +1329,19 @@ class Project(CreateModifyOn):
         return f'{self.key} {self.principal_investigator.person.surname}'
 
     def keywords_enumeration(self):
-        keywords = self.keywords.all().order_by('name')
+        # Sorted here: uses keywords if they were prefetched (e.g. in the exports)
+        keywords = sorted(self.keywords.all(), key=lambda x: x.name.casefold())
 
         if keywords:
             return ', '.join([keyword.name for keyword in keywords])
         else:
             return '-'
 
+    def geographical_areas_ordered_by_name(self):
+        return sorted(self.geographical_areas.all(), key=lambda x: x.name.casefold())
+
     def geographical_areas_enumeration(self):
-        geographical_areas = self.geographical_areas.all().order_by('name')
+        geographical_areas = self.geographical_areas_ordered_by_name()
         if geographical_areas:
             return ', '.join([geographical_area.name for geographical_area in geographical_areas])
         else:
@@ -1381,7 +1500,7 @@ def call_part_file_rename(instance: 'CallPartFile', filename):
     return f'project_core/CallPartFile/CallPartFile-{instance.pk}{extension}'
 
 
-class CallPartFile(CreateModifyOn):
+class CallPartFile(CreateModifyOn, FileMetadata):
     call_part = models.ForeignKey(CallPart,
                                   help_text='Call part that this file belongs to',
                                   on_delete=models.PROTECT)
@@ -0,0 +1,139 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from project_core.models import CallQuestion, ProposalQAText, ProposalQAFile, Proposal
+from variable_templates.utils import apply_templates_to_string
+
+# The parts and answers of submitted proposals (read-only) are cached using keys that contain the current version.
+# Changes in the structure of the calls (questions, parts, variable templates) or in shared tables (e.g. keywords)
+# change the version: all the cached proposals become unreachable. Changes in the answers or the people of a
+# proposal delete only the proposal's entry.
+# The entry also contains the key of the fragments of common/_proposal-detail.tmpl rendered with the proposal's
+# information (see common/_proposal-detail-cached.tmpl): a new entry uses new fragments.
+VERSION_KEY = 'proposal-detail-version'
+
+
+def _new_version():
+    version = uuid.uuid4().hex
+    cache.set(VERSION_KEY, version, timeout=None)
+
+    return version
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        version = _new_version()
+
+    return version
+
+
+def _key(proposal):
+    # uuid instead of id: ids are reused (e.g. in the tests databases) and the cache outlives the database
+    return f'proposal-detail-{_current_version()}-{proposal.uuid}'
+
+
+def invalidate_all():
+    _new_version()
+
+
+def invalidate_all_on_commit():
+    transaction.on_commit(invalidate_all)
+
+
+def invalidate_proposal(proposal):
+    cache.delete(_key(proposal))
+
+
+def invalidate_proposal_on_commit(proposal):
+    # If it was deleted before the commit another request could cache it again without the changes
+    transaction.on_commit(lambda: invalidate_proposal(proposal))
+
+
+def invalidate_proposals_on_commit(proposals, resolve_now=False):
+    """proposals is a QuerySet: it is evaluated after the commit. With resolve_now it is evaluated now: used in
+    post_delete, the rows used by the QuerySet do not exist after the commit"""
+    if resolve_now:
+        proposals = list(proposals)
+
+    def invalidate_proposals():
+        for proposal in proposals:
+            invalidate_proposal(proposal)
+
+    transaction.on_commit(invalidate_proposals)
+
+
+def invalidate_proposals_of_person_positions_on_commit(person_positions, resolve_now=False):
+    """person_positions is a QuerySet (or list) of PersonPosition: invalidates the proposals that display them"""
+    invalidate_proposals_on_commit(Proposal.objects.filter(Q(applicant__in=person_positions) |
+                                                           Q(proposalpartner__person__in=person_positions) |
+                                                           Q(proposalscientificcluster__sub_pi__in=person_positions) |
+                                                           Q(overarching_project__leader__in=person_positions)).
+                                   distinct(), resolve_now)
+
+
+def _parts_with_answers(proposal, parts):
+    """Returns a list of dictionaries (one per part) with the keys used by common/_proposal-detail.tmpl. The
+    questions and the answers of all the parts are read with three queries"""
+    questions_by_part = {}
+    for question in CallQuestion.objects.filter(call_part__in=parts).order_by('order'):
+        questions_by_part.setdefault(question.call_part_id, []).append(question)
+
+    text_answers = dict(ProposalQAText.objects.
+                        filter(proposal=proposal).
+                        values_list('call_question_id', 'answer'))
+
+    file_answers = {}
+    for proposal_qa_file in ProposalQAFile.objects.filter(proposal=proposal):
+        file_answers[proposal_qa_file.call_question_id] = proposal_qa_file.file
+
+    result = []
+
+    for part in parts:
+        questions = questions_by_part.get(part.id, [])
+
+        part_with_answers = {}
+        part_with_answers['heading_number'] = part.heading_number
+        part_with_answers['title_rendered'] = apply_templates_to_string(part.title, proposal.call)
+        part_with_answers['introductory_text'] = part.introductory_text
+        part_with_answers['div_id'] = part.div_id()
+        part_with_answers['questions_answers_text'] = [
+            {'question': question, 'answer': text_answers.get(question.id)}
+            for question in questions if question.answer_type == CallQuestion.TEXT]
+        part_with_answers['questions_answers_file'] = [
+            {'question': question, 'answer': file_answers.get(question.id)}
+            for question in questions if question.answer_type == CallQuestion.FILE]
+
+        result.append(part_with_answers)
+
+    return result
+
+
+def get_submitted_proposal_detail(proposal):
+    """
+    Returns a dictionary with the keys 'part_numbers', 'parts_with_answers', 'proposal_detail_fragments_key' and
+    'proposal_detail_cache_timeout' for the proposal.
+    It is only for submitted proposals: the answers cannot be changed by the applicant.
+    """
+    assert proposal.status_is_submitted()
+
+    # The key is generated before reading the data: if it changes meanwhile it is stored with the old version
+    key = _key(proposal)
+
+    result = cache.get(key)
+
+    if result is None:
+        call = proposal.call
+
+        result = {'part_numbers': call.get_part_numbers_for_call(),
+                  'parts_with_answers': _parts_with_answers(proposal, call.parts()),
+                  'proposal_detail_fragments_key': uuid.uuid4().hex,
+                  'proposal_detail_cache_timeout': settings.PROPOSAL_DETAIL_CACHE_TIMEOUT}
+        cache.set(key, result, settings.PROPOSAL_DETAIL_CACHE_TIMEOUT)
+
+    return result
@@ -1,4 +1,4 @@
-from django.db.models import Q
+from django.db.models import Prefetch
 
 from rest_framework import serializers
 
@@ -45,25 +45,12 @@ class LocationSerializer(serializers.ModelSerializer):
         fields = ('latitude', 'longitude', )
 
 
-class FilterMediumSerializer(serializers.ListSerializer):
-    def to_representation(self, data):
-        data = data.filter(~Q(license_id=None))
-        return super().to_representation(data)
-
-
 class MediumSerializer(serializers.ModelSerializer):
     photographer = serializers.CharField(source='photographer.full_name')
 
     class Meta:
         model = Medium
         fields = ('photographer', 'file', 'key_image', 'primary_image')
-        list_serializer_class = FilterMediumSerializer
-
-
-class FilterLaySummarySerializer(serializers.ListSerializer):
-    def to_representation(self, data):
-        data = data.filter(lay_summary_type__name="Web")
-        return super(FilterLaySummarySerializer, self).to_representation(data)
 
 
 class LaySummarySerializer(serializers.ModelSerializer):
@@ -71,7 +58,17 @@ class LaySummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = LaySummary
         fields = ('text', 'author', )
-        list_serializer_class = FilterLaySummarySerializer
+
+
+# Only the media with a license and the lay summaries for the website are public: the querysets of the serializers
+# need to be prepared with setup_eager_loading(), which filters them in the prefetch
+def _public_media_prefetch():
+    return Prefetch('medium_set', queryset=Medium.objects.exclude(license=None).select_related('photographer'))
+
+
+def _public_lay_summaries_prefetch():
+    return Prefetch('laysummary_set', queryset=LaySummary.objects.filter(lay_summary_type__name='Web').
+                    select_related('author'))
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -86,6 +83,13 @@ class ProjectSerializer(serializers.ModelSerializer):
                   'medium_set', 'funding_instrument'
                   )
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('principal_investigator__person', 'funding_instrument'). \
+            prefetch_related('principal_investigator__organisation_names',
+                             'project_location',
+                             _public_media_prefetch())
+
 
 class ProjectDetailSerializer(serializers.ModelSerializer):
     keywords = KeywordSerializer(many=True, read_only=True)
@@ -102,3 +106,13 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
                   'start_date', 'end_date', 'principal_investigator', 'project_location',
                   'medium_set', 'laysummary_set', 'allocated_budget', 'funding_instrument'
                   )
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('principal_investigator__person', 'funding_instrument'). \
+            prefetch_related('keywords',
+                             'geographical_areas',
+                             'principal_investigator__organisation_names',
+                             'project_location',
+                             _public_media_prefetch(),
+                             _public_lay_summaries_prefetch())
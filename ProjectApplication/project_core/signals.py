@@ -0,0 +1,139 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+import project_core.api_cache
+import project_core.proposal_detail_cache
+from grant_management.models import Medium, LaySummary, LaySummaryType, Location
+from project_core.models import Proposal, ProposalQAText, ProposalQAFile, CallQuestion, CallPart, Call, \
+    BudgetCategoryCall, Project, PersonPosition, PhysicalPerson, OrganisationName, FundingInstrument, Keyword, \
+    GeographicalArea, ProposedBudgetItem, ProposalFundingItem, ProposalPartner, ProposalScientificCluster, Contact, \
+    PostalAddress, RoleDescription, ExternalProject, Gender, CareerStage, PersonTitle, Role, FundingStatus, \
+    BudgetCategory
+from variable_templates.models import TemplateVariableName, FundingInstrumentVariableTemplate, CallVariableTemplate
+
+
+# Models that belong to a proposal and are displayed in its detail
+@receiver([post_save, post_delete], sender=ProposalQAText)
+@receiver([post_save, post_delete], sender=ProposalQAFile)
+@receiver([post_save, post_delete], sender=ProposedBudgetItem)
+@receiver([post_save, post_delete], sender=ProposalFundingItem)
+@receiver([post_save, post_delete], sender=ProposalPartner)
+@receiver([post_save, post_delete], sender=ProposalScientificCluster)
+def invalidate_proposal_detail_cache_answer(sender, instance, **kwargs):
+    project_core.proposal_detail_cache.invalidate_proposal_on_commit(instance.proposal)
+
+
+@receiver([post_save, post_delete], sender=Proposal)
+def invalidate_proposal_detail_cache_proposal(sender, instance, **kwargs):
+    project_core.proposal_detail_cache.invalidate_proposal_on_commit(instance)
+
+
+@receiver(m2m_changed, sender=Proposal.keywords.through)
+@receiver(m2m_changed, sender=Proposal.geographical_areas.through)
+@receiver(m2m_changed, sender=ProposalScientificCluster.keywords.through)
+def invalidate_proposal_detail_cache_keywords(sender, instance, **kwargs):
+    if isinstance(instance, Proposal):
+        project_core.proposal_detail_cache.invalidate_proposal_on_commit(instance)
+    elif isinstance(instance, ProposalScientificCluster):
+        project_core.proposal_detail_cache.invalidate_proposal_on_commit(instance.proposal)
+    else:
+        # Changed from the keyword or geographical area side
+        project_core.proposal_detail_cache.invalidate_all_on_commit()
+
+
+# Models displayed in the detail of the proposals that refer to them. New objects are not displayed yet: the
+# proposal (or the object referring to them) is saved when it refers to them
+@receiver([post_save, post_delete], sender=PersonPosition)
+@receiver(m2m_changed, sender=PersonPosition.organisation_names.through)
+def invalidate_proposal_detail_cache_person_position(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+
+    if isinstance(instance, PersonPosition):
+        project_core.proposal_detail_cache.invalidate_proposals_of_person_positions_on_commit(
+            [instance], kwargs['signal'] == post_delete)
+    else:
+        # Changed from the organisation name side
+        project_core.proposal_detail_cache.invalidate_all_on_commit()
+
+
+@receiver([post_save, post_delete], sender=PhysicalPerson)
+def invalidate_proposal_detail_cache_physical_person(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+
+    project_core.proposal_detail_cache.invalidate_proposals_of_person_positions_on_commit(
+        PersonPosition.objects.filter(person=instance), kwargs['signal'] == post_delete)
+
+
+@receiver([post_save, post_delete], sender=Contact)
+def invalidate_proposal_detail_cache_contact(sender, instance, **kwargs):
+    # New contacts are displayed: they refer to the person position
+    project_core.proposal_detail_cache.invalidate_proposals_of_person_positions_on_commit(
+        PersonPosition.objects.filter(id=instance.person_position_id), kwargs['signal'] == post_delete)
+
+
+@receiver([post_save, post_delete], sender=PostalAddress)
+@receiver([post_save, post_delete], sender=RoleDescription)
+@receiver([post_save, post_delete], sender=ExternalProject)
+def invalidate_proposal_detail_cache_proposal_information(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+
+    if sender == PostalAddress:
+        proposals = Proposal.objects.filter(postal_address=instance)
+    elif sender == RoleDescription:
+        proposals = Proposal.objects.filter(applicant_role_description=instance)
+    else:
+        proposals = Proposal.objects.filter(overarching_project=instance)
+
+    # After the commit a deleted object is not referred to by the proposals anymore
+    project_core.proposal_detail_cache.invalidate_proposals_on_commit(proposals, kwargs['signal'] == post_delete)
+
+
+# Shared tables displayed in the detail of the proposals
+@receiver([post_save, post_delete], sender=Keyword)
+@receiver([post_save, post_delete], sender=GeographicalArea)
+@receiver([post_save, post_delete], sender=OrganisationName)
+@receiver([post_save, post_delete], sender=Gender)
+@receiver([post_save, post_delete], sender=CareerStage)
+@receiver([post_save, post_delete], sender=PersonTitle)
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=FundingStatus)
+@receiver([post_save, post_delete], sender=BudgetCategory)
+def invalidate_proposal_detail_cache_shared_tables(sender, **kwargs):
+    if kwargs.get('created'):
+        return
+
+    project_core.proposal_detail_cache.invalidate_all_on_commit()
+
+
+# Models used for the heading numbers, questions and titles of the parts of all the proposals of a call
+@receiver([post_save, post_delete], sender=CallQuestion)
+@receiver([post_save, post_delete], sender=CallPart)
+@receiver([post_save, post_delete], sender=Call)
+@receiver([post_save, post_delete], sender=BudgetCategoryCall)
+@receiver([post_save, post_delete], sender=TemplateVariableName)
+@receiver([post_save, post_delete], sender=FundingInstrumentVariableTemplate)
+@receiver([post_save, post_delete], sender=CallVariableTemplate)
+def invalidate_proposal_detail_cache(sender, **kwargs):
+    project_core.proposal_detail_cache.invalidate_all_on_commit()
+
+
+# Models used in the responses of the public projects API
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Medium)
+@receiver([post_save, post_delete], sender=LaySummary)
+@receiver([post_save, post_delete], sender=LaySummaryType)
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=PersonPosition)
+@receiver([post_save, post_delete], sender=PhysicalPerson)
+@receiver([post_save, post_delete], sender=OrganisationName)
+@receiver([post_save, post_delete], sender=FundingInstrument)
+@receiver([post_save, post_delete], sender=Keyword)
+@receiver([post_save, post_delete], sender=GeographicalArea)
+@receiver(m2m_changed, sender=Project.keywords.through)
+@receiver(m2m_changed, sender=Project.geographical_areas.through)
+@receiver(m2m_changed, sender=PersonPosition.organisation_names.through)
+def invalidate_api_cache(sender, **kwargs):
+    project_core.api_cache.invalidate_now_and_on_commit()
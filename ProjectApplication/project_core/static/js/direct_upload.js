@@ -0,0 +1,84 @@
+// Uploads the files of the inputs with data-direct-upload-url directly to the bucket (presigned POST).
+// If it succeeds: the token of the uploaded file is set in the hidden input and the file input is cleared
+// (the file is not sent again with the form). If it fails: the file stays in the input and it is uploaded
+// with the form as usual.
+
+function setupDirectUpload(fileInput) {
+    let form = $(fileInput).closest('form');
+    let tokenInput = $('#' + $(fileInput).data('direct-upload-token-input'));
+    let status = $('<small class="form-text text-muted"></small>').insertAfter(fileInput);
+
+    if (tokenInput.val()) {
+        status.text('File uploaded');
+    }
+
+    function setSubmitEnabled(enabled) {
+        form.find('[type="submit"]').prop('disabled', !enabled);
+    }
+
+    function failed() {
+        tokenInput.val('');
+        status.text('');
+        setSubmitEnabled(true);
+    }
+
+    function upload(file, presignedPost) {
+        let formData = new FormData();
+
+        $.each(presignedPost.fields, function (name, value) {
+            formData.append(name, value);
+        });
+        // The file needs to be the last field
+        formData.append('file', file);
+
+        $.ajax({
+            url: presignedPost.url,
+            type: 'POST',
+            data: formData,
+            processData: false,
+            contentType: false,
+            success: function () {
+                tokenInput.val(presignedPost.token);
+                $(fileInput).val('');
+                status.text('File uploaded: ' + file.name);
+                setSubmitEnabled(true);
+            },
+            error: failed
+        });
+    }
+
+    $(fileInput).on('change', function () {
+        tokenInput.val('');
+
+        if (fileInput.files.length !== 1) {
+            status.text('');
+            return;
+        }
+
+        let file = fileInput.files[0];
+
+        status.text('Uploading ' + file.name + '...');
+        setSubmitEnabled(false);
+
+        $.ajax({
+            url: $(fileInput).data('direct-upload-url'),
+            type: 'POST',
+            dataType: 'JSON',
+            data: {
+                call_question: $(fileInput).data('call-question'),
+                file_name: file.name,
+                csrfmiddlewaretoken: form.find('[name="csrfmiddlewaretoken"]').val()
+            },
+            success: function (presignedPost) {
+                upload(file, presignedPost);
+            },
+            error: failed
+        });
+    });
+}
+
+$(document).ready(function () {
+    $('input[type="file"][data-direct-upload-url]').each(function () {
+        setupDirectUpload(this);
+    });
+});
@@ -7,6 +7,11 @@ register = template.Library()
 
 @register.filter(name='filesizeformat_safe')
 def filesizeformat_safe(filefield):
+    # Models with FileMetadata have the size of the file: it avoids a request to the object storage
+    file_size = getattr(filefield.instance, 'file_size', None)
+    if filefield.field.name == 'file' and file_size is not None:
+        return filesizeformat(file_size)
+
     try:
         size = filefield.size
     except botocore.exceptions.ClientError:
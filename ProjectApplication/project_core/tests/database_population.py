@@ -1,4 +1,4 @@
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from io import StringIO
 
 from django.contrib.auth.models import User, Group
@@ -10,12 +10,14 @@ from django.utils import timezone
 from django.utils.timezone import utc
 
 from ProjectApplication import settings
-from evaluation.models import Reviewer, Criterion
-from grant_management.models import LaySummaryType, Medium
+from evaluation.models import Reviewer, Criterion, CallEvaluation, CriterionCallEvaluation, ProposalEvaluation
+from grant_management.models import LaySummaryType, Medium, MilestoneCategory, Invoice, FinancialReport, \
+    ScientificReport, LaySummary, BlogPost, Milestone
 from project_core.models import BudgetCategory, Call, TemplateQuestion, GeographicalArea, Keyword, KeywordUid, Source, \
     PersonTitle, Gender, Organisation, Country, OrganisationUid, ProposalStatus, CareerStage, OrganisationName, \
     Proposal, PersonPosition, PhysicalPerson, FundingInstrument, Role, Project, FinancialKey, CallPart, CallPartFile, \
-    CallQuestion, CallCareerStage
+    CallQuestion, CallCareerStage, Contact, ProposalQAText, ProposedBudgetItem, ProposalPartner
+from variable_templates.models import TemplateVariableName, FundingInstrumentVariableTemplate
 
 
 def create_call_long_name(long_name, short_name, funding_instrument=None):
@@ -370,3 +372,128 @@ def create_medium(project):
                                              )
 
     return medium
+
+
+def create_large_dataset(number_of_calls=4, proposals_per_call=25, first_call_number=0):
+    """Creates calls with proposals (answers, budget, partners, evaluations) and projects for half of them, with
+    invoices, reports and milestones. It is used by the performance tests: the number of queries of the views
+    should not depend on the amount of data. It can be called again with another first_call_number to add more
+    calls"""
+    user = create_management_user()
+    funding_instrument = create_funding_instrument()
+    proposal_status_submitted = create_proposal_status()[0]
+    career_stage = create_career_stage()
+    academic_title = create_person_titles()[0]
+    gender = create_genders()[0]
+    geographical_areas = create_geographical_areas()
+    keywords = create_keywords()
+    organisation_names = create_organisation_names()
+    # Initial country of the proposal form
+    Country.objects.get_or_create(name='Switzerland')
+
+    # Variable used in the labels and help texts of the proposal forms
+    activity, created = TemplateVariableName.objects.get_or_create(name='activity', default='proposal')
+    FundingInstrumentVariableTemplate.objects.get_or_create(funding_instrument=funding_instrument, name=activity,
+                                                            value='expedition')
+    budget_categories = create_budget_categories()
+    template_questions = [TemplateQuestion.objects.get_or_create(question_text=f'Question {question_number}',
+                                                                 question_description='Answer in detail',
+                                                                 answer_type=TemplateQuestion.TEXT,
+                                                                 answer_max_length=500)[0]
+                          for question_number in range(3)]
+    criteria = create_evaluation_criteria()
+    role, _ = Role.objects.get_or_create(name='Collaborator', description='Collaborates')
+    milestone_category, _ = MilestoneCategory.objects.get_or_create(name='Expedition', created_by=user)
+
+    today = timezone.now().date()
+
+    def create_person_position_number(number):
+        physical_person = PhysicalPerson.objects.create(first_name=f'Name{number}', surname=f'Surname{number}',
+                                                        gender=gender)
+        person_position = PersonPosition.objects.create(person=physical_person, academic_title=academic_title,
+                                                        career_stage=career_stage, privacy_policy=True)
+        person_position.organisation_names.add(organisation_names[number % len(organisation_names)])
+        Contact.objects.create(person_position=person_position, entry=f'person{number}@example.com',
+                               method=Contact.EMAIL)
+
+        return person_position
+
+    for call_number in range(first_call_number, first_call_number + number_of_calls):
+        call = Call.objects.create(long_name=f'Performance call {call_number}',
+                                   short_name=f'PERF {call_number}',
+                                   description='Call to test the performance',
+                                   call_open_date=timezone.now() + timedelta(days=1),
+                                   submission_deadline=timezone.now() + timedelta(days=30),
+                                   finance_year=2020 + call_number % 3,
+                                   budget_maximum=100_000, other_funding_question=False,
+                                   proposal_partner_question=True,
+                                   funding_instrument=funding_instrument)
+        CallCareerStage.objects.create(call=call, career_stage=career_stage)
+
+        call_part = CallPart.objects.create(call=call, title='Science', order=10)
+        call_questions = [CallQuestion.objects.create(call_part=call_part, template_question=template_question,
+                                                      question_text=template_question.question_text,
+                                                      question_description=template_question.question_description,
+                                                      answer_type=CallQuestion.TEXT,
+                                                      answer_max_length=500,
+                                                      order=order)
+                          for order, template_question in enumerate(template_questions)]
+
+        call_evaluation = CallEvaluation.objects.create(call=call, panel_date=today + timedelta(days=2))
+        for order, criterion in enumerate(criteria):
+            CriterionCallEvaluation.objects.create(call_evaluation=call_evaluation, criterion=criterion,
+                                                   enabled=True, order=order)
+
+        for proposal_number in range(proposals_per_call):
+            number = call_number * 1000 + proposal_number
+            applicant = create_person_position_number(number)
+
+            proposal = Proposal.objects.create(title=f'Performance proposal {number}',
+                                               start_date=date(2020, 1, 1),
+                                               end_date=date(2021, 1, 1),
+                                               duration_months=12,
+                                               applicant=applicant,
+                                               proposal_status=proposal_status_submitted,
+                                               eligibility=Proposal.ELIGIBLE,
+                                               call=call)
+            proposal.keywords.add(*keywords[:2])
+            proposal.geographical_areas.add(*geographical_areas[:2])
+
+            ProposalQAText.objects.bulk_create([ProposalQAText(proposal=proposal, call_question=call_question,
+                                                               answer=f'Answer to {call_question.question_text}')
+                                                for call_question in call_questions])
+            ProposedBudgetItem.objects.bulk_create([ProposedBudgetItem(proposal=proposal, category=category,
+                                                                       details='Details', amount=1_000)
+                                                    for category in budget_categories])
+            ProposalPartner.objects.create(proposal=proposal, person=create_person_position_number(1_000_000 + number),
+                                           role=role, role_description='Helps', competences='Many')
+
+            funded = proposal_number % 2 == 0
+            ProposalEvaluation.objects.create(proposal=proposal, allocated_budget=3_000,
+                                              panel_remarks='Good', feedback_to_applicant='Good',
+                                              panel_recommendation=ProposalEvaluation.PANEL_RECOMMENDATION_FUND,
+                                              board_decision=ProposalEvaluation.BOARD_DECISION_FUND if funded
+                                              else ProposalEvaluation.BOARD_DECISION_DO_NOT_FUND,
+                                              decision_date=today)
+
+            if not funded:
+                continue
+
+            project = Project.objects.create(key=f'PERF-{number:04}', title=proposal.title,
+                                             location='Somewhere in the world',
+                                             start_date=today + timedelta(days=1), end_date=today + timedelta(days=365),
+                                             call=call, funding_instrument=funding_instrument,
+                                             finance_year=call.finance_year, proposal=proposal,
+                                             allocated_budget=3_000, status=Project.ONGOING,
+                                             principal_investigator=applicant)
+            project.geographical_areas.add(*geographical_areas[:2])
+            project.keywords.add(*keywords[:2])
+
+            Invoice.objects.create(project=project, due_date=today + timedelta(days=10), amount=1_000,
+                                   sent_for_payment_date=today, paid_date=today)
+            FinancialReport.objects.create(project=project, due_date=today + timedelta(days=20))
+            ScientificReport.objects.create(project=project, due_date=today + timedelta(days=20))
+            LaySummary.objects.create(project=project, due_date=today + timedelta(days=30))
+            BlogPost.objects.create(project=project, due_date=today + timedelta(days=30))
+            Milestone.objects.create(project=project, due_date=today + timedelta(days=40),
+                                     category=milestone_category, text='Expedition starts')
@@ -0,0 +1,66 @@
+from django.test import TestCase
+
+from project_core.forms.questions import Questions, ProposalAnswers
+from project_core.models import ProposalQAText, CallQuestion
+from project_core.tests import database_population
+from project_core.tests.utils_for_tests import dict_to_multivalue_dict
+
+
+class QuestionsFormTest(TestCase):
+    def setUp(self):
+        self._proposal = database_population.create_proposal()
+        self._call_part = database_population.create_call_part(self._proposal.call)
+
+        self._call_question_distance = database_population.create_call_question(self._call_part)
+        self._call_question_science = CallQuestion.objects.create(
+            call_part=self._call_part,
+            template_question=database_population.create_template_questions()[1],
+            question_text='How is the science going to be done?',
+            answer_type=CallQuestion.TEXT,
+            order=20)
+
+        self._answer_distance = ProposalQAText.objects.create(proposal=self._proposal,
+                                                              call_question=self._call_question_distance,
+                                                              answer='Very far')
+
+    def test_proposal_answers(self):
+        with self.assertNumQueries(2):
+            answers = ProposalAnswers(self._proposal)
+
+        self.assertEqual(answers.text(self._call_question_distance), self._answer_distance)
+        self.assertIsNone(answers.text(self._call_question_science))
+        self.assertIsNone(answers.file(self._call_question_distance))
+
+    def test_initial_answers(self):
+        questions = Questions(proposal=self._proposal, call_part=self._call_part, prefix='questions')
+
+        self.assertEqual(questions.questions_answers_text(),
+                         [{'question': self._call_question_distance, 'answer': 'Very far'},
+                          {'question': self._call_question_science, 'answer': None}])
+
+    def test_save_answers_only_changed(self):
+        data = dict_to_multivalue_dict({
+            f'questions-question_{self._call_question_distance.id}': 'Very far',
+            f'questions-question_{self._call_question_science.id}': 'Carefully'
+        })
+
+        questions = Questions(data, proposal=self._proposal, call_part=self._call_part, prefix='questions')
+        self.assertTrue(questions.is_valid())
+
+        # Only the new answer is written
+        with self.assertNumQueries(1):
+            self.assertTrue(questions.save_answers(self._proposal))
+
+        modified_on = self._answer_distance.modified_on
+        self._answer_distance.refresh_from_db()
+        self.assertEqual(self._answer_distance.modified_on, modified_on)
+        self.assertEqual(ProposalQAText.objects.get(call_question=self._call_question_science).answer, 'Carefully')
+
+        data[f'questions-question_{self._call_question_distance.id}'] = 'Not so far'
+        questions = Questions(data, proposal=self._proposal, call_part=self._call_part, prefix='questions')
+        self.assertTrue(questions.is_valid())
+        questions.save_answers(self._proposal)
+
+        self._answer_distance.refresh_from_db()
+        self.assertEqual(self._answer_distance.answer, 'Not so far')
+        self.assertGreater(self._answer_distance.modified_on, modified_on)
@@ -0,0 +1,81 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from project_core.middleware.performance import performance_statistics, _percentile
+from project_core.tests import database_population
+
+
+class PerformanceMonitoringMiddlewareTest(TestCase):
+    def setUp(self):
+        performance_statistics.reset()
+        self._client_management = database_population.create_management_logged_client()
+
+    def tearDown(self):
+        performance_statistics.reset()
+
+    @override_settings(PERFORMANCE_MONITORING=True, PERFORMANCE_MONITORING_SLOW_REQUEST_SECONDS=0)
+    def test_records_request(self):
+        database_population.create_project()
+
+        with self.assertLogs('project_core.performance', level='WARNING') as logs:
+            response = self._client_management.get(reverse('logged-project-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('url_name=logged-project-list method=GET', logs.output[0])
+
+        statistics = performance_statistics.summary()
+        self.assertEqual(len(statistics), 1)
+
+        view_statistics = statistics[0]
+        self.assertEqual(view_statistics['url_name'], 'logged-project-list')
+        self.assertEqual(view_statistics['requests'], 1)
+        self.assertGreater(view_statistics['queries_max'], 0)
+        self.assertGreater(view_statistics['sql_ms_average'], 0)
+        self.assertGreater(view_statistics['template_ms_average'], 0)
+        self.assertGreaterEqual(view_statistics['total_ms_p95'],
+                                view_statistics['sql_ms_average'] + view_statistics['template_ms_average'])
+
+    @override_settings(PERFORMANCE_MONITORING=False)
+    def test_disabled(self):
+        response = self._client_management.get(reverse('logged-project-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(performance_statistics.summary(), [])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(_percentile(values, 50), 50)
+        self.assertEqual(_percentile(values, 95), 95)
+        self.assertEqual(_percentile([7], 95), 7)
+
+
+class PerformanceStatisticsViewTest(TestCase):
+    def setUp(self):
+        performance_statistics.reset()
+
+    def tearDown(self):
+        performance_statistics.reset()
+
+    @override_settings(PERFORMANCE_MONITORING=True)
+    def test_get(self):
+        client = database_population.create_management_logged_client()
+
+        client.get(reverse('logged-news'))
+        response = client.get(reverse('logged-performance'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<td>logged-news</td>', html=True)
+
+        response = client.post(reverse('logged-performance'))
+        self.assertEqual(response.status_code, 302)
+
+        # Only the reset request itself is left
+        self.assertEqual([view['url_name'] for view in performance_statistics.summary()], ['logged-performance'])
+
+    def test_reviewer_cannot_access(self):
+        client = database_population.create_reviewer_logged_client()
+
+        response = client.get(reverse('logged-performance'))
+
+        self.assertEqual(response.status_code, 302)
@@ -3,6 +3,7 @@ import datetime
 from django.test import TestCase
 
 from grant_management.models import Invoice
+from project_core.models import Project
 from project_core.tests import database_population
 
 
@@ -58,3 +59,14 @@ class ProjectModelTest(TestCase):
                                amount=-200)
 
         self.assertEqual(self._project.invoices_paid_amount(), 1_800)
+
+    def test_enumerations_use_prefetched_data(self):
+        keywords = database_population.create_keywords()
+        self._project.keywords.set([keywords[1], keywords[0]])
+        self._project.geographical_areas.set(database_population.create_geographical_areas()[::-1])
+
+        project = Project.objects.prefetch_related('keywords', 'geographical_areas').get(id=self._project.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(project.keywords_enumeration(), f'{keywords[0].name}, {keywords[1].name}')
+            self.assertEqual(project.geographical_areas_enumeration(), 'Antarctic, Arctic, High peaks')
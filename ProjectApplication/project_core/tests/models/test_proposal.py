@@ -1,10 +1,11 @@
 from datetime import datetime
 
+from django.db.models import Prefetch
 from django.test import TestCase
 
 from ProjectApplication import settings
 from evaluation.models import CallEvaluation
-from project_core.models import Proposal, ProposalStatus
+from project_core.models import Proposal, ProposalStatus, OrganisationName, Keyword
 from project_core.tests import database_population
 
 
@@ -57,3 +58,30 @@ class ProposalModelTest(TestCase):
         proposal.save()
 
         self.assertTrue(proposal.can_eligibility_be_created_or_changed())
+
+    def test_enumerations_use_prefetched_data(self):
+        proposal = database_population.create_proposal()
+        keywords = database_population.create_keywords()
+        proposal.keywords.set([keywords[1], keywords[0]])
+        proposal.geographical_areas.set(database_population.create_geographical_areas()[::-1])
+        proposal.applicant.organisation_names.set(database_population.create_organisation_names()[::-1])
+
+        proposal = Proposal.objects.select_related('applicant'). \
+            prefetch_related(Prefetch('applicant__organisation_names',
+                                      queryset=OrganisationName.objects.select_related('organisation')),
+                             'keywords', 'geographical_areas'). \
+            get(id=proposal.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(proposal.keywords_enumeration(), f'{keywords[0].name}, {keywords[1].name}')
+            self.assertEqual(proposal.geographical_areas_enumeration(), 'Antarctic, Arctic, High peaks')
+            self.assertEqual(proposal.applicant.organisations_ordered_by_name_str(), 'EPFL, SPF')
+
+    def test_enumerations_ignore_case(self):
+        proposal = database_population.create_proposal()
+        keywords = database_population.create_keywords()
+        ice_core = Keyword.objects.create(name='ice core', uid=keywords[0].uid)
+        proposal.keywords.set([keywords[2], ice_core, keywords[1]])
+
+        # As MySQL orders them
+        self.assertEqual(proposal.keywords_enumeration(), 'Birds, ice core, Penguins')
@@ -0,0 +1,161 @@
+import argparse
+import sys
+import time
+
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import project_core.api_cache
+import project_core.proposal_detail_cache
+from project_core.models import Call
+from project_core.tests import database_population
+from reporting import cache as reporting_cache
+
+# Proposals of the two calls of the dataset: the views of a call do the same number of queries for both
+SMALL_CALL_PROPOSALS = 2
+LARGE_CALL_PROPOSALS = 6
+
+
+def _timings_requested():
+    # The timings are printed when running with --tag performance or with --verbosity 2 (or more): they do not add
+    # noise to the output of the whole test suite
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument('--tag', action='append', default=[])
+    parser.add_argument('-v', '--verbosity', type=int, default=1)
+    options, _ = parser.parse_known_args(sys.argv[1:])
+
+    return 'performance' in options.tag or options.verbosity >= 2
+
+
+@tag('performance')
+class QueryBudgetTest(TestCase):
+    """Performance regression tests: the number of queries of each view must not depend on the amount of data
+    (e.g. a query per row: N+1). Each view is requested with two datasets of different size and the number of
+    queries needs to be the same. The number of queries and wall time of each request are printed at the end
+    with --tag performance or --verbosity 2 (the time is not checked: it depends on the machine)"""
+    timings = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        database_population.create_large_dataset(number_of_calls=1, proposals_per_call=SMALL_CALL_PROPOSALS)
+        database_population.create_large_dataset(number_of_calls=1, proposals_per_call=LARGE_CALL_PROPOSALS,
+                                                 first_call_number=1)
+
+    def setUp(self):
+        self._client_management = database_population.create_management_logged_client()
+        self._small_call, self._large_call = Call.objects.order_by('id')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+
+        if not _timings_requested():
+            return
+
+        sys.stderr.write('\nPerformance (view: number of queries / wall time)\n')
+        for name, (number_of_queries, seconds) in sorted(cls.timings.items()):
+            sys.stderr.write(f'{name}: {number_of_queries} queries / {seconds:.3f} s\n')
+
+    def _number_of_queries(self, name, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.monotonic()
+            response = self._client_management.get(url, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            seconds = time.monotonic() - start
+
+        self.assertEqual(response.status_code, 200)
+
+        QueryBudgetTest.timings[name] = (len(queries), seconds)
+
+        return len(queries)
+
+    def _assert_same_number_of_queries(self, name, small_url, large_url, small_data=None, large_data=None,
+                                       before_request=None):
+        if before_request:
+            before_request()
+        small_number_of_queries = self._number_of_queries(f'{name} (small)', small_url, small_data)
+
+        if before_request:
+            before_request()
+        large_number_of_queries = self._number_of_queries(f'{name} (large)', large_url, large_data)
+
+        self.assertEqual(small_number_of_queries, large_number_of_queries,
+                         f'{name}: the number of queries depends on the amount of data')
+
+    def _assert_same_number_of_queries_for_calls(self, name, url_name, url_parameter_name):
+        self._assert_same_number_of_queries(name,
+                                            reverse(url_name, kwargs={url_parameter_name: self._small_call.id}),
+                                            reverse(url_name, kwargs={url_parameter_name: self._large_call.id}))
+
+    def _assert_same_number_of_queries_with_more_data(self, requests, before_request=None):
+        # requests: list of (name, url, data). They are requested with the dataset and again after adding more calls
+        # and proposals
+        small_numbers_of_queries = []
+        for name, url, data in requests:
+            if before_request:
+                before_request()
+            small_numbers_of_queries.append(self._number_of_queries(f'{name} (small)', url, data))
+
+        database_population.create_large_dataset(number_of_calls=2, proposals_per_call=LARGE_CALL_PROPOSALS,
+                                                 first_call_number=2)
+
+        for (name, url, data), small_number_of_queries in zip(requests, small_numbers_of_queries):
+            if before_request:
+                before_request()
+            large_number_of_queries = self._number_of_queries(f'{name} (large)', url, data)
+
+            self.assertEqual(small_number_of_queries, large_number_of_queries,
+                             f'{name}: the number of queries depends on the amount of data')
+
+    def test_reporting(self):
+        # The reporting tables are cached: measures them being calculated
+        self._assert_same_number_of_queries_with_more_data(
+            [(f'Reporting ({tab})', reverse('logged-reporting'), {'tab': tab})
+             for tab in ['overview', 'finance', 'diversity']],
+            reporting_cache.invalidate)
+
+    def test_proposal_list(self):
+        self._assert_same_number_of_queries_with_more_data([('ProposalList', reverse('logged-proposal-list'), None)])
+
+    def test_call_evaluation_validation(self):
+        self._assert_same_number_of_queries_for_calls('CallEvaluationValidation', 'logged-call-evaluation-validation',
+                                                      'call_id')
+
+    def test_projects_all_information_excel(self):
+        self._assert_same_number_of_queries_with_more_data(
+            [('ProjectsAllInformationExcel', reverse('logged-reporting-projects_information-excel'), None)])
+
+    def test_proposals_export_excel(self):
+        self._assert_same_number_of_queries_for_calls('ProposalsExportExcel', 'logged-export-proposals-for-call-excel',
+                                                      'call')
+
+    def test_proposals_export_csv_summary(self):
+        self._assert_same_number_of_queries_with_more_data(
+            [('ProposalsExportCsvSummary', reverse('logged-export-proposals-csv-summary-all'), None)])
+
+    def test_proposal_detail(self):
+        small_url = reverse('logged-proposal-detail', kwargs={'pk': self._small_call.proposal_set.first().id})
+        large_url = reverse('logged-proposal-detail', kwargs={'pk': self._large_call.proposal_set.first().id})
+
+        self._assert_same_number_of_queries('ProposalDetail', small_url, large_url,
+                                            before_request=project_core.proposal_detail_cache.invalidate_all)
+
+        # The detail of the large call's proposal is cached now
+        self._client_management.get(small_url)
+        self._assert_same_number_of_queries('ProposalDetail (cached)', small_url, large_url)
+
+    def test_proposal_preview(self):
+        self._assert_same_number_of_queries('ProposalPreview', reverse('logged-proposal-preview'),
+                                            reverse('logged-proposal-preview'),
+                                            {'call': self._small_call.id}, {'call': self._large_call.id})
+
+    def test_project_list_api(self):
+        # The responses are cached: measures them being calculated
+        self._assert_same_number_of_queries_with_more_data(
+            [('ProjectListAPI', reverse('project-list-api'), {'limit': 100})], project_core.api_cache.invalidate)
+
+    def test_news(self):
+        self._assert_same_number_of_queries_with_more_data([('News', reverse('logged-news'), None)])
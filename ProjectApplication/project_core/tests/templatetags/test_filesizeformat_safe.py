@@ -0,0 +1,26 @@
+from django.test import TestCase
+
+from project_core.models import ProposalQAFile
+from project_core.tests import database_population
+from ...templatetags.filesizeformat_safe import filesizeformat_safe
+
+
+class FileSizeFormatSafeTest(TestCase):
+    def setUp(self):
+        self._proposal = database_population.create_proposal()
+        call_part = database_population.create_call_part(self._proposal.call)
+        self._call_question = database_population.create_call_question(call_part)
+
+    def test_stored_file_size(self):
+        proposal_qa_file = ProposalQAFile(proposal=self._proposal, call_question=self._call_question, md5='a' * 32)
+        proposal_qa_file.file = 'proposals_qa/answer.pdf'
+        proposal_qa_file.set_file_metadata(2048)
+        proposal_qa_file.save()
+
+        proposal_qa_file = ProposalQAFile.objects.get(id=proposal_qa_file.id)
+        self.assertEqual(proposal_qa_file.file_content_type, 'application/pdf')
+        self.assertIsNotNone(proposal_qa_file.file_uploaded_on)
+
+        # The size is not read from the storage
+        self.assertEqual(filesizeformat_safe(proposal_qa_file.file), '2.0\xa0KB')
+        self.assertEqual(proposal_qa_file.human_file_size(), '2.00 KB')
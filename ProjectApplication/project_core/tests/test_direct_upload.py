@@ -0,0 +1,214 @@
+import hashlib
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+
+import requests
+from django.core import signing
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from project_core import direct_upload
+from project_core.forms.questions import Questions, ProposalAnswers
+from project_core.models import CallQuestion, ProposalQAFile
+from project_core.tests import database_population
+from project_core.tests.utils_for_tests import dict_to_multivalue_dict
+
+
+@override_settings(PROPOSAL_FILES_DIRECT_UPLOAD=True)
+class DirectUploadTest(TestCase):
+    def setUp(self):
+        self._proposal = database_population.create_proposal()
+        self._call_part = database_population.create_call_part(self._proposal.call)
+
+        self._call = self._proposal.call
+        self._call.submission_deadline = timezone.now() + timedelta(days=10)
+        self._call.save()
+
+        self._call_question_file = CallQuestion.objects.create(
+            call_part=self._call_part,
+            template_question=database_population.create_template_questions()[1],
+            question_text='Curriculum Vitae',
+            answer_type=CallQuestion.FILE,
+            answer_required=True,
+            order=20)
+
+    def test_presigned_post(self):
+        response = self.client.post(reverse('proposal-question-answer-file-upload'),
+                                    data={'call_question': self._call_question_file.id,
+                                          'file_name': 'my cv.pdf'})
+        self.assertEqual(response.status_code, 200)
+
+        presigned_post = response.json()
+        self.assertIn('url', presigned_post)
+        self.assertIn('policy', presigned_post['fields'])
+
+        token = signing.loads(presigned_post['token'], salt=direct_upload.SIGNING_SALT)
+        self.assertEqual(token['call_question'], self._call_question_file.id)
+        self.assertEqual(token['session'], self.client.session.session_key)
+        self.assertTrue(token['name'].startswith('proposals_qa/'))
+        self.assertTrue(token['name'].endswith('-my_cv.pdf'))
+        self.assertTrue(presigned_post['fields']['key'].endswith(token['name']))
+
+    def test_presigned_post_invalid(self):
+        url = reverse('proposal-question-answer-file-upload')
+
+        response = self.client.post(url, data={'call_question': self._call_question_file.id,
+                                               'file_name': 'my cv.exe'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url, data={'call_question': 'a', 'file_name': 'my cv.pdf'})
+        self.assertEqual(response.status_code, 400)
+
+        self._call.submission_deadline = timezone.now() - timedelta(days=1)
+        self._call.save()
+        response = self.client.post(url, data={'call_question': self._call_question_file.id,
+                                               'file_name': 'my cv.pdf'})
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(PROPOSAL_FILES_DIRECT_UPLOAD_RATE_LIMIT=2)
+    def test_presigned_post_rate_limit(self):
+        url = reverse('proposal-question-answer-file-upload')
+        data = {'call_question': self._call_question_file.id, 'file_name': 'my cv.pdf'}
+        client_address = uuid.uuid4().hex
+
+        self.assertEqual(self.client.post(url, data=data, HTTP_X_REAL_IP=client_address).status_code, 200)
+        self.assertEqual(self.client.post(url, data=data, HTTP_X_REAL_IP=client_address).status_code, 200)
+        self.assertEqual(self.client.post(url, data=data, HTTP_X_REAL_IP=client_address).status_code, 429)
+
+        # Other clients can upload
+        self.assertEqual(self.client.post(url, data=data, HTTP_X_REAL_IP=uuid.uuid4().hex).status_code, 200)
+
+    @override_settings(PROPOSAL_FILES_DIRECT_UPLOAD=False)
+    def test_presigned_post_disabled(self):
+        response = self.client.post(reverse('proposal-question-answer-file-upload'),
+                                    data={'call_question': self._call_question_file.id,
+                                          'file_name': 'my cv.pdf'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_questions_form_invalid_token(self):
+        field_name = f'questions-question_{self._call_question_file.id}'
+
+        # The file field is not required if a token has been sent
+        questions = Questions(dict_to_multivalue_dict({f'{field_name}_uploaded': 'invalid'}),
+                              proposal=self._proposal, call_part=self._call_part, prefix='questions')
+        self.assertFalse(questions.is_valid())
+        self.assertEqual(questions.errors[f'question_{self._call_question_file.id}'],
+                         ['The uploaded file has expired, please upload it again'])
+
+        # Token of another question
+        token = signing.dumps({'name': 'proposals_qa/cv.pdf', 'call_question': self._call_question_file.id + 1,
+                               'session': 'session-key'},
+                              salt=direct_upload.SIGNING_SALT)
+        questions = Questions(dict_to_multivalue_dict({f'{field_name}_uploaded': token}),
+                              proposal=self._proposal, call_part=self._call_part, prefix='questions',
+                              session_key='session-key')
+        self.assertFalse(questions.is_valid())
+        self.assertEqual(questions.errors[f'question_{self._call_question_file.id}'],
+                         ['Invalid uploaded file, please upload it again'])
+
+        # Token of another session
+        token = signing.dumps({'name': 'proposals_qa/cv.pdf', 'call_question': self._call_question_file.id,
+                               'session': 'session-key'},
+                              salt=direct_upload.SIGNING_SALT)
+        questions = Questions(dict_to_multivalue_dict({f'{field_name}_uploaded': token}),
+                              proposal=self._proposal, call_part=self._call_part, prefix='questions',
+                              session_key='another-session-key')
+        self.assertFalse(questions.is_valid())
+        self.assertEqual(questions.errors[f'question_{self._call_question_file.id}'],
+                         ['Invalid uploaded file, please upload it again'])
+
+    def _upload(self, contents):
+        # Does what the browser does (static/js/direct_upload.js): returns the token
+        response = self.client.post(reverse('proposal-question-answer-file-upload'),
+                                    data={'call_question': self._call_question_file.id,
+                                          'file_name': 'cv.pdf'})
+        presigned_post = response.json()
+
+        upload_response = requests.post(presigned_post['url'], data=presigned_post['fields'],
+                                        files={'file': ('cv.pdf', contents)})
+        self.assertEqual(upload_response.status_code, 204)
+
+        return presigned_post['token']
+
+    def test_upload_and_save_answer(self):
+        contents = b'%PDF-1.4 Curriculum Vitae'
+        token = self._upload(contents)
+
+        field_name = f'questions-question_{self._call_question_file.id}'
+        questions = Questions(dict_to_multivalue_dict({f'{field_name}_uploaded': token}),
+                              proposal=self._proposal, call_part=self._call_part, prefix='questions',
+                              session_key=self.client.session.session_key)
+        self.assertTrue(questions.is_valid(), questions.errors)
+        questions.save_answers(self._proposal)
+
+        proposal_qa_file = ProposalQAFile.objects.get(proposal=self._proposal, call_question=self._call_question_file)
+        self.assertEqual(proposal_qa_file.file.name, signing.loads(token, salt=direct_upload.SIGNING_SALT)['name'])
+        self.assertEqual(proposal_qa_file.md5, hashlib.md5(contents).hexdigest())
+        self.assertEqual(proposal_qa_file.file_size, len(contents))
+
+    def test_delete_unused_uploads(self):
+        used_token = self._upload(b'%PDF-1.4 used')
+        unused_token = self._upload(b'%PDF-1.4 unused')
+
+        questions = Questions(dict_to_multivalue_dict({
+            f'questions-question_{self._call_question_file.id}_uploaded': used_token}),
+            proposal=self._proposal, call_part=self._call_part, prefix='questions',
+            session_key=self.client.session.session_key)
+        self.assertTrue(questions.is_valid(), questions.errors)
+        questions.save_answers(self._proposal)
+
+        storage = ProposalQAFile._meta.get_field('file').storage
+        used_name = signing.loads(used_token, salt=direct_upload.SIGNING_SALT)['name']
+        unused_name = signing.loads(unused_token, salt=direct_upload.SIGNING_SALT)['name']
+
+        # The tokens have not expired yet
+        self.assertEqual(direct_upload.delete_unused_uploads(), 0)
+
+        with self.settings(PROPOSAL_FILES_DIRECT_UPLOAD_EXPIRE=-1):
+            self.assertGreaterEqual(direct_upload.delete_unused_uploads(), 1)
+
+        self.assertTrue(storage.exists(used_name))
+        self.assertFalse(storage.exists(unused_name))
+
+    def test_md5_from_etag(self):
+        md5 = hashlib.md5(b'contents').hexdigest()
+
+        s3_object = SimpleNamespace(e_tag=f'"{md5}"', server_side_encryption=None, sse_customer_algorithm=None)
+        self.assertEqual(direct_upload.md5_from_etag(s3_object), md5)
+
+        s3_object = SimpleNamespace(e_tag=f'"{md5}"', server_side_encryption='AES256', sse_customer_algorithm=None)
+        self.assertEqual(direct_upload.md5_from_etag(s3_object), md5)
+
+        # Multipart upload
+        s3_object = SimpleNamespace(e_tag=f'"{md5}-3"', server_side_encryption=None, sse_customer_algorithm=None)
+        self.assertIsNone(direct_upload.md5_from_etag(s3_object))
+
+        # The ETags of objects encrypted with SSE-KMS or SSE-C are not their md5
+        s3_object = SimpleNamespace(e_tag=f'"{md5}"', server_side_encryption='aws:kms', sse_customer_algorithm=None)
+        self.assertIsNone(direct_upload.md5_from_etag(s3_object))
+
+        s3_object = SimpleNamespace(e_tag=f'"{md5}"', server_side_encryption=None, sse_customer_algorithm='AES256')
+        self.assertIsNone(direct_upload.md5_from_etag(s3_object))
+
+    def test_md5_calculated_if_not_in_etag(self):
+        contents = b'%PDF-1.4 Encrypted with SSE-KMS'
+        name = signing.loads(self._upload(contents), salt=direct_upload.SIGNING_SALT)['name']
+
+        # E.g. the object is encrypted with SSE-KMS: the md5 is calculated reading the object
+        ProposalAnswers(self._proposal).save_file(self._proposal, self._call_question_file,
+                                                  direct_upload.DirectUploadedFile(name, len(contents), None))
+
+        proposal_qa_file = ProposalQAFile.objects.get(proposal=self._proposal, call_question=self._call_question_file)
+        self.assertEqual(proposal_qa_file.md5, hashlib.md5(contents).hexdigest())
+
+    def test_proposal_qa_file_keeps_md5_of_committed_file(self):
+        # Files uploaded directly are already in the bucket: they are not downloaded to calculate the md5
+        proposal_qa_file = ProposalQAFile(proposal=self._proposal, call_question=self._call_question_file)
+        proposal_qa_file.file = 'proposals_qa/cv.pdf'
+        proposal_qa_file.md5 = '0cc175b9c0f1b6a831c399e269772661'
+        proposal_qa_file.save()
+
+        proposal_qa_file.refresh_from_db()
+        self.assertEqual(proposal_qa_file.md5, '0cc175b9c0f1b6a831c399e269772661')
@@ -0,0 +1,127 @@
+import socket
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from project_core.email_queue import queue_email, send_queued_emails
+from project_core.models import OutgoingEmail, Contact
+from project_core.tests import database_population
+
+
+def unused_local_port():
+    # Nothing listens on it: connecting is refused straight away
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class EmailQueueTest(TestCase):
+    def setUp(self):
+        self._proposal = database_population.create_proposal()
+        Contact.objects.create(person_position=self._proposal.applicant, entry='applicant@example.com',
+                               method=Contact.EMAIL)
+
+    def test_proposal_draft_email_sent_by_command(self):
+        self.client.get(reverse('proposal-thank-you', kwargs={'uuid': self._proposal.uuid}))
+        # Loading the page again does not queue it again
+        self.client.get(reverse('proposal-thank-you', kwargs={'uuid': self._proposal.uuid}))
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get(proposal=self._proposal)
+        self.assertEqual(email.purpose, OutgoingEmail.PROPOSAL_DRAFT_SAVED)
+        self.assertEqual(email.recipient_list(), ['applicant@example.com'])
+
+        self._proposal.refresh_from_db()
+        self.assertFalse(self._proposal.draft_saved_mail_sent)
+
+        out = StringIO()
+        call_command('sendqueuedemails', stdout=out)
+        self.assertEqual(out.getvalue(), 'Emails sent: 1 failed: 0\n')
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Swiss Polar Institute - Proposal draft saved')
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.SENT)
+        self._proposal.refresh_from_db()
+        self.assertTrue(self._proposal.draft_saved_mail_sent)
+        self.assertFalse(self._proposal.submitted_mail_sent)
+
+    def test_batch_size(self):
+        for i in range(3):
+            queue_email(f'Subject {i}', 'Body', ['applicant@example.com'])
+
+        self.assertEqual(send_queued_emails(batch_size=2), (2, 0))
+        self.assertEqual(send_queued_emails(batch_size=2), (1, 0))
+        self.assertEqual(send_queued_emails(batch_size=2), (0, 0))
+        self.assertEqual([message.subject for message in mail.outbox], ['Subject 0', 'Subject 1', 'Subject 2'])
+
+    @override_settings(EMAIL_QUEUE_LEASE_SECONDS=600)
+    def test_claimed_emails_are_not_sent_twice(self):
+        email = queue_email('Subject', 'Body', ['applicant@example.com'])
+        results_while_sending = []
+
+        def send(message, fail_silently=False):
+            # Another sendqueuedemails running while this one is sending
+            results_while_sending.append(send_queued_emails())
+
+            leased_email = OutgoingEmail.objects.get(id=email.id)
+            self.assertEqual(leased_email.status, OutgoingEmail.PENDING)
+            self.assertGreater(leased_email.next_attempt_on, timezone.now() + timedelta(seconds=590))
+            return 1
+
+        with mock.patch('project_core.email_queue.EmailMessage.send', autospec=True, side_effect=send):
+            self.assertEqual(send_queued_emails(), (1, 0))
+
+        self.assertEqual(results_while_sending, [(0, 0)])
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.SENT)
+
+    @override_settings(EMAIL_QUEUE_MAX_ATTEMPTS=2,
+                       EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                       EMAIL_HOST='127.0.0.1', EMAIL_USE_TLS=False, EMAIL_TIMEOUT=5)
+    def test_retry_and_backoff(self):
+        email = queue_email('Subject', 'Body', ['applicant@example.com'], self._proposal,
+                            OutgoingEmail.PROPOSAL_SUBMITTED)
+
+        with self.settings(EMAIL_PORT=unused_local_port()):
+            self.assertEqual(send_queued_emails(), (0, 1))
+
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutgoingEmail.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertIsNotNone(email.last_error)
+
+            # Not retried before the backoff
+            self.assertEqual(send_queued_emails(), (0, 0))
+
+            email.next_attempt_on = email.created_on
+            email.save()
+            self.assertEqual(send_queued_emails(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self._proposal.refresh_from_db()
+        self.assertFalse(self._proposal.submitted_mail_sent)
+
+    def test_loop_continues_after_error(self):
+        # The second call fails (e.g. the database is restarting) and the last one stops the loop
+        send_queued_emails_results = [(1, 0), OperationalError('Lost connection'), (1, 0), KeyboardInterrupt()]
+
+        out = StringIO()
+        with mock.patch('project_core.management.commands.sendqueuedemails.send_queued_emails',
+                        side_effect=send_queued_emails_results) as send_queued_emails_mock, \
+                mock.patch('project_core.management.commands.sendqueuedemails.time.sleep'), \
+                self.assertLogs('project_core', level='ERROR'):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('sendqueuedemails', '--loop', stdout=out)
+
+        self.assertEqual(send_queued_emails_mock.call_count, 4)
+        self.assertEqual(out.getvalue(), 'Emails sent: 1 failed: 0\n' * 2)
@@ -0,0 +1,106 @@
+from django.test import TestCase
+from django.urls import reverse
+
+import project_core.proposal_detail_cache
+from project_core.models import Proposal, ProposalQAText, PhysicalPerson, Contact
+from project_core.tests import database_population
+
+
+class ProposalDetailCacheTest(TestCase):
+    def setUp(self):
+        project_core.proposal_detail_cache.invalidate_all()
+
+        self._proposal = database_population.create_proposal()
+        self._proposal.proposal_status = database_population.create_proposal_status()[0]
+        self._proposal.save()
+
+        call_part = database_population.create_call_part(self._proposal.call)
+        self._call_question = database_population.create_call_question(call_part)
+
+        ProposalQAText.objects.create(proposal=self._proposal, call_question=self._call_question,
+                                      answer='Very far')
+
+        self._client_management = database_population.create_management_logged_client()
+
+    def test_get_submitted_proposal_detail(self):
+        detail = project_core.proposal_detail_cache.get_submitted_proposal_detail(self._proposal)
+
+        self.assertEqual(len(detail['parts_with_answers']), 1)
+        part = detail['parts_with_answers'][0]
+        self.assertEqual(part['title_rendered'], 'Weather')
+        self.assertEqual(part['questions_answers_text'], [{'question': self._call_question, 'answer': 'Very far'}])
+        self.assertEqual(part['questions_answers_file'], [])
+        self.assertEqual(detail['part_numbers'], self._proposal.call.get_part_numbers_for_call())
+
+        # Cached: the answers are not read again
+        with self.assertNumQueries(0):
+            project_core.proposal_detail_cache.get_submitted_proposal_detail(self._proposal)
+
+    def test_invalidated_when_answer_changes(self):
+        response = self._client_management.get(reverse('logged-proposal-detail', kwargs={'pk': self._proposal.id}))
+        self.assertContains(response, 'Very far')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            answer = ProposalQAText.objects.get(proposal=self._proposal)
+            answer.answer = 'Only a few meters'
+            answer.save()
+
+        response = self._client_management.get(reverse('logged-proposal-detail', kwargs={'pk': self._proposal.id}))
+        self.assertNotContains(response, 'Very far')
+        self.assertContains(response, 'Only a few meters')
+
+    def test_invalidated_when_call_question_changes(self):
+        response = self._client_management.get(reverse('logged-proposal-detail', kwargs={'pk': self._proposal.id}))
+        self.assertContains(response, 'How far are you going to go?')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._call_question.question_text = 'Where?'
+            self._call_question.save()
+
+        response = self._client_management.get(reverse('logged-proposal-detail', kwargs={'pk': self._proposal.id}))
+        self.assertContains(response, 'Where?')
+
+    def test_proposal_information_cached(self):
+        url = reverse('logged-proposal-detail', kwargs={'pk': self._proposal.id})
+        surname = self._proposal.applicant.person.surname
+
+        response = self._client_management.get(url)
+        self.assertContains(response, surname)
+
+        # update() does not send signals: the rendered information is still cached
+        PhysicalPerson.objects.filter(id=self._proposal.applicant.person.id).update(surname='Amundsen')
+
+        response = self._client_management.get(url)
+        self.assertContains(response, surname)
+        self.assertNotContains(response, 'Amundsen')
+
+    def test_invalidated_when_applicant_changes(self):
+        url = reverse('logged-proposal-detail', kwargs={'pk': self._proposal.id})
+        self._client_management.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            person = self._proposal.applicant.person
+            person.surname = 'Amundsen'
+            person.save()
+
+        self.assertContains(self._client_management.get(url), 'Amundsen')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Contact.objects.create(person_position=self._proposal.applicant, entry='+41 21 000 00 00',
+                                   method=Contact.PHONE)
+
+        self.assertContains(self._client_management.get(url), '+41 21 000 00 00')
+
+    def test_proposals_of_deleted_objects_resolved_before_commit(self):
+        detail = project_core.proposal_detail_cache.get_submitted_proposal_detail(self._proposal)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Like a post_delete: after the commit the QuerySet does not find the proposal anymore
+            proposals = Proposal.objects.filter(id=self._proposal.id, title=self._proposal.title)
+            project_core.proposal_detail_cache.invalidate_proposals_on_commit(proposals, resolve_now=True)
+            Proposal.objects.filter(id=self._proposal.id).update(title='Changed')
+
+        self.assertNotEqual(
+            project_core.proposal_detail_cache.get_submitted_proposal_detail(self._proposal)[
+                'proposal_detail_fragments_key'],
+            detail['proposal_detail_fragments_key'])
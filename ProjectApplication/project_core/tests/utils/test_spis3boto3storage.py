@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.apps import apps
+from django.db import models
+from django.test import TestCase, override_settings
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from project_core.utils.SpiS3Boto3Storage import SpiS3Boto3Storage, SignedUrlCache, signed_url_cache
+
+
+class SpiS3Boto3StorageTest(TestCase):
+    def setUp(self):
+        signed_url_cache.clear()
+        self._storage = SpiS3Boto3Storage()
+
+    def test_url_cached(self):
+        url = self._storage.url('proposals_qa/answer.pdf')
+        self.assertIn('Signature', url)
+
+        key = self._storage._signed_url_cache_key('proposals_qa/answer.pdf', None, self._storage.querystring_expire)
+        self.assertEqual(signed_url_cache.get(key), url)
+
+        # The cached URL is returned
+        signed_url_cache.set(key, 'http://localhost:9000/cached-url', 60)
+        self.assertEqual(self._storage.url('proposals_qa/answer.pdf'), 'http://localhost:9000/cached-url')
+
+    def test_download_link_with_name_cached_by_disposition(self):
+        url_a = self._storage.download_link_with_name('project_core/CallPartFile/CallPartFile-1.pdf', filename='a')
+        url_b = self._storage.download_link_with_name('project_core/CallPartFile/CallPartFile-1.pdf', filename='b')
+
+        self.assertIn('filename%3Da.pdf', url_a)
+        self.assertIn('filename%3Db.pdf', url_b)
+
+    @override_settings(SIGNED_URL_CACHE_MARGIN=60 * 60 * 2)
+    def test_url_not_cached_if_expires_soon(self):
+        self._storage.url('proposals_qa/answer.pdf')
+
+        key = self._storage._signed_url_cache_key('proposals_qa/answer.pdf', None, self._storage.querystring_expire)
+        self.assertIsNone(signed_url_cache.get(key))
+
+    def test_url_signed_once_per_name(self):
+        names = [f'grant_management/Medium/medium-{i}.jpg' for i in range(3)]
+
+        with mock.patch.object(S3Boto3Storage, 'url', autospec=True,
+                               side_effect=lambda storage, name, parameters=None, expire=None: f'signed:{name}') \
+                as url_mock:
+            for i in range(2):
+                urls = [self._storage.url(name) for name in names]
+
+        self.assertEqual(url_mock.call_count, len(names))
+        self.assertEqual(urls, [f'signed:{name}' for name in names])
+
+    def test_file_fields_use_signed_url_cache(self):
+        # E.g. the media of the API, the attachments, invoices and reports
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if isinstance(field, models.FileField) and isinstance(field.storage, S3Boto3Storage):
+                    self.assertIsInstance(field.storage, SpiS3Boto3Storage, f'{model.__name__}.{field.name}')
+
+
+class SignedUrlCacheTest(TestCase):
+    def test_least_recently_used_discarded(self):
+        cache = SignedUrlCache(max_entries=2)
+        cache.set('a', 'url-a', 60)
+        cache.set('b', 'url-b', 60)
+        cache.get('a')
+        cache.set('c', 'url-c', 60)
+
+        self.assertEqual(cache.get('a'), 'url-a')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'url-c')
+
+    def test_expired(self):
+        cache = SignedUrlCache(max_entries=2)
+        cache.set('a', 'url-a', 0)
+
+        self.assertIsNone(cache.get('a'))
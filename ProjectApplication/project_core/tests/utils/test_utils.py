@@ -1,6 +1,13 @@
+import hashlib
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
-from project_core.utils.utils import bytes_to_human_readable
+from project_core.models import ProposalQAFile
+from project_core.utils.utils import bytes_to_human_readable, calculate_md5_and_size_from_file_field, \
+    save_file_field_calculating_md5, HashingFile
 
 
 class UtilsUtilsTest(TestCase):
@@ -10,3 +17,37 @@ class UtilsUtilsTest(TestCase):
     def test_bytes_to_human(self):
         self.assertEqual(bytes_to_human_readable(2048), '2.00 KB')
         self.assertEqual(bytes_to_human_readable(24545844), '23.41 MB')
+
+    def test_save_file_field_calculating_md5(self):
+        contents = b'%PDF-1.4 ' * 1000
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_field = ProposalQAFile(file=SimpleUploadedFile('answer.pdf', contents)).file
+            file_field.storage = FileSystemStorage(location=directory)
+
+            md5, size = save_file_field_calculating_md5(file_field, chunk_size=1024)
+
+            self.assertEqual(md5, hashlib.md5(contents).hexdigest())
+            self.assertEqual(size, len(contents))
+            self.assertTrue(file_field._committed)
+            self.assertEqual(file_field.name, 'proposals_qa/answer.pdf')
+
+            # Saved files are streamed from the storage
+            self.assertEqual(calculate_md5_and_size_from_file_field(file_field, chunk_size=1024), (md5, size))
+
+    def test_hashing_file_read_again(self):
+        contents = b'0123456789' * 100
+        hashing_file = HashingFile(SimpleUploadedFile('answer.pdf', contents))
+
+        # E.g. an upload retried by the storage
+        hashing_file.read(300)
+        hashing_file.seek(0)
+        self.assertEqual(hashing_file.read(), contents)
+
+        self.assertEqual(hashing_file.md5_and_size(), (hashlib.md5(contents).hexdigest(), len(contents)))
+
+    def test_hashing_file_not_read(self):
+        contents = b'0123456789' * 100
+        hashing_file = HashingFile(SimpleUploadedFile('answer.pdf', contents))
+
+        self.assertEqual(hashing_file.md5_and_size(chunk_size=64), (hashlib.md5(contents).hexdigest(), len(contents)))
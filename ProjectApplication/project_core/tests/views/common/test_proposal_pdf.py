@@ -1,9 +1,22 @@
+import os
+import subprocess
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
-from django.test import Client
-from django.test import TestCase
+from django.test import Client, RequestFactory
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
+from project_core.models import Proposal
 from project_core.tests import database_population
+from project_core.views.common.proposal_pdf import ProposalPdfCache, _wkhtmltopdf_input, \
+    LATEST_PDF_CACHE_KEY_PREFIX, create_pdf_for_proposal, create_pdfs_for_proposals
 
 
 class OrganisationsAutocompleteTest(StaticLiveServerTestCase):
@@ -24,3 +37,221 @@ class OrganisationsAutocompleteTest(StaticLiveServerTestCase):
         self.assertEqual(response.headers['Content-Disposition'], 'attachment; filename="GLACE_2018-John_Smith.zip"')
         self.assertGreaterEqual(int(response.headers['Content-Length']), 98000)
         self.assertTrue(response.content.startswith(b'PK'))
+
+
+class ProposalPdfCacheTest(TestCase):
+    def setUp(self):
+        self._cache_directory = tempfile.TemporaryDirectory()
+        self._settings = self.settings(PROPOSAL_PDF_CACHE_STORAGE='local',
+                                       PROPOSAL_PDF_CACHE_DIRECTORY=self._cache_directory.name,
+                                       PROPOSAL_PDF_CACHE_MAX_SIZE=1000)
+        self._settings.enable()
+
+        self._proposal = database_population.create_proposal()
+        self._proposal.proposal_status = database_population.create_proposal_status()[0]
+        self._proposal.save()
+
+    def tearDown(self):
+        self._settings.disable()
+        self._cache_directory.cleanup()
+
+    def test_file_name_changes_with_the_proposal(self):
+        file_name = ProposalPdfCache.file_name(self._proposal)
+        self.assertTrue(file_name.startswith(f'proposal-{self._proposal.id}-'))
+        self.assertEqual(ProposalPdfCache.file_name(self._proposal), file_name)
+
+        self._proposal.title = 'A new title'
+        self._proposal.save()
+
+        self.assertNotEqual(ProposalPdfCache.file_name(self._proposal), file_name)
+
+    def test_file_name_changes_with_the_applicant(self):
+        file_name = ProposalPdfCache.file_name(self._proposal)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            person = self._proposal.applicant.person
+            person.surname = 'Amundsen'
+            person.save()
+
+        self.assertNotEqual(ProposalPdfCache.file_name(self._proposal), file_name)
+
+    def test_file_name_changes_with_the_call_questions(self):
+        call_question = database_population.create_call_question(
+            database_population.create_call_part(self._proposal.call))
+        file_name = ProposalPdfCache.file_name(self._proposal)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_question.question_text = 'Where?'
+            call_question.save()
+
+        self.assertNotEqual(ProposalPdfCache.file_name(self._proposal), file_name)
+
+    def test_is_enabled_for(self):
+        self.assertTrue(ProposalPdfCache.is_enabled_for(self._proposal))
+
+        self._proposal.proposal_status = database_population.create_proposal_status()[1]
+        self._proposal.save()
+
+        self.assertFalse(ProposalPdfCache.is_enabled_for(self._proposal))
+
+    def test_save_get_and_evict(self):
+        pdf_cache = ProposalPdfCache()
+        old_file_name = pdf_cache.file_name(self._proposal)
+
+        self.assertIsNone(pdf_cache.get(old_file_name))
+        pdf_cache.save(old_file_name, b'%PDF old version')
+        self.assertEqual(pdf_cache.get(old_file_name), b'%PDF old version')
+
+        # The previous PDF of the same proposal is deleted
+        self._proposal.title = 'A new title'
+        self._proposal.save()
+        file_name = pdf_cache.file_name(self._proposal)
+        pdf_cache.save(file_name, b'%PDF new version')
+        self.assertIsNone(pdf_cache.get(old_file_name))
+        self.assertEqual(pdf_cache.get(file_name), b'%PDF new version')
+
+        # The oldest PDFs are deleted when the cache is bigger than PROPOSAL_PDF_CACHE_MAX_SIZE
+        pdf_cache.save('proposal-1000-big.pdf', b'%PDF' + b'0' * 990)
+        self.assertEqual(pdf_cache.get(file_name), b'%PDF new version')
+
+        os.utime(os.path.join(self._cache_directory.name, file_name), (1, 1))
+        self.assertEqual(pdf_cache.evict(), 1)
+        self.assertIsNone(pdf_cache.get(file_name))
+        self.assertIsNotNone(pdf_cache.get('proposal-1000-big.pdf'))
+
+    def test_evict_previous_versions(self):
+        pdf_cache = ProposalPdfCache()
+        pdf_cache.save('proposal-1000-a.pdf', b'%PDF old version')
+        os.utime(os.path.join(self._cache_directory.name, 'proposal-1000-a.pdf'), (1, 1))
+
+        # E.g. another process saved it: the default cache did not know the previous file name
+        cache.delete(f'{LATEST_PDF_CACHE_KEY_PREFIX}-proposal-1000-')
+        pdf_cache.save('proposal-1000-b.pdf', b'%PDF new version')
+        self.assertIsNotNone(pdf_cache.get('proposal-1000-a.pdf'))
+
+        out = StringIO()
+        call_command('evictproposalpdfs', stdout=out)
+        self.assertEqual(out.getvalue(), 'Deleted PDFs: 1\n')
+
+        self.assertIsNone(pdf_cache.get('proposal-1000-a.pdf'))
+        self.assertEqual(pdf_cache.get('proposal-1000-b.pdf'), b'%PDF new version')
+
+    def test_get_cached_pdf(self):
+        pdf_cache = ProposalPdfCache()
+        pdf_cache.save(pdf_cache.file_name(self._proposal), b'%PDF cached')
+
+        response = Client().get(reverse('proposal-detail-pdf', kwargs={'uuid': self._proposal.uuid}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'%PDF cached')
+
+
+class RenderProposalDetailHtmlTest(TestCase):
+    def setUp(self):
+        self._proposal = database_population.create_proposal()
+
+    def test_wkhtmltopdf_input_in_process(self):
+        with self.settings(PROPOSAL_PDF_RENDERING='in_process'):
+            arguments, html = _wkhtmltopdf_input(self._proposal, RequestFactory().get('/'))
+
+        html = html.decode('utf-8')
+
+        self.assertEqual(arguments[-1], '-')
+        self.assertIn('--allow', arguments)
+        self.assertIn(self._proposal.title, html)
+        self.assertIn('src="file:///', html)
+        self.assertNotIn(f'src="{settings.STATIC_URL}', html)
+
+    def test_wkhtmltopdf_input_http(self):
+        with self.settings(PROPOSAL_PDF_RENDERING='http'):
+            arguments, html = _wkhtmltopdf_input(self._proposal, RequestFactory().get('/'))
+
+        self.assertIsNone(html)
+        self.assertEqual(arguments[-1], f'http://localhost:9998/proposal/{self._proposal.uuid}/')
+
+
+def wkhtmltopdf_completed(command, **kwargs):
+    # The PDF contains the URL (last argument before the output '-') to know which proposal it is
+    return subprocess.CompletedProcess(command, 0, stdout=command[-2].encode('utf-8'), stderr=b'')
+
+
+@override_settings(PROPOSAL_PDF_RENDERING='http', PROPOSAL_PDF_CONCURRENCY=2, PROPOSAL_PDF_TIMEOUT=7)
+class CreatePdfsForProposalsTest(TestCase):
+    def setUp(self):
+        proposal = database_population.create_proposal()
+        self._proposals = [proposal]
+
+        for i in range(4):
+            self._proposals.append(
+                Proposal.objects.create(title=f'Proposal {i}',
+                                        start_date=proposal.start_date,
+                                        end_date=proposal.end_date,
+                                        duration_months=2,
+                                        applicant=proposal.applicant,
+                                        proposal_status=proposal.proposal_status,
+                                        call=proposal.call))
+
+        self._request = RequestFactory().get('/')
+
+    def test_timeout(self):
+        with mock.patch('project_core.views.common.proposal_pdf.subprocess.run',
+                        side_effect=subprocess.TimeoutExpired('wkhtmltopdf', 7)) as run_mock:
+            with self.assertRaises(subprocess.TimeoutExpired):
+                create_pdf_for_proposal(self._proposals[0], self._request)
+
+        self.assertEqual(run_mock.call_args[1]['timeout'], 7)
+
+    def test_timeout_does_not_stop_the_other_pdfs(self):
+        def run(command, **kwargs):
+            if str(self._proposals[2].uuid) in command[-2]:
+                raise subprocess.TimeoutExpired(command, kwargs['timeout'])
+
+            return wkhtmltopdf_completed(command)
+
+        with mock.patch('project_core.views.common.proposal_pdf.subprocess.run', side_effect=run):
+            pdfs = list(create_pdfs_for_proposals(self._proposals, self._request))
+
+        self.assertEqual([proposal for proposal, future in pdfs], self._proposals)
+
+        for proposal, future in pdfs:
+            if proposal == self._proposals[2]:
+                self.assertIsInstance(future.exception(), subprocess.TimeoutExpired)
+            else:
+                self.assertIn(str(proposal.uuid), future.result().decode('utf-8'))
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = {'now': 0, 'maximum': 0}
+        started = threading.Semaphore(0)
+        finish = threading.Event()
+
+        def run(command, **kwargs):
+            with lock:
+                running['now'] += 1
+                running['maximum'] = max(running['maximum'], running['now'])
+
+            started.release()
+            finish.wait(timeout=10)
+
+            with lock:
+                running['now'] -= 1
+
+            return wkhtmltopdf_completed(command)
+
+        with mock.patch('project_core.views.common.proposal_pdf.subprocess.run', side_effect=run) as run_mock:
+            pdfs = create_pdfs_for_proposals(self._proposals, self._request)
+            first_proposal, first_future = next(pdfs)
+
+            # PROPOSAL_PDF_CONCURRENCY PDFs are being generated and the next one is not started
+            self.assertTrue(started.acquire(timeout=10))
+            self.assertTrue(started.acquire(timeout=10))
+            self.assertFalse(started.acquire(timeout=0.2))
+            self.assertEqual(run_mock.call_count, 2)
+
+            finish.set()
+            results = [(first_proposal, first_future.result())] + \
+                      [(proposal, future.result()) for proposal, future in pdfs]
+
+        self.assertEqual(run_mock.call_count, 5)
+        self.assertEqual(running['maximum'], 2)
+        self.assertEqual([proposal for proposal, pdf in results], self._proposals)
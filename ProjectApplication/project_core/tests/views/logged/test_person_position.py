@@ -0,0 +1,44 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from project_core.models import Contact
+from project_core.tests import database_population
+
+
+class PersonPositionListTest(TestCase):
+    def setUp(self):
+        self._client_management = database_population.create_management_logged_client()
+
+        self._person_position = database_population.create_person_position()
+        self._person_position.privacy_policy = True
+        self._person_position.save()
+
+        Contact.objects.create(person_position=self._person_position, entry='+41 00 000 00 00',
+                               method=Contact.PHONE)
+        Contact.objects.create(person_position=self._person_position, entry='john.smith@example.com',
+                               method=Contact.EMAIL)
+
+        no_privacy_policy = database_population.create_person_position(first_name='Jane', surname='Doe',
+                                                                       orcid='0000-0002-1694-233X')
+        no_privacy_policy.privacy_policy = False
+        no_privacy_policy.save()
+
+    def test_get(self):
+        response = self._client_management.get(reverse('logged-person-position-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'john.smith@example.com')
+        self.assertNotContains(response, 'Doe')
+
+    def test_get_json(self):
+        response = self._client_management.get(reverse('logged-person-position-list-json'),
+                                               {'draw': '1', 'start': '0', 'length': '100',
+                                                'search[value]': 'john.smith'})
+
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['recordsTotal'], 1)
+        self.assertEqual(data['recordsFiltered'], 1)
+        self.assertEqual(data['data'][0][:2], ['John', 'Smith'])
+        self.assertIn('mailto:john.smith@example.com', data['data'][0][2])
@@ -1,7 +1,10 @@
 from django.test import TestCase
 from django.urls import reverse
 
+from grant_management.models import License, LaySummary, LaySummaryType, Medium
+from project_core.models import Project
 from project_core.tests import database_population
+from project_core.views.logged.project import ProjectDataTable
 
 
 class ProjectListTest(TestCase):
@@ -16,3 +19,107 @@ class ProjectListTest(TestCase):
 
         self.assertContains(response, 'TEST-2021-001')
         self.assertContains(response, 'Test project')
+
+
+class ProjectListJsonTest(TestCase):
+    def setUp(self):
+        self._client_management = database_population.create_management_logged_client()
+
+        project = database_population.create_project('TEST-2021-001', 'Test project')
+
+        for number in range(2, 6):
+            Project.objects.create(key=f'TEST-2021-00{number}', title=f'Another project {number}',
+                                   start_date=project.start_date, end_date=project.end_date,
+                                   funding_instrument=project.funding_instrument, finance_year=project.finance_year,
+                                   allocated_budget=1000, principal_investigator=project.principal_investigator)
+
+    def test_get_page(self):
+        response = self._client_management.get(reverse('logged-project-list-json'),
+                                               {'draw': '3', 'start': '1', 'length': '2',
+                                                'order[0][column]': '0', 'order[0][dir]': 'desc'})
+
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['draw'], 3)
+        self.assertEqual(data['recordsTotal'], 5)
+        self.assertEqual(data['recordsFiltered'], 5)
+        self.assertEqual([row[0] for row in data['data']], ['TEST-2021-004', 'TEST-2021-003'])
+        self.assertIn(reverse('logged-project-detail', kwargs={'pk': Project.objects.get(key='TEST-2021-004').id}),
+                      data['data'][0][4])
+
+    def test_get_search(self):
+        response = self._client_management.get(reverse('logged-project-list-json'),
+                                               {'draw': '1', 'start': '0', 'length': '10',
+                                                'search[value]': 'another 3'})
+
+        data = response.json()
+        self.assertEqual(data['recordsTotal'], 5)
+        self.assertEqual(data['recordsFiltered'], 1)
+        self.assertEqual(data['data'][0][1], 'Another project 3')
+
+    def test_get_invalid_parameters(self):
+        for parameters in [{'length': 'a'}, {'start': '-5'}, {'draw': '1.5'}, {'length': '-2'},
+                           {'start': str(2 ** 40)}, {'order[0][column]': 'x'},
+                           {'order[0][column]': '0', 'order[0][dir]': 'sideways'}]:
+            response = self._client_management.get(reverse('logged-project-list-json'), parameters)
+
+            self.assertEqual(response.status_code, 400, parameters)
+
+    def test_page_length_capped(self):
+        class SmallProjectDataTable(ProjectDataTable):
+            max_page_length = 2
+
+        data_table = SmallProjectDataTable(Project.objects.all(), 'logged-project-detail')
+
+        # -1 is "All" in DataTables
+        self.assertEqual(len(data_table.page({'length': '-1'})['data']), 2)
+        self.assertEqual(len(data_table.page({'length': '1000'})['data']), 2)
+        self.assertEqual(len(data_table.page({'length': '1'})['data']), 1)
+
+
+class ProjectAPITest(TestCase):
+    def setUp(self):
+        self._project = database_population.create_project('TEST-2021-001', 'Test project')
+
+        medium_without_license = database_population.create_medium(self._project)
+        license = License.objects.order_by('id').first()
+        Medium.objects.create(project=self._project, received_date=medium_without_license.received_date,
+                              photographer=medium_without_license.photographer, license=license,
+                              file=medium_without_license.file)
+
+        web = LaySummaryType.objects.get(name='Web')
+        LaySummary.objects.create(project=self._project, text='Summary for the website', lay_summary_type=web,
+                                  author=medium_without_license.photographer)
+        LaySummary.objects.create(project=self._project, text='Original summary',
+                                  lay_summary_type=database_population.create_lay_summary_original())
+
+    def test_list(self):
+        response = self.client.get(reverse('project-list-api'))
+
+        self.assertEqual(response.status_code, 200)
+        project = response.json()['results'][0]
+        self.assertEqual(project['title'], 'Test project')
+        # Only the media with a license are public
+        self.assertEqual(len(project['medium_set']), 1)
+
+        # The response is cached until a project changes (the query is from django-axes' middleware)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse('project-list-api')).json()['results'][0]['title'],
+                             'Test project')
+
+        self._project.title = 'Test project (updated)'
+        self._project.save()
+
+        response = self.client.get(reverse('project-list-api'))
+        self.assertEqual(response.json()['results'][0]['title'], 'Test project (updated)')
+
+    def test_detail(self):
+        response = self.client.get(reverse('project-list-api', kwargs={'uuid': self._project.uuid}))
+
+        self.assertEqual(response.status_code, 200)
+        project = response.json()
+        self.assertEqual(project['key'], 'TEST-2021-001')
+        self.assertEqual(len(project['medium_set']), 1)
+        self.assertEqual([lay_summary['text'] for lay_summary in project['laysummary_set']],
+                         ['Summary for the website'])
@@ -39,7 +39,7 @@ class ManagementProposalTest(TestCase):
             reverse('logged-export-proposals-csv-summary-call', args=[call_no_proposals.id]))
 
         # Checks that only one line is in the response: the header
-        self.assertEqual(response.content.decode('utf-8').count('\n'), 1)
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8').count('\n'), 1)
 
     def test_proposals_export_csv_summary(self):
         response = self._client_management.get(
@@ -83,6 +83,41 @@ class ManagementProposalTest(TestCase):
         response = self._client_management.get(reverse('logged-proposal-list'))
 
         self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'A test proposal')
+
+    def test_load_logged_proposal_list_json(self):
+        response = self._client_management.get(reverse('logged-proposal-list-json'),
+                                               {'draw': '1', 'start': '0', 'length': '100',
+                                                'search[value]': 'test proposal'})
+
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['recordsTotal'], 1)
+        self.assertEqual(data['recordsFiltered'], 1)
+        self.assertEqual(data['data'][0][1], 'A test proposal')
+
+        response = self._client_management.get(reverse('logged-proposal-list-json'),
+                                               {'draw': '2', 'start': '0', 'length': '100',
+                                                'search[value]': 'does not exist'})
+
+        data = response.json()
+        self.assertEqual(data['recordsFiltered'], 0)
+        self.assertEqual(data['data'], [])
+
+    def test_load_logged_proposal_list_json_reviewer_no_access(self):
+        c = Client()
+
+        reviewer = Reviewer(user=self._reviewer_user)
+        reviewer.save()
+
+        login = c.login(username='unittest_reviewer', password='12345', request=HttpRequest())
+        self.assertTrue(login)
+
+        response = c.get(reverse('logged-proposal-list-json'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['recordsTotal'], 0)
 
     def test_export_to_excel(self):
         response = self._client_management.get(
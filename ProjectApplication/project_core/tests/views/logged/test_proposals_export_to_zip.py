@@ -1,7 +1,16 @@
+import io
+import subprocess
+import zipfile
+from unittest import mock
+
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, RequestFactory, override_settings
 from django.urls import reverse
 
+from project_core.models import Proposal, ProposalQAFile
 from project_core.tests import database_population
+from project_core.views.common.proposal_zip import ZIP_CHUNK_SIZE, write_proposal_to_zip
 
 
 class ProposalsExportZip(StaticLiveServerTestCase):
@@ -20,3 +29,101 @@ class ProposalsExportZip(StaticLiveServerTestCase):
         self.assertTrue(response['content-disposition'].endswith('.zip"'))
         self.assertTrue(response['content-disposition'].startswith('attachment; filename="'))
         self.assertGreaterEqual(int(response['content-length']), 98000)
+
+    def test_get_call_ok(self):
+        second_proposal = Proposal.objects.create(title='Second proposal',
+                                                  start_date=self._proposal.start_date,
+                                                  end_date=self._proposal.end_date,
+                                                  duration_months=2,
+                                                  applicant=database_population.create_person_position(
+                                                      first_name='James', surname='Alan', orcid=None),
+                                                  proposal_status=self._proposal.proposal_status,
+                                                  call=self._proposal.call)
+
+        # Bigger than ZIP_CHUNK_SIZE: it is copied into the ZIP file in chunks
+        file_contents = b'%PDF' + b'0' * (ZIP_CHUNK_SIZE * 2 + 10)
+        call_question = database_population.create_call_question(
+            database_population.create_call_part(self._proposal.call))
+        answer_file = ProposalQAFile.objects.create(proposal=self._proposal, call_question=call_question,
+                                                    file=SimpleUploadedFile('answer.pdf', file_contents))
+
+        response = self._client_management.get(
+            reverse('logged-export-proposals-zip-call',
+                    kwargs={'call': self._proposal.call.id})
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            pdf_file_names = [name for name in zip_file.namelist() if '/Proposal-' in name]
+            self.assertEqual(zip_file.read(f'{self._proposal.file_name()}/{answer_file.file_name()}'), file_contents)
+
+        # The PDFs are generated concurrently but added in the order of the proposals
+        self.assertEqual(pdf_file_names,
+                         [f'{self._proposal.file_name()}/Proposal-{self._proposal.file_name()}.pdf',
+                          f'{second_proposal.file_name()}/Proposal-{second_proposal.file_name()}.pdf'])
+
+
+@override_settings(PROPOSAL_PDF_RENDERING='http', PROPOSAL_PDF_TIMEOUT=7)
+class ProposalZipPdfTimeoutTest(TestCase):
+    def setUp(self):
+        self._proposal = database_population.create_proposal()
+
+    def test_pdf_timeout_written_as_txt(self):
+        zip_buffer = io.BytesIO()
+
+        with mock.patch('project_core.views.common.proposal_pdf.subprocess.run',
+                        side_effect=subprocess.TimeoutExpired('wkhtmltopdf', 7)), \
+                self.assertLogs('project_core', level='WARNING'), \
+                zipfile.ZipFile(zip_buffer, mode='w') as zip_archive:
+            list(write_proposal_to_zip(self._proposal, zip_archive, 'proposal', RequestFactory().get('/')))
+
+        with zipfile.ZipFile(zip_buffer) as zip_file:
+            file_name = f'proposal/Proposal-{self._proposal.file_name()}.pdf.txt'
+            self.assertEqual(zip_file.namelist(), [file_name])
+            self.assertEqual(zip_file.read(file_name).decode('utf-8'),
+                             f'ERROR generating the PDF of the proposal: it took longer than 7 seconds. '
+                             f'Proposal id: {self._proposal.id}')
+
+    def test_pdf_error_written_as_txt(self):
+        zip_buffer = io.BytesIO()
+
+        with mock.patch('project_core.views.common.proposal_pdf.subprocess.run',
+                        side_effect=FileNotFoundError('wkhtmltopdf')), \
+                self.assertLogs('project_core', level='WARNING'), \
+                zipfile.ZipFile(zip_buffer, mode='w') as zip_archive:
+            list(write_proposal_to_zip(self._proposal, zip_archive, 'proposal', RequestFactory().get('/')))
+
+        with zipfile.ZipFile(zip_buffer) as zip_file:
+            file_name = f'proposal/Proposal-{self._proposal.file_name()}.pdf.txt'
+            self.assertEqual(zip_file.namelist(), [file_name])
+            self.assertEqual(zip_file.read(file_name).decode('utf-8'),
+                             f'ERROR generating the PDF of the proposal: unexpected error. '
+                             f'Proposal id: {self._proposal.id}')
+
+    def test_file_read_error_written_as_txt(self):
+        call_question = database_population.create_call_question(
+            database_population.create_call_part(self._proposal.call))
+        answer_file = ProposalQAFile.objects.create(proposal=self._proposal, call_question=call_question,
+                                                    file='proposals_qa/answer.pdf', md5='a' * 32)
+
+        def file_chunks(file_field, chunk_size):
+            yield b'%PDF'
+            raise OSError('Connection reset by peer')
+
+        zip_buffer = io.BytesIO()
+
+        with mock.patch('project_core.views.common.proposal_pdf.subprocess.run',
+                        return_value=subprocess.CompletedProcess('wkhtmltopdf', 0, stdout=b'%PDF', stderr=b'')), \
+                mock.patch('project_core.views.common.proposal_zip.read_file_field_in_chunks',
+                           side_effect=file_chunks), \
+                self.assertLogs('project_core', level='WARNING'), \
+                zipfile.ZipFile(zip_buffer, mode='w') as zip_archive:
+            list(write_proposal_to_zip(self._proposal, zip_archive, 'proposal', RequestFactory().get('/')))
+
+        with zipfile.ZipFile(zip_buffer) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            file_name = f'proposal/{answer_file.file_name()}'
+            self.assertEqual(zip_file.read(file_name), b'%PDF')
+            self.assertTrue(zip_file.read(f'{file_name}.txt').decode('utf-8').startswith(
+                f'ERROR reading file from SPI object storage. File id: {answer_file.id} '))
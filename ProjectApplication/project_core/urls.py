@@ -50,10 +50,16 @@ urlpatterns = [
     path('proposal/question_answer/file/<int:proposal_qa_file_id>/<str:md5>/',
          common.proposal.ProposalQuestionAnswerFileView.as_view(),
          name='proposal-question-answer-file'),
+    path('proposal/question_answer/file/upload/',
+         common.proposal.ProposalQuestionAnswerFileUploadView.as_view(),
+         name='proposal-question-answer-file-upload'),
 
     path('logged/proposals/',
          logged.proposal.ProposalList.as_view(),
          name='logged-proposal-list'),
+    path('logged/proposals/json/',
+         logged.proposal.ProposalListJson.as_view(),
+         name='logged-proposal-list-json'),
     path('logged/proposal/preview/',
          logged.proposal.ProposalPreview.as_view(),
          name='logged-proposal-preview'),
@@ -163,6 +169,9 @@ urlpatterns = [
     path('logged/news/',
          logged.news.News.as_view(),
          name='logged-news'),
+    path('logged/performance/',
+         logged.performance.PerformanceStatisticsView.as_view(),
+         name='logged-performance'),
 
     path('logged/template_question/add/',
          logged.template_question.TemplateQuestionCreateView.as_view(),
@@ -202,6 +211,9 @@ urlpatterns = [
     path('logged/person_position/list/',
          logged.person_position.PersonPositionListView.as_view(),
          name='logged-person-position-list'),
+    path('logged/person_position/list/json/',
+         logged.person_position.PersonPositionListJson.as_view(),
+         name='logged-person-position-list-json'),
 
     path('logged/lists/',
          logged.lists.ListsView.as_view(),
@@ -210,6 +222,9 @@ urlpatterns = [
     path('logged/project/list/',
          logged.project.ProjectList.as_view(),
          name='logged-project-list'),
+    path('logged/project/list/json/',
+         logged.project.ProjectListJson.as_view(),
+         name='logged-project-list-json'),
     path('logged/project/<int:pk>/',
          logged.project.ProjectDetailView.as_view(),
          name='logged-project-detail'),
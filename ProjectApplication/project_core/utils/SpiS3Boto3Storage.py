@@ -1,17 +1,90 @@
 import os
+import threading
+import time
+from collections import OrderedDict
 
+from django.conf import settings
 from storages.backends.s3boto3 import S3Boto3Storage
 
 
+class SignedUrlCache:
+    """Signed URLs of this process (least recently used are discarded) with the time until they can be used.
+    In memory: reading them from a shared cache (e.g. files) is slower than signing them again"""
+
+    def __init__(self, max_entries):
+        self._max_entries = max_entries
+        self._urls = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._urls.get(key)
+
+            if entry is None:
+                return None
+
+            url, valid_until = entry
+
+            if valid_until <= time.monotonic():
+                del self._urls[key]
+                return None
+
+            self._urls.move_to_end(key)
+            return url
+
+    def set(self, key, url, timeout):
+        with self._lock:
+            self._urls[key] = (url, time.monotonic() + timeout)
+            self._urls.move_to_end(key)
+
+            while len(self._urls) > self._max_entries:
+                self._urls.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._urls.clear()
+
+
+signed_url_cache = SignedUrlCache(settings.SIGNED_URL_CACHE_MAX_ENTRIES)
+
+
 class SpiS3Boto3Storage(S3Boto3Storage):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    def url(self, name, parameters=None, expire=None):
+        """As S3Boto3Storage.url but the signed URLs are cached (see signed_url_cache) until
+        SIGNED_URL_CACHE_MARGIN seconds before they expire"""
+        if expire is None:
+            expire = self.querystring_expire
+
+        timeout = expire - settings.SIGNED_URL_CACHE_MARGIN
+
+        if not self.querystring_auth or self.custom_domain or timeout <= 0:
+            # Not signed or expiring too soon to be reused
+            return super().url(name, parameters=parameters, expire=expire)
+
+        key = self._signed_url_cache_key(name, parameters, expire)
+
+        url = signed_url_cache.get(key)
+
+        if url is None:
+            url = super().url(name, parameters=parameters, expire=expire)
+            signed_url_cache.set(key, url, timeout)
+
+        return url
+
+    def _signed_url_cache_key(self, name, parameters, expire):
+        # Parameters contain, for example, the Content-Disposition of the download
+        parameters = tuple(sorted((parameters or {}).items()))
+
+        return self.endpoint_url, self.bucket_name, self.location, self.access_key, name, parameters, expire
+
     def download_link_with_name(self, name, *, filename):
         basename, extension = os.path.splitext(name)
         parameters = {}
         parameters['ResponseContentDisposition'] = f'attachment; filename={filename}{extension}'
 
-        download_url = super().url(name, parameters=parameters)
+        download_url = self.url(name, parameters=parameters)
 
-        return download_url
\ No newline at end of file
+        return download_url
@@ -1,9 +1,10 @@
 import hashlib
-import io
 
-from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.core.validators import FileExtensionValidator
 from django.urls import reverse
+from storages.backends.s3boto3 import S3Boto3StorageFile
 
 
 def bytes_to_human_readable(num: int) -> str:
@@ -21,11 +22,12 @@ def bytes_to_human_readable(num: int) -> str:
 
 
 def user_is_in_group_name(user, group_name):
-    try:
-        user.groups.get(name=group_name)
-        return True
-    except ObjectDoesNotExist:
-        return False
+    # The names of the groups are read once per user object (like Django's permissions cache): the templates of a
+    # page check them several times
+    if not hasattr(user, '_group_names_cache'):
+        user._group_names_cache = set(user.groups.values_list('name', flat=True))
+
+    return group_name in user._group_names_cache
 
 
 def create_person_position(orcid, first_name, surname, gender=None, phd_date=None,
@@ -87,17 +89,19 @@ def format_date(date):
     return f'{date:%d-%m-%Y}'
 
 
+FILE_SIZE_LIMIT = 150 * 1024 * 1024
+
+EXTERNAL_FILE_ALLOWED_EXTENSIONS = ['pdf']
+
+
 def file_size_validator(file):
     # It can receive _io.BufferedRandom and S3 files
     file_size = getattr(file.file, 'size', None)
     if file_size is None:
         file_size = file.size
 
-    limit_mb = 150
-    limit = limit_mb * 1024 * 1024
-
-    if file_size > limit:
-        raise ValidationError(f'Maximum file size is {bytes_to_human_readable(limit)}')
+    if file_size > FILE_SIZE_LIMIT:
+        raise ValidationError(f'Maximum file size is {bytes_to_human_readable(FILE_SIZE_LIMIT)}')
 
 
 def management_file_validator():
@@ -106,26 +110,80 @@ def management_file_validator():
 
 
 def external_file_validator():
-    return [FileExtensionValidator(allowed_extensions=['pdf']),
+    return [FileExtensionValidator(allowed_extensions=EXTERNAL_FILE_ALLOWED_EXTENSIONS),
             file_size_validator]
 
 
-def calculate_md5_from_file_field(file_field):
-    # initial_position = file_field.file.file.pos()
-    # file_field.file.file.seek(0)
+class HashingFile(File):
+    """Calculates the md5 and size of the contents of file while they are read (e.g. by the storage when saving it).
+    Contents read again (after a seek, e.g. a retried upload) are not hashed again"""
+
+    def __init__(self, file, name=None):
+        super().__init__(file, name)
+        self.content_type = getattr(file, 'content_type', None)
+        self._md5 = hashlib.md5()
+        self._hashed_size = 0
+
+    def read(self, size=-1):
+        position = self.file.tell()
+        data = self.file.read(size)
+        end = position + len(data)
+
+        if position <= self._hashed_size < end:
+            self._md5.update(data[self._hashed_size - position:])
+            self._hashed_size = end
+
+        return data
+
+    def md5_and_size(self, chunk_size=1024 * 1024):
+        if not self.closed:
+            # Hashes the contents that have not been read (usually none). Some storages (S3) close it when uploaded
+            self.file.seek(self._hashed_size)
+            while self.read(chunk_size):
+                pass
+
+        return self._md5.hexdigest(), self._hashed_size
+
+
+def save_file_field_calculating_md5(file_field, chunk_size=1024 * 1024):
+    """Saves the new file of file_field (not committed yet) to its storage. Returns (md5, size) of the file,
+    calculated while the storage reads it: the file is read only once"""
+    hashing_file = HashingFile(file_field.file, file_field.name)
+    file_field.save(file_field.name, hashing_file, save=False)
+
+    return hashing_file.md5_and_size(chunk_size)
+
+
+def calculate_md5_and_size_from_file_field(file_field, chunk_size=1024 * 1024):
+    """Returns (md5, size) of the saved file of file_field. It is streamed from the storage"""
+    hash_md5 = hashlib.md5()
+    size = 0
+
+    for chunk in read_file_field_in_chunks(file_field, chunk_size):
+        hash_md5.update(chunk)
+        size += len(chunk)
+
+    return hash_md5.hexdigest(), size
+
 
-    if type(file_field.file.file) == io.BytesIO:
-        file_contents = file_field.file.file.getvalue()
-    else:
-        # This is horrible. It happens when the file is updated
-        # (at least in our flow)
-        file_contents = file_field.file.read()
+def read_file_field_in_chunks(file_field, chunk_size=1024 * 1024):
+    """Yields the contents of file_field in chunks. django-storages downloads S3 files completely
+    (into memory) when they are read: S3 objects are streamed from the bucket instead"""
+    with file_field.storage.open(file_field.name, 'rb') as opened_file:
+        if isinstance(opened_file, S3Boto3StorageFile):
+            # Opening it only reads its metadata
+            yield from opened_file.obj.get()['Body'].iter_chunks(chunk_size)
+        else:
+            yield from opened_file.chunks(chunk_size)
 
-    hash_md5 = hashlib.md5(file_contents)
 
-    # file_field.file.file.seek(initial_position)
+def iterate_in_chunks(queryset, chunk_size=500):
+    """Like queryset.iterator() (it does not keep all the objects in memory) but it keeps the prefetch_related of
+    queryset, which Django ignores when using iterator()"""
+    pks = list(queryset.values_list('pk', flat=True))
 
-    return hash_md5.hexdigest()
+    for start in range(0, len(pks), chunk_size):
+        yield from queryset.filter(pk__in=pks[start:start + chunk_size])
 
 
 def new_person_message() -> str:
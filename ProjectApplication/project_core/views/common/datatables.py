@@ -0,0 +1,148 @@
+import abc
+
+from django.db.models import Q
+from django.http import JsonResponse, HttpResponse
+from django.template.loader import render_to_string
+from django.views import View
+
+
+class DataTableColumn:
+    def __init__(self, order_by=None, search_fields=None):
+        # order_by: list of fields to order by this column (None if it cannot be ordered by)
+        # search_fields: fields where the search is done (icontains)
+        self.order_by = order_by or []
+        self.search_fields = search_fields or []
+
+
+# Bigger numbers are not valid for OFFSET or LIMIT in some databases
+MAX_INTEGER_PARAMETER = 2 ** 31 - 1
+
+
+class InvalidDataTableParameters(ValueError):
+    pass
+
+
+def _non_negative_int(parameters, name, default):
+    value = parameters.get(name, default)
+
+    try:
+        value = int(value)
+    except ValueError:
+        raise InvalidDataTableParameters(f'Invalid {name}')
+
+    if not 0 <= value <= MAX_INTEGER_PARAMETER:
+        raise InvalidDataTableParameters(f'Invalid {name}')
+
+    return value
+
+
+class AbstractDataTable(abc.ABC):
+    """Server-side processing for DataTables (https://datatables.net/manual/server-side): the ordering, search and
+    paging are done in the database and only the rows of the requested page are rendered.
+
+    Subclasses define columns (a DataTableColumn for each column of the table) and row(obj), which returns the HTML
+    of each cell (escaped as needed)"""
+    columns = []
+    default_order = [(0, 'asc')]
+    page_length = 100
+    # Maximum rows of a page: also used for length -1 ("All" in DataTables)
+    max_page_length = 500
+
+    def __init__(self, queryset):
+        self._queryset = queryset
+
+    @abc.abstractmethod
+    def row(self, obj):
+        """ Subclass should implement and return a list with the HTML of each cell of obj """
+
+    @staticmethod
+    def render_cell(template_name, context):
+        return render_to_string(template_name, context).strip()
+
+    def _order(self, parameters):
+        order = []
+        index = 0
+        while f'order[{index}][column]' in parameters:
+            column_index = _non_negative_int(parameters, f'order[{index}][column]', None)
+            direction = parameters.get(f'order[{index}][dir]', 'asc')
+
+            if direction not in ('asc', 'desc'):
+                raise InvalidDataTableParameters(f'Invalid order[{index}][dir]')
+
+            order.append((column_index, direction))
+            index += 1
+
+        return order or self.default_order
+
+    def _search(self, queryset, search):
+        # As DataTables does: each word needs to be found in any column
+        search_fields = [field for column in self.columns for field in column.search_fields]
+
+        for word in search.split():
+            word_filter = Q()
+
+            for field in search_fields:
+                word_filter |= Q(**{f'{field}__icontains': word})
+
+            queryset = queryset.filter(word_filter)
+
+        # Searching in many to many fields can return the same object more than once
+        return queryset.distinct()
+
+    def page(self, parameters):
+        """Returns the response for DataTables. parameters: request.GET of the DataTables request (if it is empty:
+        the first page with the default order). Raises InvalidDataTableParameters if a parameter is not valid"""
+        draw = _non_negative_int(parameters, 'draw', 0)
+        start = _non_negative_int(parameters, 'start', 0)
+
+        if parameters.get('length') == '-1':
+            # "All" in DataTables
+            length = self.max_page_length
+        else:
+            length = min(_non_negative_int(parameters, 'length', self.page_length), self.max_page_length)
+
+        order = self._order(parameters)
+
+        queryset = self._queryset
+
+        records_total = queryset.count()
+        records_filtered = records_total
+
+        search = parameters.get('search[value]', '').strip()
+        if search:
+            queryset = self._search(queryset, search)
+            records_filtered = queryset.count()
+
+        order_by = []
+        for column_index, direction in order:
+            if column_index >= len(self.columns):
+                continue
+
+            prefix = '-' if direction == 'desc' else ''
+            order_by += [f'{prefix}{field}' for field in self.columns[column_index].order_by]
+
+        queryset = queryset.order_by(*order_by, 'pk')[start:start + length]
+
+        result = {}
+        result['draw'] = draw
+        result['recordsTotal'] = records_total
+        result['recordsFiltered'] = records_filtered
+        result['data'] = [self.row(obj) for obj in queryset]
+
+        return result
+
+
+class AbstractDataTableJson(abc.ABC, View):
+    """Returns the JSON for a DataTables table with serverSide: true. Subclasses implement data_table()"""
+
+    @abc.abstractmethod
+    def data_table(self):
+        """ Subclass should implement and return the AbstractDataTable of the table """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            page = self.data_table().page(request.GET)
+        except InvalidDataTableParameters as error:
+            return HttpResponse(status=400, content=str(error))
+
+        return JsonResponse(page)
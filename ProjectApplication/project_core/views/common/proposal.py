@@ -7,7 +7,7 @@ from botocore.exceptions import EndpointConnectionError
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, Http404, HttpResponseBadRequest
 from django.http import HttpResponseForbidden
 from django.shortcuts import render, redirect
 from django.urls import reverse
@@ -18,6 +18,7 @@ from django.views.generic import TemplateView
 from ProjectApplication import settings
 from comments.utils import comments_attachments_forms
 from evaluation.models import CallEvaluation
+from project_core import direct_upload
 from project_core.forms.applicant_role import RoleDescriptionForm
 from project_core.forms.budget import BudgetItemFormSet
 from project_core.forms.datacollection import DataCollectionForm
@@ -27,8 +28,11 @@ from project_core.forms.person import PersonForm
 from project_core.forms.postal_address import PostalAddressForm
 from project_core.forms.project_overarching import ProjectOverarchingForm
 from project_core.forms.proposal import ProposalForm
+from project_core.forms.questions import ProposalAnswers
 from project_core.forms.scientific_clusters import ScientificClustersInlineFormSet
-from project_core.models import Proposal, ProposalQAText, Call, ProposalStatus, ProposalQAFile, CallCareerStage
+from project_core.models import Proposal, Call, ProposalStatus, ProposalQAFile, CallCareerStage, CallQuestion
+from project_core.proposal_detail_cache import get_submitted_proposal_detail
+from project_core.utils.utils import user_is_in_group_name
 from project_core.views.common.proposal_parts import ProposalParts
 from variable_templates.utils import get_template_value_for_call, apply_templates_to_string
 
@@ -47,15 +51,10 @@ SCIENTIFIC_CLUSTERS_FORM_NAME = 'scientific_clusters_form'
 logger = logging.getLogger('comments')
 
 
-def _prepare_answers(call_questions, proposal):
+def _prepare_answers(call_questions, get_answer):
     questions_answers = []
     for call_question in call_questions:
-        try:
-            answer = ProposalQAText.objects.get(proposal=proposal, call_question=call_question)
-        except ObjectDoesNotExist:
-            answer = None
-
-        questions_answers.append(answer)
+        questions_answers.append(get_answer(call_question))
 
     return questions_answers
 
@@ -63,9 +62,11 @@ def _prepare_answers(call_questions, proposal):
 def get_parts_with_answers(proposal):
     parts = []
 
+    answers = ProposalAnswers(proposal)
+
     for part in proposal.call.parts():
-        questions_answers_text = _prepare_answers(part.questions_type_text(), proposal)
-        questions_answers_file = _prepare_answers(part.questions_type_files(), proposal)
+        questions_answers_text = _prepare_answers(part.questions_type_text(), answers.text)
+        questions_answers_file = _prepare_answers(part.questions_type_files(), answers.file)
 
         parts.append({'title': apply_templates_to_string(part.title, proposal.call),
                       'introductory_text': apply_templates_to_string(part.introductory_text, proposal.call),
@@ -98,11 +99,14 @@ class AbstractProposalDetailView(TemplateView):
 
         context['proposal'] = proposal
 
-        context['part_numbers'] = call.get_part_numbers_for_call()
-
-        context['parts_with_answers'] = ProposalParts(request.POST, request.FILES, proposal, call).get_parts()
+        if proposal.status_is_submitted():
+            # The answers cannot change anymore: they are read from the cache
+            context.update(get_submitted_proposal_detail(proposal))
+        else:
+            context['part_numbers'] = call.get_part_numbers_for_call()
+            context['parts_with_answers'] = ProposalParts(request.POST, request.FILES, proposal, call).get_parts()
 
-        if request.user.groups.filter(name='logged').exists():
+        if user_is_in_group_name(request.user, 'logged'):
             href = description = None
 
             if proposal.status_is_draft():
@@ -344,7 +348,8 @@ class AbstractProposalView(TemplateView):
             postal_address_form = PostalAddressForm(request.POST, instance=proposal.postal_address,
                                                     prefix=POSTAL_ADDRESS_FORM_NAME)
 
-            proposal_parts = ProposalParts(request.POST, request.FILES, proposal)
+            proposal_parts = ProposalParts(request.POST, request.FILES, proposal,
+                                           session_key=request.session.session_key)
 
             if call.budget_requested_part():
                 budget_form = BudgetItemFormSet(request.POST, call=call, proposal=proposal, prefix=BUDGET_FORM_NAME)
@@ -383,7 +388,8 @@ class AbstractProposalView(TemplateView):
             proposal_form = ProposalForm(request.POST, call=call, prefix=PROPOSAL_FORM_NAME)
             postal_address_form = PostalAddressForm(request.POST, prefix=POSTAL_ADDRESS_FORM_NAME)
 
-            proposal_parts = ProposalParts(request.POST, request.FILES, proposal=None, call=call)
+            proposal_parts = ProposalParts(request.POST, request.FILES, proposal=None, call=call,
+                                           session_key=request.session.session_key)
 
             person_form = PersonForm(request.POST,
                                      prefix=PERSON_FORM_NAME,
@@ -595,3 +601,41 @@ class ProposalQuestionAnswerFileView(View):
             response = HttpResponse(content='Error: cannot connect to S3', content_type='text/plain')
 
         return response
+
+
+class ProposalQuestionAnswerFileUploadView(View):
+    """Returns the presigned POST used by the browser to upload a file directly to the bucket
+    (see project_core/direct_upload.py)"""
+
+    def post(self, request, *args, **kwargs):
+        if not direct_upload.is_enabled():
+            raise Http404
+
+        # nginx sets X-Real-IP: otherwise REMOTE_ADDR is the address of nginx
+        client_address = request.META.get('HTTP_X_REAL_IP') or request.META.get('REMOTE_ADDR')
+
+        if not direct_upload.presigned_post_is_allowed(client_address):
+            return HttpResponse('Too many files uploaded, please try again later', status=429)
+
+        call_question_id = request.POST.get('call_question', '')
+        file_name = request.POST.get('file_name', '')
+
+        if not call_question_id.isdigit() or not direct_upload.file_name_is_allowed(file_name):
+            return HttpResponseBadRequest('Invalid call question or file name')
+
+        try:
+            call_question = CallQuestion.objects.select_related('call_part__call').get(id=call_question_id,
+                                                                                       answer_type=CallQuestion.FILE)
+        except ObjectDoesNotExist:
+            raise Http404
+
+        if timezone.now() > call_question.call_part.call.submission_deadline and \
+                not request.user.groups.filter(name='management').exists():
+            return HttpResponseForbidden('The submission deadline has now passed')
+
+        if request.session.session_key is None:
+            # The token is only valid in this session
+            request.session.create()
+
+        return JsonResponse(direct_upload.create_presigned_post(call_question, file_name,
+                                                                request.session.session_key))
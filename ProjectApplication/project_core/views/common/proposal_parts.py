@@ -1,8 +1,8 @@
-from project_core.forms.questions import Questions
+from project_core.forms.questions import Questions, ProposalAnswers
 
 
 class ProposalParts:
-    def __init__(self, post, files, proposal, call=None, only_files=False):
+    def __init__(self, post, files, proposal, call=None, only_files=False, session_key=None):
         self._forms = []
         self._parts = []
         self._proposal = proposal
@@ -15,12 +15,17 @@ class ProposalParts:
             # It needs either the proposal or the call to find the questions
             assert False, 'In order to find the questions: pass either the Proposal or the Call'
 
+        # All the answers of the proposal are read once for all the parts
+        answers = ProposalAnswers(proposal)
+
         for part in self._call.parts():
             part.questions_form = Questions(post, files,
                                             proposal=proposal,
                                             call=self._call,
                                             call_part=part,
                                             only_files=only_files,
+                                            answers=answers,
+                                            session_key=session_key,
                                             prefix=ProposalParts._form_prefix(part))
 
             part.questions_answers_text = part.questions_form.questions_answers_text()
@@ -1,33 +1,220 @@
+import collections
+import hashlib
 import logging
+import os
+import re
 import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from django.conf import settings
-from django.http import HttpResponse
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import HttpRequest, HttpResponse
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.views import View
+from storages.backends.s3boto3 import S3Boto3Storage
 
-from project_core.models import Proposal
+from project_core.models import Call, Proposal
+from project_core.proposal_detail_cache import get_submitted_proposal_detail
+from project_core.utils.SpiS3Boto3Storage import SpiS3Boto3Storage
+from project_core.views.external.proposal import ProposalDetailView
 
 logger = logging.getLogger('project_core')
 
+# Increase it when the templates of the proposal detail change: the cached PDFs are then generated again
+PDF_TEMPLATE_VERSION = 1
+
+# Default cache key prefix of the file name of the latest PDF of each proposal
+LATEST_PDF_CACHE_KEY_PREFIX = 'proposal-pdf-cache-latest'
+
+
+class ProposalPdfCache:
+    """PDFs of the submitted proposals. The file name of a PDF contains a fingerprint of the proposal data and
+    PDF_TEMPLATE_VERSION: if any of them changes the PDF is generated again. The fingerprint includes the key of
+    the proposal's entry in proposal_detail_cache: it changes with the data displayed in the proposal that is not
+    in the proposal's rows (people, keywords, questions of the call...)"""
+
+    def __init__(self):
+        if settings.PROPOSAL_PDF_CACHE_STORAGE == 's3':
+            self._storage = SpiS3Boto3Storage(location=f'{settings.AWS_LOCATION}/proposal_pdf_cache')
+        else:
+            self._storage = FileSystemStorage(location=settings.PROPOSAL_PDF_CACHE_DIRECTORY)
+
+    @staticmethod
+    def is_enabled_for(proposal):
+        # Draft proposals change often: it is not worth caching them
+        return settings.PROPOSAL_PDF_CACHE_STORAGE != 'none' and proposal.status_is_submitted()
+
+    @staticmethod
+    def file_name(proposal):
+        fingerprint = hashlib.sha256(str(PDF_TEMPLATE_VERSION).encode('utf-8'))
+        fingerprint.update(get_submitted_proposal_detail(proposal)['proposal_detail_fragments_key'].encode('utf-8'))
+
+        querysets = [Proposal.objects.filter(id=proposal.id),
+                     Call.objects.filter(id=proposal.call_id),
+                     proposal.proposalqatext_set.all(),
+                     proposal.proposalqafile_set.all(),
+                     proposal.proposedbudgetitem_set.all(),
+                     proposal.proposalfundingitem_set.all(),
+                     proposal.proposalpartner_set.all(),
+                     proposal.proposalscientificcluster_set.all()]
+
+        for queryset in querysets:
+            for row in queryset.order_by('id').values_list():
+                fingerprint.update(repr(row).encode('utf-8'))
+
+        return f'proposal-{proposal.id}-{fingerprint.hexdigest()}.pdf'
+
+    @staticmethod
+    def _proposal_prefix(file_name):
+        return file_name.rsplit('-', 1)[0] + '-'
+
+    def get(self, file_name):
+        try:
+            with self._storage.open(file_name, 'rb') as pdf_file:
+                return pdf_file.read()
+        except OSError:
+            # Not generated yet or evicted
+            return None
+
+    def save(self, file_name, pdf):
+        if not self._storage.exists(file_name):
+            self._storage.save(file_name, ContentFile(pdf))
+
+        # The PDF of the previous version of the proposal is deleted. The latest file name of each proposal is
+        # kept in the default cache: the storage is not listed when saving (see evict())
+        latest_key = f'{LATEST_PDF_CACHE_KEY_PREFIX}-{self._proposal_prefix(file_name)}'
+        previous_file_name = cache.get(latest_key)
+        cache.set(latest_key, file_name, None)
+
+        if previous_file_name is not None and previous_file_name != file_name:
+            self._storage.delete(previous_file_name)
+
+    def _list_pdfs(self):
+        # Returns (modified time, size, file name) of the PDFs
+        if isinstance(self._storage, S3Boto3Storage):
+            # One request for each 1000 PDFs instead of two requests for each PDF
+            prefix = f'{self._storage.location}/'
+            return [(s3_object.last_modified, s3_object.size, s3_object.key[len(prefix):])
+                    for s3_object in self._storage.bucket.objects.filter(Prefix=prefix)]
+
+        return [(self._storage.get_modified_time(file_name), self._storage.size(file_name), file_name)
+                for file_name in self._storage.listdir('')[1]]
+
+    def evict(self):
+        """Deletes the PDFs of previous versions of the proposals (if save() did not delete them) and the oldest
+        PDFs if they use more than PROPOSAL_PDF_CACHE_MAX_SIZE. It lists the storage: it is executed by the
+        evictproposalpdfs command. Returns the number of deleted PDFs"""
+        deleted = 0
+
+        pdfs = []
+        proposal_prefixes = set()
+
+        for modified_time, size, file_name in sorted(self._list_pdfs(), reverse=True):
+            proposal_prefix = self._proposal_prefix(file_name)
+
+            if proposal_prefix in proposal_prefixes:
+                # There is a newer PDF of this proposal
+                self._storage.delete(file_name)
+                deleted += 1
+            else:
+                proposal_prefixes.add(proposal_prefix)
+                pdfs.append((modified_time, size, file_name))
+
+        total_size = sum(size for modified_time, size, file_name in pdfs)
+
+        for modified_time, size, file_name in sorted(pdfs):
+            if total_size <= settings.PROPOSAL_PDF_CACHE_MAX_SIZE:
+                break
+
+            self._storage.delete(file_name)
+            total_size -= size
+            deleted += 1
+
+        return deleted
+
+
+def _static_file_path(relative_path):
+    # Local path of a static file: collected in STATIC_ROOT or, if not collected (e.g. development), in the apps
+    path = os.path.join(settings.STATIC_ROOT, relative_path)
+
+    if os.path.isfile(path):
+        return path
+
+    return finders.find(relative_path)
+
+
+def _render_proposal_detail_html(proposal, request):
+    # Renders the page that wkhtmltopdf would download from proposal-detail, for an anonymous user.
+    # Static files are replaced by their local path. Returns the HTML and the directories of the static files
+    proposal_detail_request = HttpRequest()
+    proposal_detail_request.method = 'GET'
+    proposal_detail_request.path = reverse('proposal-detail', kwargs={'uuid': proposal.uuid})
+    proposal_detail_request.META = request.META.copy()
+    proposal_detail_request.user = AnonymousUser()
+
+    proposal_detail_view = ProposalDetailView()
+    context = proposal_detail_view.prepare_context(proposal_detail_request, uuid=proposal.uuid)
+    html = render_to_string(proposal_detail_view.template, context, request=proposal_detail_request)
+
+    static_directories = set()
+
+    def local_static_file(match):
+        path = _static_file_path(match.group('path').lstrip('/'))
+
+        if path is None:
+            return match.group(0)
+
+        static_directories.add(os.path.dirname(path))
+        return f'{match.group("attribute")}="file://{path}"'
+
+    static_url = re.escape(settings.STATIC_URL)
+    html = re.sub(f'(?P<attribute>src|href)="{static_url}(?P<path>[^"?#]*)[^"]*"', local_static_file, html)
+
+    return html, sorted(static_directories)
+
+
+def _wkhtmltopdf_input(proposal, request):
+    # Returns the source argument for wkhtmltopdf and the HTML for its standard input (None if wkhtmltopdf
+    # downloads the proposal). It uses the database: it needs to be called in the request thread
+    if settings.PROPOSAL_PDF_RENDERING == 'in_process':
+        html, static_directories = _render_proposal_detail_html(proposal, request)
+
+        arguments = []
+        for static_directory in static_directories:
+            arguments += ['--allow', static_directory]
+
+        return arguments + ['-'], html.encode('utf-8')
 
-def create_pdf_for_proposal(proposal, request):
     url = reverse('proposal-detail', kwargs={'uuid': proposal.uuid})
     url = request.build_absolute_uri(url)
 
     if url.startswith('http://testserver/'):
         url = url.replace('http://testserver/', 'http://localhost:9998/', 1)
 
-    command = ['wkhtmltopdf', '--quiet']
+    arguments = []
 
     if settings.SELF_HTTP_USERNAME:
-        command += ['--username', settings.SELF_HTTP_USERNAME, '--password', settings.SELF_HTTP_PASSWORD]
+        arguments += ['--username', settings.SELF_HTTP_USERNAME, '--password', settings.SELF_HTTP_PASSWORD]
+
+    return arguments + [url], None
+
+
+def _run_wkhtmltopdf(proposal, wkhtmltopdf_input):
+    source_arguments, html = wkhtmltopdf_input
 
-    command += [url, '-']
+    command = ['wkhtmltopdf', '--quiet'] + source_arguments + ['-']
 
+    # If it takes longer than PROPOSAL_PDF_TIMEOUT wkhtmltopdf is killed and subprocess.TimeoutExpired is raised
     process = subprocess.run(command,
+                             input=html,
                              stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE)
+                             stderr=subprocess.PIPE,
+                             timeout=settings.PROPOSAL_PDF_TIMEOUT)
 
     if process.returncode != 0:
         logger.warning(f'NOTIFY: PDF generation warning for {proposal.pk}: {process.stderr}')
@@ -35,11 +222,90 @@ def create_pdf_for_proposal(proposal, request):
     return process.stdout
 
 
+def create_pdf_for_proposal(proposal, request):
+    return _run_wkhtmltopdf(proposal, _wkhtmltopdf_input(proposal, request))
+
+
+def _create_and_cache_pdf_for_proposal(proposal, wkhtmltopdf_input, pdf_cache, file_name):
+    proposal_pdf = _run_wkhtmltopdf(proposal, wkhtmltopdf_input)
+
+    if proposal_pdf:
+        try:
+            pdf_cache.save(file_name, proposal_pdf)
+        except OSError as error:
+            logger.warning(f'NOTIFY: PDF of proposal {proposal.pk} could not be cached: {error}')
+
+    return proposal_pdf
+
+
+def get_pdf_for_proposal(proposal, request):
+    """Returns the PDF of the proposal: from ProposalPdfCache if it was already generated"""
+    if not ProposalPdfCache.is_enabled_for(proposal):
+        return create_pdf_for_proposal(proposal, request)
+
+    pdf_cache = ProposalPdfCache()
+    file_name = pdf_cache.file_name(proposal)
+
+    proposal_pdf = pdf_cache.get(file_name)
+
+    if proposal_pdf is None:
+        proposal_pdf = _create_and_cache_pdf_for_proposal(proposal, _wkhtmltopdf_input(proposal, request),
+                                                          pdf_cache, file_name)
+
+    return proposal_pdf
+
+
+def _submit_pdf_for_proposal(proposal, request, executor):
+    # The cache is looked up and the HTML rendered in this thread (they use the database); only wkhtmltopdf is
+    # executed in the executor
+    if not ProposalPdfCache.is_enabled_for(proposal):
+        return executor.submit(_run_wkhtmltopdf, proposal, _wkhtmltopdf_input(proposal, request))
+
+    pdf_cache = ProposalPdfCache()
+    file_name = pdf_cache.file_name(proposal)
+
+    proposal_pdf = pdf_cache.get(file_name)
+
+    if proposal_pdf is None:
+        return executor.submit(_create_and_cache_pdf_for_proposal, proposal, _wkhtmltopdf_input(proposal, request),
+                               pdf_cache, file_name)
+
+    future = Future()
+    future.set_result(proposal_pdf)
+
+    return future
+
+
+def create_pdfs_for_proposals(proposals, request):
+    """Yields (proposal, future) for each proposal, in order. The PDFs are generated in a pool of
+    settings.PROPOSAL_PDF_CONCURRENCY threads: while the PDF of a proposal is being used the next ones are
+    being generated (or read from ProposalPdfCache). future.result() returns the PDF or raises
+    subprocess.TimeoutExpired"""
+    proposals = iter(proposals)
+    pending = collections.deque()
+
+    with ThreadPoolExecutor(max_workers=settings.PROPOSAL_PDF_CONCURRENCY) as executor:
+        while True:
+            # Keeps at most PROPOSAL_PDF_CONCURRENCY PDFs generated or being generated in memory
+            while len(pending) < settings.PROPOSAL_PDF_CONCURRENCY:
+                proposal = next(proposals, None)
+
+                if proposal is None:
+                    break
+
+                pending.append((proposal, _submit_pdf_for_proposal(proposal, request, executor)))
+
+            if not pending:
+                return
+
+            yield pending.popleft()
+
+
 class ProposalDetailViewPdf(View):
     def get(self, request, *args, **kwargs):
         proposal = Proposal.objects.get(uuid=kwargs['uuid'])
 
-        proposal_pdf = create_pdf_for_proposal(proposal, request)
+        proposal_pdf = get_pdf_for_proposal(proposal, request)
 
         response = HttpResponse(content_type='application/pdf')
 
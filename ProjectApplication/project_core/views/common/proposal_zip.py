@@ -1,44 +1,111 @@
 import io
+import logging
 import os
+import subprocess
 import zipfile
 
+from botocore.exceptions import ClientError
+from django.conf import settings
 from django.http import HttpResponse
 from django.views import View
 
 from project_core.models import Proposal
-from project_core.views.common.proposal_pdf import create_pdf_for_proposal
+from project_core.utils.utils import read_file_field_in_chunks
+from project_core.views.common.proposal_pdf import get_pdf_for_proposal
 
+logger = logging.getLogger('project_core')
 
-def add_proposal_to_zip(proposal, zip_archive, request, used_directory_names=None):
-    # Returns the directory name used for this proposal
-    proposal_directory = initial_directory = proposal.file_name()
+# Files are copied from the object storage into the ZIP files in chunks of this size
+ZIP_CHUNK_SIZE = 1024 * 1024
 
-    if used_directory_names is None:
-        used_directory_names = []
+
+def proposal_directory_name(proposal, used_directory_names):
+    proposal_directory = initial_directory = proposal.file_name()
 
     count = 2
     while proposal_directory in used_directory_names:
         proposal_directory = f'{initial_directory}-{count}'
         count += 1
 
+    return proposal_directory
+
+
+def write_proposal_to_zip(proposal, zip_archive, proposal_directory, request, proposal_pdf_future=None):
+    """Writes the PDF and the files of the proposal into zip_archive. It is a generator: it yields after writing
+    each chunk so the written bytes can be sent before continuing (see CreateZipFile).
+    proposal_pdf_future: the PDF might be already being generated (see create_pdfs_for_proposals)"""
     proposal_filename = f'Proposal-{proposal.file_name()}.pdf'
 
-    with zip_archive.open(os.path.join(proposal_directory, proposal_filename), mode='w') as pdf_proposal:
-        proposal_pdf_content = create_pdf_for_proposal(proposal, request)
+    try:
+        if proposal_pdf_future is None:
+            proposal_pdf_content = get_pdf_for_proposal(proposal, request)
+        else:
+            proposal_pdf_content = proposal_pdf_future.result()
+    except subprocess.TimeoutExpired:
+        logger.warning(f'NOTIFY: PDF generation timed out for {proposal.pk}')
+        proposal_pdf_content = None
+        pdf_error = f'it took longer than {settings.PROPOSAL_PDF_TIMEOUT} seconds'
+    except Exception as error:
+        # E.g. wkhtmltopdf not found: the other proposals are still added to the ZIP file
+        logger.warning(f'NOTIFY: PDF generation failed for {proposal.pk}: {error!r}')
+        proposal_pdf_content = None
+        pdf_error = 'unexpected error'
+    else:
+        # wkhtmltopdf exited with an error without producing the PDF
+        pdf_error = 'the generated PDF is empty'
+
+    if not proposal_pdf_content:
+        proposal_pdf_content = f'ERROR generating the PDF of the proposal: {pdf_error}. ' \
+                               f'Proposal id: {proposal.id}'.encode('utf-8')
+        proposal_filename = proposal_filename + '.txt'
 
+    with zip_archive.open(os.path.join(proposal_directory, proposal_filename), mode='w') as pdf_proposal:
         pdf_proposal.write(proposal_pdf_content)
 
+    yield
+
     for answer_file in proposal.proposalqafile_set.all():
         filename = answer_file.file_name()
+        read_error = f'ERROR reading file from SPI object storage. File id: {answer_file.id} ' \
+                     f'file name: {answer_file.file.name} file_md5: {answer_file.md5}'.encode('utf-8')
+
+        file_chunks = read_file_field_in_chunks(answer_file.file, ZIP_CHUNK_SIZE)
         try:
-            file_contents = answer_file.file.read()
-        except OSError:
-            file_contents = f'ERROR reading file from SPI object storage. File id: {answer_file.id} ' \
-                            f'file name: {answer_file.file.name} file_md5: {answer_file.md5}'.encode('utf-8')
+            first_chunk = next(file_chunks, b'')
+        except (OSError, ClientError):
+            file_chunks = iter([])
+            first_chunk = read_error
             filename = filename + '.txt'
 
         with zip_archive.open(os.path.join(proposal_directory, filename), mode='w') as file_pointer:
-            file_pointer.write(file_contents)
+            file_pointer.write(first_chunk)
+            yield
+
+            try:
+                for chunk in file_chunks:
+                    file_pointer.write(chunk)
+                    yield
+            except (OSError, ClientError) as error:
+                # The entry is closed with the bytes read so far (the ZIP file stays valid) and the error is
+                # written next to it
+                logger.warning(f'NOTIFY: Error reading file {answer_file.id} for the ZIP file: {error!r}')
+            else:
+                continue
+
+        with zip_archive.open(os.path.join(proposal_directory, filename + '.txt'), mode='w') as file_pointer:
+            file_pointer.write(read_error)
+            yield
+
+
+def add_proposal_to_zip(proposal, zip_archive, request, used_directory_names=None, proposal_pdf_future=None):
+    # Returns the directory name used for this proposal
+    if used_directory_names is None:
+        used_directory_names = []
+
+    proposal_directory = proposal_directory_name(proposal, used_directory_names)
+
+    for _ in write_proposal_to_zip(proposal, zip_archive, proposal_directory, request, proposal_pdf_future):
+        pass
 
     return proposal_directory
 
@@ -1,12 +1,11 @@
 import textwrap
 
-from django.conf import settings
-from django.core.mail import send_mail
 from django.urls import reverse
 from django.utils import timezone
 from django.views.generic import TemplateView
 
-from project_core.models import Proposal
+from project_core.email_queue import queue_email, proposal_email_is_queued
+from project_core.models import Proposal, OutgoingEmail
 from project_core.views.common.proposal import AbstractProposalDetailView, AbstractProposalView
 
 
@@ -21,7 +20,9 @@ def send_email_proposal_received(uuid, display_url, update_url):
             Please note that this email is sent from an unmonitored email address.
             ''')
 
-        if proposal.status_is_draft() and not proposal.draft_saved_mail_sent:
+        # The flags are set when the emails have been sent (OutgoingEmail.mark_sent)
+        if proposal.status_is_draft() and not proposal.draft_saved_mail_sent and \
+                not proposal_email_is_queued(proposal, OutgoingEmail.PROPOSAL_DRAFT_SAVED):
             call_deadline = timezone.localtime(proposal.call.submission_deadline).strftime(
                 '%A %d %B %Y at %H:%M Swiss time')
 
@@ -38,11 +39,10 @@ def send_email_proposal_received(uuid, display_url, update_url):
 
             body += footer
 
-            send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, recipient_list)
-            proposal.draft_saved_mail_sent = True
-            proposal.save()
+            queue_email(subject, body, recipient_list, proposal, OutgoingEmail.PROPOSAL_DRAFT_SAVED)
 
-        if proposal.status_is_submitted() and not proposal.submitted_mail_sent:
+        if proposal.status_is_submitted() and not proposal.submitted_mail_sent and \
+                not proposal_email_is_queued(proposal, OutgoingEmail.PROPOSAL_SUBMITTED):
             subject = 'Swiss Polar Institute - Proposal submitted'
             body = textwrap.dedent(f'''\
                 Thank you for submitting your proposal: "{proposal.title}" for the call {proposal.call.long_name}.
@@ -53,9 +53,7 @@ def send_email_proposal_received(uuid, display_url, update_url):
 
             body += footer
 
-            send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, recipient_list)
-            proposal.submitted_mail_sent = True
-            proposal.save()
+            queue_email(subject, body, recipient_list, proposal, OutgoingEmail.PROPOSAL_SUBMITTED)
 
 
 class ProposalThankYouView(TemplateView):
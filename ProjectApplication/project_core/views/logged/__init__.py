@@ -11,3 +11,4 @@ from . import homepage
 from . import call_part
 from . import call_question
 from . import call_part_file
+from . import performance
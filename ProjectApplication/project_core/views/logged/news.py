@@ -44,45 +44,53 @@ def get_project_news():
 
     news = []
 
-    for project in Project.objects.filter(start_date__gte=starts).filter(status=Project.ONGOING):
+    # create_news_project() uses the principal investigator of the projects
+    projects = Project.objects.filter(status=Project.ONGOING).select_related('principal_investigator__person')
+    project_fields = ['project__principal_investigator__person']
+
+    for project in projects.filter(start_date__gte=starts):
         news.append(
             create_news_project(project.start_date, f'Project starts',
                                 project)
         )
 
-    for project in Project.objects.filter(end_date__gte=starts).filter(status=Project.ONGOING):
+    for project in projects.filter(end_date__gte=starts):
         news.append(
             create_news_project(project.end_date, f'Project ends', project)
         )
 
-    for invoice in Invoice.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING):
+    for invoice in Invoice.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING). \
+            select_related(*project_fields):
         news.append(
             create_news_project(invoice.due_date, f'Invoice due', invoice.project)
         )
 
     for financial_report in FinancialReport.objects.filter(due_date__gte=starts).filter(
-            project__status=Project.ONGOING):
+            project__status=Project.ONGOING).select_related(*project_fields):
         news.append(
             create_news_project(financial_report.due_date, f'Financial report due', financial_report.project)
         )
 
     for scientific_report in ScientificReport.objects.filter(due_date__gte=starts).filter(
-            project__status=Project.ONGOING):
+            project__status=Project.ONGOING).select_related(*project_fields):
         news.append(
             create_news_project(scientific_report.due_date, f'Financial report due', scientific_report.project)
         )
 
-    for lay_summary in LaySummary.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING):
+    for lay_summary in LaySummary.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING). \
+            select_related(*project_fields):
         news.append(
             create_news_project(lay_summary.due_date, f'Lay summary due', lay_summary.project)
         )
 
-    for blog_post in BlogPost.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING):
+    for blog_post in BlogPost.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING). \
+            select_related(*project_fields):
         news.append(
             create_news_project(blog_post.due_date, f'Blog post due', blog_post.project)
         )
 
-    for milestone in Milestone.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING):
+    for milestone in Milestone.objects.filter(due_date__gte=starts).filter(project__status=Project.ONGOING). \
+            select_related('category', *project_fields):
         if milestone.text:
             milestone_explanation = f' - {milestone.text}'
         else:
@@ -125,7 +133,7 @@ def get_call_news():
             create_news(call_close.submission_deadline,
                         f'Call closing: <a href="{url}">{call_close.short_name}</a>'))
 
-    for call_evaluation in CallEvaluation.objects.filter(panel_date__gte=starts):
+    for call_evaluation in CallEvaluation.objects.filter(panel_date__gte=starts).select_related('call'):
         url = reverse('logged-call-evaluation-detail', kwargs={'pk': call_evaluation.id})
 
         news.append(
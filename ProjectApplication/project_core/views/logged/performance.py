@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.views.generic import TemplateView
+
+from project_core.middleware.performance import performance_statistics
+
+
+class PerformanceStatisticsView(TemplateView):
+    template_name = 'logged/performance.tmpl'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        context['performance_monitoring'] = settings.PERFORMANCE_MONITORING
+        context['slow_request_seconds'] = settings.PERFORMANCE_MONITORING_SLOW_REQUEST_SECONDS
+        context['samples'] = settings.PERFORMANCE_MONITORING_SAMPLES
+        context['statistics'] = performance_statistics.summary()
+
+        context.update({'active_section': 'lists',
+                        'active_subsection': 'performance',
+                        'sidebar_template': 'logged/_sidebar-lists.tmpl'})
+
+        context['breadcrumb'] = [{'name': 'Lists', 'url': reverse('logged-lists')}, {'name': 'Performance'}]
+
+        return context
+
+    def post(self, request, *args, **kwargs):
+        performance_statistics.reset()
+
+        return redirect(reverse('logged-performance'))
@@ -1,21 +1,59 @@
 from django.contrib.messages.views import SuccessMessageMixin
+from django.db.models import Prefetch
 from django.urls import reverse
-from django.views.generic import UpdateView, CreateView, DetailView, ListView
+from django.utils.html import escape, format_html
+from django.views.generic import UpdateView, CreateView, DetailView, TemplateView
 
 from project_core.forms.contacts import ContactForm
-from project_core.models import PersonPosition
-
-
-class PersonPositionListView(ListView):
+from project_core.models import PersonPosition, Contact
+from project_core.views.common.datatables import AbstractDataTable, AbstractDataTableJson, DataTableColumn
+
+
+class PersonPositionDataTable(AbstractDataTable):
+    columns = [DataTableColumn(order_by=['person__first_name'], search_fields=['person__first_name']),
+               DataTableColumn(order_by=['person__surname'], search_fields=['person__surname']),
+               DataTableColumn(search_fields=['contact__entry']),
+               DataTableColumn(search_fields=['organisation_names__name',
+                                              'organisation_names__organisation__long_name',
+                                              'organisation_names__organisation__display_name']),
+               DataTableColumn(order_by=['group'], search_fields=['group']),
+               DataTableColumn(order_by=['privacy_policy']),
+               DataTableColumn(order_by=['contact_newsletter']),
+               DataTableColumn()]
+
+    def __init__(self):
+        emails = Contact.objects.filter(method=Contact.EMAIL).order_by('created_on')
+
+        super().__init__(PersonPosition.objects.
+                         filter(privacy_policy=True).
+                         select_related('person').
+                         prefetch_related(Prefetch('contact_set', queryset=emails, to_attr='emails'),
+                                          'organisation_names__organisation'))
+
+    def row(self, person_position):
+        # Same as person_position.main_email() but using the prefetched emails
+        main_email = person_position.emails[0].entry if person_position.emails else None
+
+        return [escape(person_position.person.first_name),
+                escape(person_position.person.surname),
+                self.render_cell('common/_email_link_or_dash.tmpl', {'email': main_email}),
+                escape(person_position.organisations_display_names()),
+                self.render_cell('common/_value-or-dash.tmpl', {'value': person_position.group}),
+                self.render_cell('common/_check-icon.tmpl', {'value': person_position.privacy_policy}),
+                self.render_cell('common/_check-icon.tmpl', {'value': person_position.contact_newsletter}),
+                format_html('<a class="btn btn-primary btn-xs" href="{}">View</a>',
+                            reverse('logged-person-position-detail', kwargs={'pk': person_position.id}))
+                ]
+
+
+class PersonPositionListView(TemplateView):
     template_name = 'logged/contact-list.tmpl'
-    context_object_name = 'contacts'
-    model = PersonPosition
-    queryset = PersonPosition.objects.filter(privacy_policy=True)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context['contacts'] = PersonPosition.objects.filter(privacy_policy=True)
+        # Only the first page is rendered here: DataTables requests the rest from PersonPositionListJson
+        context['contacts_table'] = PersonPositionDataTable().page({})
 
         context.update({'active_section': 'lists',
                         'active_subsection': 'contact-list',
@@ -26,6 +64,11 @@ class PersonPositionListView(ListView):
         return context
 
 
+class PersonPositionListJson(AbstractDataTableJson):
+    def data_table(self):
+        return PersonPositionDataTable()
+
+
 class PersonPositionUpdateView(UpdateView):
     template_name = 'logged/contact-form.tmpl'
     model = PersonPosition
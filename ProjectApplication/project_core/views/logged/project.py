@@ -1,24 +1,53 @@
 from django.urls import reverse
-from django.views.generic import DetailView, ListView
+from django.utils.html import escape, format_html
+from django.views.generic import DetailView, TemplateView
 from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.response import Response
 
 from comments import utils
 from comments.utils import process_comment_attachment
+from project_core import api_cache
 from project_core.filters import ProjectFilterSet
 from project_core.models import Project, GeographicalArea, FundingInstrument
 from project_core.serializers import (
     ProjectSerializer, ProjectDetailSerializer, GeographicalAreaSerializer, FundingInstrumentSerializer
 )
-
-
-class ProjectList(ListView):
+from project_core.views.common.datatables import AbstractDataTable, AbstractDataTableJson, DataTableColumn
+
+
+class ProjectDataTable(AbstractDataTable):
+    columns = [DataTableColumn(order_by=['key'], search_fields=['key']),
+               DataTableColumn(order_by=['title'], search_fields=['title']),
+               DataTableColumn(order_by=['principal_investigator__person__first_name',
+                                         'principal_investigator__person__surname'],
+                               search_fields=['principal_investigator__person__first_name',
+                                              'principal_investigator__person__surname']),
+               DataTableColumn(order_by=['status'], search_fields=['status']),
+               DataTableColumn()]
+
+    def __init__(self, queryset, detail_url_name):
+        super().__init__(queryset.select_related('principal_investigator__person'))
+        self._detail_url_name = detail_url_name
+
+    def row(self, project):
+        return [escape(project.key),
+                escape(project.title),
+                escape(project.principal_investigator.person),
+                self.render_cell('grant_management/_project_status_badge.tmpl', {'status': project.status}),
+                format_html('<a class="btn btn-primary btn-xs" href="{}">View</a>',
+                            reverse(self._detail_url_name, kwargs={'pk': project.id}))
+                ]
+
+
+class ProjectList(TemplateView):
     template_name = 'logged/project-list.tmpl'
-    context_object_name = 'projects'
-    model = Project
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
+        # Only the first page is rendered here: DataTables requests the rest from ProjectListJson
+        context['projects_table'] = ProjectDataTable(Project.objects.all(), 'logged-project-detail').page({})
+
         context.update({'active_section': 'lists',
                         'active_subsection': 'project-list',
                         'sidebar_template': 'logged/_sidebar-lists.tmpl'})
@@ -29,15 +58,32 @@ class ProjectList(ListView):
         return context
 
 
-class ProjectListAPI(ListAPIView):
-    queryset = Project.objects.exclude(status=Project.ABORTED).exclude(on_website=False)
+class ProjectListJson(AbstractDataTableJson):
+    def data_table(self):
+        return ProjectDataTable(Project.objects.all(), 'logged-project-detail')
+
+
+class CachedResponseAPIMixin:
+    """The data of the responses is cached for each URL and query parameters (see project_core/api_cache.py)"""
+
+    def get(self, request, *args, **kwargs):
+        # Errors (e.g. 404) are raised: they are not cached
+        data = api_cache.get_response_data(request,
+                                           lambda: super(CachedResponseAPIMixin, self).get(request, *args,
+                                                                                           **kwargs).data)
+        return Response(data)
+
+
+class ProjectListAPI(CachedResponseAPIMixin, ListAPIView):
+    queryset = ProjectSerializer.setup_eager_loading(
+        Project.objects.exclude(status=Project.ABORTED).exclude(on_website=False))
     serializer_class = ProjectSerializer
     filterset_class = ProjectFilterSet
     ordering_fields = ('start_date',)
 
 
-class ProjectDetailAPI(RetrieveAPIView):
-    queryset = Project.objects.all()
+class ProjectDetailAPI(CachedResponseAPIMixin, RetrieveAPIView):
+    queryset = ProjectDetailSerializer.setup_eager_loading(Project.objects.all())
     serializer_class = ProjectDetailSerializer
     lookup_field = 'uuid'
 
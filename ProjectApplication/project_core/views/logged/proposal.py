@@ -4,7 +4,8 @@ from django.contrib import messages
 from django.shortcuts import render, redirect
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
-from django.views.generic import ListView, TemplateView
+from django.utils.html import escape, format_html
+from django.views.generic import TemplateView
 
 from ProjectApplication import settings
 from comments.utils import process_comment_attachment
@@ -12,6 +13,7 @@ from evaluation.forms.eligibility import EligibilityDecisionForm
 from evaluation.models import Reviewer, CallEvaluation
 from project_core.models import Proposal, Call
 from project_core.utils.utils import user_is_in_group_name
+from project_core.views.common.datatables import AbstractDataTable, AbstractDataTableJson, DataTableColumn
 from project_core.views.common.proposal import AbstractProposalDetailView, AbstractProposalView
 from project_core.views.common.proposal_parts import ProposalParts
 
@@ -33,14 +35,51 @@ def create_file_name(name_specification, call_id):
     return filename
 
 
-class ProposalList(ListView):
+def proposals_for_user(user):
+    proposals = Proposal.objects.all()
+
+    if user_is_in_group_name(user, settings.MANAGEMENT_GROUP_NAME):
+        return proposals
+    elif user_is_in_group_name(user, settings.REVIEWER_GROUP_NAME):
+        return Reviewer.filter_proposals(proposals, user)
+    else:
+        assert False
+
+
+class ProposalDataTable(AbstractDataTable):
+    columns = [DataTableColumn(order_by=['call__long_name'], search_fields=['call__long_name']),
+               DataTableColumn(order_by=['title'], search_fields=['title']),
+               DataTableColumn(order_by=['applicant__person__first_name', 'applicant__person__surname'],
+                               search_fields=['applicant__person__first_name', 'applicant__person__surname']),
+               DataTableColumn(order_by=['proposal_status__name'], search_fields=['proposal_status__name']),
+               DataTableColumn(order_by=['eligibility']),
+               DataTableColumn()]
+    default_order = [(0, 'asc'), (1, 'asc')]
+
+    def __init__(self, queryset):
+        super().__init__(queryset.select_related('call', 'applicant__person', 'proposal_status'))
+
+    def row(self, proposal):
+        return [escape(proposal.call.long_name),
+                escape(proposal.title),
+                escape(proposal.applicant.person),
+                self.render_cell('logged/_proposal_status_badge.tmpl',
+                                 {'status_name': proposal.proposal_status.name}),
+                self.render_cell('common/_eligiblecheck.tmpl', {'eligibility': proposal.eligibility}),
+                format_html('<a class="btn btn-primary btn-xs" href="{}">View</a>',
+                            reverse('logged-proposal-detail', kwargs={'pk': proposal.id}))
+                ]
+
+
+class ProposalList(TemplateView):
     template_name = 'logged/proposal-list.tmpl'
-    model = Proposal
-    context_object_name = 'proposals'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
+        # Only the first page is rendered here: DataTables requests the rest from ProposalListJson
+        context['proposals_table'] = ProposalDataTable(proposals_for_user(self.request.user)).page({})
+
         if user_is_in_group_name(self.request.user, settings.REVIEWER_GROUP_NAME):
             if hasattr(self.request.user, 'reviewer'):
                 context['reviewer'] = self.request.user.reviewer.person
@@ -67,15 +106,10 @@ class ProposalList(ListView):
 
         return context
 
-    def get_queryset(self):
-        proposals = Proposal.objects.all()
 
-        if user_is_in_group_name(self.request.user, settings.MANAGEMENT_GROUP_NAME):
-            return proposals
-        elif user_is_in_group_name(self.request.user, settings.REVIEWER_GROUP_NAME):
-            return Reviewer.filter_proposals(proposals, self.request.user)
-        else:
-            assert False
+class ProposalListJson(AbstractDataTableJson):
+    def data_table(self):
+        return ProposalDataTable(proposals_for_user(self.request.user))
 
 
 class ProposalCommentAdd(AbstractProposalDetailView):
@@ -226,7 +260,8 @@ class ProposalUpdateFiles(TemplateView):
 
             return redirect(reverse('logged-proposal-detail', kwargs={'pk': proposal.id}))
 
-        parts_with_answers = ProposalParts(request.POST, request.FILES, proposal, only_files=True)
+        parts_with_answers = ProposalParts(request.POST, request.FILES, proposal, only_files=True,
+                                           session_key=request.session.session_key)
 
         all_valid = True
 
@@ -1,45 +1,44 @@
 import codecs
 import csv
 
-from django.http import HttpResponse
+from django.db.models import Prefetch, Sum
+from django.http import StreamingHttpResponse
 from django.views import View
 
 from evaluation.models import Reviewer
-from project_core.models import Proposal
+from project_core.models import Proposal, OrganisationName
+from project_core.utils.utils import iterate_in_chunks
 from project_core.views.logged.proposal import create_file_name
 
 
-class ProposalsExportCsvSummary(View):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+class Echo:
+    """csv.writer writes into it: the written row is returned instead of being kept"""
 
-    def get(self, request, *args, **kwargs):
-        call_id = kwargs.get('call', None)
-        response = HttpResponse(content_type='text/csv')
+    def write(self, value):
+        return value
 
-        filename = create_file_name('proposals-summary-{}-{}.csv', call_id)
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        response.write(codecs.BOM_UTF8)
-        writer = csv.writer(response)
-
-        headers = ['Academic Title', 'First Name', 'Surname', 'Institutions', 'Proposal Title', 'Keywords',
-                   'Requested Amount (CHF)', 'Geographic Focus']
 
-        proposals = Proposal.objects.all()
+class ProposalsExportCsvSummary(View):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
 
-        if call_id is not None:
-            # We are filtering by a specific Call: we are exporting proposals for only call_id
-            proposals = proposals.filter(call_id=call_id)
-        else:
-            # We are adding the Call Name: we are exporting proposals for all the calls
-            headers = ['Call Name'] + headers
+    @staticmethod
+    def _proposals_with_related_data(proposals):
+        """Everything written for each proposal is fetched with a fixed number of queries (per chunk)"""
+        return proposals.select_related('call', 'applicant__academic_title', 'applicant__person'). \
+            prefetch_related(Prefetch('applicant__organisation_names',
+                                      queryset=OrganisationName.objects.select_related('organisation')),
+                             'keywords', 'geographical_areas'). \
+            annotate(budget_items_total=Sum('proposedbudgetitem__amount'))
 
-        proposals = Reviewer.filter_proposals(proposals, self.request.user)
+    @staticmethod
+    def _rows(proposals, headers, call_id):
+        writer = csv.writer(Echo())
 
-        writer.writerow(headers)
+        yield codecs.BOM_UTF8
+        yield writer.writerow(headers)
 
-        for proposal in proposals.order_by('id'):
+        for proposal in iterate_in_chunks(proposals):
             academic_title = proposal.applicant.academic_title
             first_name = proposal.applicant.person.first_name
             surname = proposal.applicant.person.surname
@@ -58,6 +57,30 @@ class ProposalsExportCsvSummary(View):
                 # We are adding the Call name: we are exporting proposals for different calls
                 row = [proposal.call.long_name] + row
 
-            writer.writerow(row)
+            yield writer.writerow(row)
+
+    def get(self, request, *args, **kwargs):
+        call_id = kwargs.get('call', None)
+
+        filename = create_file_name('proposals-summary-{}-{}.csv', call_id)
+
+        headers = ['Academic Title', 'First Name', 'Surname', 'Institutions', 'Proposal Title', 'Keywords',
+                   'Requested Amount (CHF)', 'Geographic Focus']
+
+        proposals = Proposal.objects.all()
+
+        if call_id is not None:
+            # We are filtering by a specific Call: we are exporting proposals for only call_id
+            proposals = proposals.filter(call_id=call_id)
+        else:
+            # We are adding the Call Name: we are exporting proposals for all the calls
+            headers = ['Call Name'] + headers
+
+        proposals = Reviewer.filter_proposals(proposals, self.request.user)
+        proposals = self._proposals_with_related_data(proposals.order_by('id'))
+
+        # The rows are generated while the response is sent: the proposals are read in chunks
+        response = StreamingHttpResponse(self._rows(proposals, headers, call_id), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
         return response
@@ -1,9 +1,10 @@
-import io
+import tempfile
 import textwrap
 
 import xlsxwriter
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
+from django.db.models import Sum
+from django.http import FileResponse
 from django.urls import reverse
 from django.utils import timezone
 from django.views import View
@@ -81,53 +82,74 @@ class ProposalsExportExcel(View):
         self._bold = self._workbook.add_format(bold_properties)
         self._small_italics = self._workbook.add_format(small_italics_properties)
 
+    def _proposal_columns(self):
+        # (header, header format, column width) of the proposal columns before the ones filled in by the reviewers
+        return [('Proposal Number', self._white_header_format, 15),
+                ('Applicant title', self._grey_header_format, 10),
+                ('Applicant name', self._grey_header_format, 20),
+                ('Institution', self._grey_header_format, 15),
+                ('Title of the project', self._green_header_format, 25),
+                ('Geographic focus', self._green_header_format, 25),
+                ('Keywords', self._green_header_format, 30),
+                ('Budget requested', self._white_header_format, 10),
+                ]
+
+    def _reviewer_columns(self, total_number_criteria):
+        # (header, header format, column width) of the columns filled in by the reviewers
+        score_column_width = 12
+
+        columns = []
+        for criterion_n in range(1, total_number_criteria + 1):
+            columns.append((f'Criterion {criterion_n}: score', self._yellow_header_format, score_column_width))
+            columns.append((f'Criterion {criterion_n}: remarks', self._yellow_header_format, 35))
+
+        columns.append((f'Total score criteria 1-{total_number_criteria}', self._yellow_header_format,
+                        score_column_width))
+        columns.append(('Budget proposed by reviewer', self._blue_header_format, score_column_width))
+        columns.append(('Budget remarks', self._blue_header_format, 30))
+        columns.append(('Optional additional remarks to the panel', self._orange_header_format, 50))
+
+        return columns
+
+    def _set_columns_width(self, total_number_criteria):
+        for column, (header, header_format, width) in enumerate(
+                self._proposal_columns() + self._reviewer_columns(total_number_criteria)):
+            self._worksheet.set_column(column, column, width)
+
+    @staticmethod
+    def _proposals_with_related_data(proposals):
+        """Fetches everything written for each proposal using a fixed number of queries"""
+        return proposals.select_related('call', 'applicant__academic_title', 'applicant__person'). \
+            prefetch_related('applicant__organisation_names', 'geographical_areas', 'keywords'). \
+            annotate(budget_items_total=Sum('proposedbudgetitem__amount'))
+
     def _write_call(self, proposal, row, total_number_criteria):
+        # In constant_memory mode the rows need to be written in order: first the headers, then the data
         self._worksheet.set_row(row, 50)
+
+        columns = self._proposal_columns() + self._reviewer_columns(total_number_criteria)
+        for column, (header, header_format, width) in enumerate(columns):
+            self._worksheet.write(row, column, header, header_format)
+
         self._worksheet.set_row(row + 1, 100)
-        column = 0
+
         url = self.request.build_absolute_uri(reverse('logged-proposal-detail', kwargs={'pk': proposal.id}))
-        self._worksheet.write(row, column, 'Proposal Number', self._white_header_format)
-        self._worksheet.write_url(row + 1, column, url, string=str(proposal.id))
-        self._worksheet.set_column(column, column, 15)
-
-        column = 1
-        self._worksheet.write(row, column, 'Applicant title', self._grey_header_format)
-        self._worksheet.write(row + 1, column, proposal.applicant.academic_title.title, self._data_format)
-        self._worksheet.set_column(column, column, 10)
-
-        column = 2
-        self._worksheet.write(row, column, 'Applicant name', self._grey_header_format)
-        self._worksheet.write(row + 1, column, proposal.applicant.person.full_name(), self._data_format)
-        self._worksheet.set_column(column, column, 20)
-
-        column = 3
-        self._worksheet.write(row, column, 'Institution', self._grey_header_format)
-        self._worksheet.write(row + 1, column, ', '.join(
-            [organisation.name for organisation in proposal.applicant.organisations_ordered_by_name()]),
-                              self._data_format)
-        self._worksheet.set_column(column, column, 15)
-
-        column = 4
-        self._worksheet.write(row, column, 'Title of the project', self._green_header_format)
-        self._worksheet.write(row + 1, column, proposal.title, self._data_format)
-        self._worksheet.set_column(column, column, 25)
-
-        column = 5
-        self._worksheet.write(row, column, 'Geographic focus', self._green_header_format)
-        self._worksheet.write(row + 1, column,
-                              ', '.join([area.name for area in proposal.geographical_areas.all().order_by('name')]),
-                              self._data_format)
-        self._worksheet.set_column(column, column, 25)
-
-        column = 6
-        self._worksheet.write(row, column, 'Keywords', self._green_header_format)
-        self._worksheet.write(row + 1, column, proposal.keywords_enumeration(), self._data_format)
-        self._worksheet.set_column(column, column, 30)
-
-        column = 7
-        self._worksheet.write(row, column, 'Budget requested', self._white_header_format)
-        self._worksheet.write(row + 1, column, proposal.total_budget(), self._data_format)
-        self._worksheet.set_column(column, column, 10)
+        self._worksheet.write_url(row + 1, 0, url, string=str(proposal.id))
+
+        proposal_values = [proposal.applicant.academic_title.title,
+                           proposal.applicant.person.full_name(),
+                           ', '.join([organisation.name for organisation in
+                                      proposal.applicant.organisations_ordered_by_name()]),
+                           proposal.title,
+                           ', '.join([area.name for area in proposal.geographical_areas_ordered_by_name()]),
+                           proposal.keywords_enumeration(),
+                           proposal.total_budget()]
+
+        for column, value in enumerate(proposal_values, start=1):
+            self._worksheet.write(row + 1, column, value, self._data_format)
+
+        for column in range(len(self._proposal_columns()), len(columns)):
+            self._worksheet.write(row + 1, column, '', self._data_format)
 
         feedback_question_text = textwrap.dedent('''\
         FEEDBACK TO APPLICANTS: What are the strengths and weaknesses of the proposal? Please write
@@ -139,45 +161,7 @@ class ProposalsExportExcel(View):
         self._worksheet.merge_range(row + 3, 0, row + 3, 7, 'Fill in here', self._feedback_answer_format)
         self._worksheet.set_row(row + 3, 50)
 
-        # Answers from the committee
-        column = 8
-        score_column_width = 12
-
-        self._column_criterion_1 = column
-        for criterion_n in range(1, total_number_criteria + 1):
-            self._worksheet.write(row, column, f'Criterion {criterion_n}: score', self._yellow_header_format)
-            self._worksheet.write(row + 1, column, '', self._data_format)
-            self._worksheet.set_column(column, column, score_column_width)
-
-            self._worksheet.write(row, column + 1, f'Criterion {criterion_n}: remarks', self._yellow_header_format)
-            self._worksheet.write(row + 1, column + 1, '', self._data_format)
-            self._worksheet.set_column(column + 1, column + 1, 35)
-
-            column += 2
-
-        self._worksheet.write(row, column, f'Total score criteria 1-{total_number_criteria}',
-                              self._yellow_header_format)
-        self._worksheet.write(row + 1, column, '', self._data_format)
-        self._worksheet.set_column(column, column, score_column_width)
-
-        column += 1
-        self._worksheet.write(row, column, 'Budget proposed by reviewer', self._blue_header_format)
-        self._worksheet.write(row + 1, column, '', self._data_format)
-        self._worksheet.set_column(column, column, score_column_width)
-
-        column += 1
-        self._worksheet.write(row, column, 'Budget remarks', self._blue_header_format)
-        self._worksheet.write(row + 1, column, '', self._data_format)
-        self._worksheet.set_column(column, column, 30)
-
-        column += 1
-        self._worksheet.write(row, column, 'Optional additional remarks to the panel', self._orange_header_format)
-        self._worksheet.write(row + 1, column, '', self._data_format)
-        self._worksheet.set_column(column, column, 50)
-
-        self._proposal_last_column = column
-
-    def _write_marking_scale_box(self, initial_row, initial_column):
+    def _write_marking_scale_box(self, worksheet, initial_row, initial_column):
         scale = [('OUTSTANDING', '9-10'),
                  ('VERY GOOD', '7-8'),
                  ('GOOD', '6-5'),
@@ -186,52 +170,46 @@ class ProposalsExportExcel(View):
                  ('NOT RELEVANT', '0')
                  ]
 
-        self._worksheet.write(initial_row, initial_column, 'MARKING SCALE', self._centered_border_top_left_bold)
-        self._worksheet.write(initial_row, initial_column + 1, '', self._centered_border_top_right)
+        worksheet.write(initial_row, initial_column, 'MARKING SCALE', self._centered_border_top_left_bold)
+        worksheet.write(initial_row, initial_column + 1, '', self._centered_border_top_right)
 
         last_row = initial_row
         for index, rate in enumerate(scale):
-            self._worksheet.write(initial_row + index + 1, initial_column, rate[0], self._centered_border_left)
-            self._worksheet.write(initial_row + index + 1, initial_column + 1, rate[1], self._centered_border_right)
+            worksheet.write(initial_row + index + 1, initial_column, rate[0], self._centered_border_left)
+            worksheet.write(initial_row + index + 1, initial_column + 1, rate[1], self._centered_border_right)
 
             last_row += 1
 
-        self._worksheet.write(last_row, initial_column, '', self._centered_border_top)
-        self._worksheet.write(last_row, initial_column + 1, '', self._centered_border_top)
+        worksheet.write(last_row, initial_column, '', self._centered_border_top)
+        worksheet.write(last_row, initial_column + 1, '', self._centered_border_top)
 
-    def _write_evaluation_criteria(self, initial_row, initial_column, border_right_column, call_evaluation):
-        if call_evaluation is None:
+    def _write_evaluation_criteria(self, worksheet, initial_row, initial_column, border_right_column,
+                                   evaluation_criteria):
+        if evaluation_criteria is None:
             return
 
-        evaluation_criteria = []
-        index = 1
-        for criterion in call_evaluation.criterioncallevaluation_set.filter(enabled=True).order_by('order'):
-            evaluation_criteria.append(
-                (index, criterion.criterion.name, criterion.criterion.description))
-            index += 1
-
-        self._worksheet.write(initial_row, initial_column, 'EVALUATION CRITERIA', self._bold_border_left)
+        worksheet.write(initial_row, initial_column, 'EVALUATION CRITERIA', self._bold_border_left)
 
         last_row = initial_row
 
-        self._worksheet.write(initial_row, border_right_column, '', self._centered_border_right)
+        worksheet.write(initial_row, border_right_column, '', self._centered_border_right)
 
         for index, row in enumerate(evaluation_criteria):
-            self._worksheet.write(initial_row + index + 1, initial_column, row[0], self._centered_border_left)
-            self._worksheet.write(initial_row + index + 1, initial_column + 1, row[1], self._centered_text_wrap)
+            worksheet.write(initial_row + index + 1, initial_column, row[0], self._centered_border_left)
+            worksheet.write(initial_row + index + 1, initial_column + 1, row[1], self._centered_text_wrap)
 
             if len(row[1]) > 35:
                 # This is going to be (likely) a multi-line row. Default height=15 from xlsxwriter
-                self._worksheet.set_row(initial_row + index + 1, 30)
+                worksheet.set_row(initial_row + index + 1, 30)
 
-            self._worksheet.write(initial_row + index + 1, initial_column + 2, row[2], self._small_italics)
-            self._worksheet.write(initial_row + index + 1, border_right_column, '', self._centered_border_right)
+            worksheet.write(initial_row + index + 1, initial_column + 2, row[2], self._small_italics)
+            worksheet.write(initial_row + index + 1, border_right_column, '', self._centered_border_right)
 
             last_row += 1
 
         for column in range(initial_column, border_right_column + 1):
-            self._worksheet.write(initial_row - 1, column, '', self._centered_border_bottom)
-            self._worksheet.write(last_row + 1, column, '', self._centered_border_top)
+            worksheet.write(initial_row - 1, column, '', self._centered_border_bottom)
+            worksheet.write(last_row + 1, column, '', self._centered_border_top)
 
     def get(self, request, *args, **kwargs):
         call_id = kwargs['call']
@@ -254,66 +232,102 @@ class ProposalsExportExcel(View):
             filename = 'proposals-all-{}.xlsx'.format(date)
             call_evaluation = None
 
-        output = io.BytesIO()
-        self._workbook = xlsxwriter.Workbook(output)
+        if call_evaluation:
+            criteria = list(call_evaluation.criterioncallevaluation_set.filter(enabled=True).
+                            select_related('criterion').
+                            order_by('order'))
+
+            # Criterion headers
+            criterion_header_texts = [criterion.criterion.name for criterion in criteria]
+            evaluation_criteria = [(index, criterion.criterion.name, criterion.criterion.description)
+                                   for index, criterion in enumerate(criteria, start=1)]
+        else:
+            criterion_header_texts = []
+            evaluation_criteria = None
+
+        total_number_criteria = len(criterion_header_texts)
+
+        excel_file = tempfile.NamedTemporaryFile(suffix='.xlsx')
+        self._workbook = xlsxwriter.Workbook(excel_file.name, {'constant_memory': True})
         self._worksheet = self._workbook.add_worksheet()
 
         self._prepare_styles()
 
+        self._column_criterion_1 = len(self._proposal_columns())
+        self._proposal_last_column = self._column_criterion_1 + len(self._reviewer_columns(total_number_criteria)) - 1
+
+        self._set_columns_width(total_number_criteria)
+
+        # The information before the proposals is written in any order and RowOrderedWriter writes it in row order
+        header = RowOrderedWriter(self._worksheet)
+
         # Writes main information
         cell_format = self._workbook.add_format({'bold': True, 'font_size': 13})
         if call_id:
-            self._worksheet.write(0, 0, call.long_name, cell_format)
+            header.write(0, 0, call.long_name, cell_format)
         else:
-            self._worksheet.write(0, 0, 'All calls', cell_format)
+            header.write(0, 0, 'All calls', cell_format)
 
-        self._worksheet.set_row(0, 20)
+        header.set_row(0, 20)
 
-        self._worksheet.write(2, 0, 'To be returned to grants@swisspolar.ch')
+        header.write(2, 0, 'To be returned to grants@swisspolar.ch')
         italic_format = self._workbook.add_format({'italic': True})
-        self._worksheet.write_rich_string(4, 0, 'Name of the reviewer: ', italic_format, 'please fill in')
-
-        if call_evaluation:
-            # Criterion headers
-            criterion_header_texts = call_evaluation.criterioncallevaluation_set.filter(enabled=True).order_by(
-                'order').values_list('criterion__name', flat=True)
-        else:
-            criterion_header_texts = []
+        header.write_rich_string(4, 0, 'Name of the reviewer: ', italic_format, 'please fill in')
 
         # It never starts in the row less than 10: needs space for the MARKING SCALEE
         # It starts a few rows after the evaluation criteria number
         row_initial_proposal = max(2 + len(criterion_header_texts) + 3, 10)
 
-        # Writes the information for each proposal
-        for index, proposal in enumerate(proposals):
-            self._write_call(proposal, row_initial_proposal + (index * 7), len(criterion_header_texts))
-
         # Adds headers of the criterion
         criterion_last_column = 0
         for index, criterion_header_text in enumerate(criterion_header_texts):
             column = self._column_criterion_1 + index * 2
-            self._worksheet.merge_range(row_initial_proposal - 1, column, row_initial_proposal - 1,
-                                        column + 1, criterion_header_text,
-                                        self._yellow_cell_format)
+            header.merge_range(row_initial_proposal - 1, column, row_initial_proposal - 1,
+                               column + 1, criterion_header_text,
+                               self._yellow_cell_format)
 
             criterion_last_column = column + 1
 
-        self._worksheet.write(row_initial_proposal - 1, criterion_last_column + 1, 'TOTAL', self._yellow_cell_format)
+        header.write(row_initial_proposal - 1, criterion_last_column + 1, 'TOTAL', self._yellow_cell_format)
 
-        self._write_marking_scale_box(1, 5)
+        self._write_marking_scale_box(header, 1, 5)
 
-        self._write_evaluation_criteria(1, 8, self._proposal_last_column, call_evaluation)
+        self._write_evaluation_criteria(header, 1, 8, self._proposal_last_column, evaluation_criteria)
+
+        header.flush()
+
+        # Writes the information for each proposal
+        for index, proposal in enumerate(self._proposals_with_related_data(proposals)):
+            self._write_call(proposal, row_initial_proposal + (index * 7), total_number_criteria)
 
         self._worksheet.freeze_panes(10, 6)
 
         self._workbook.close()
 
-        output.seek(0)
+        excel_file.seek(0)
+
+        return FileResponse(excel_file, as_attachment=True, filename=filename,
+                            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+class RowOrderedWriter:
+    """In constant_memory mode XlsxWriter writes each row when it moves to the next one: writing in a previous
+    row is ignored. RowOrderedWriter keeps the worksheet calls (write, merge_range, set_row...), which can
+    be done in any order, and flush() does them ordered by row"""
+
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+        self._calls = []
+
+    def __getattr__(self, method_name):
+        def call(row, *args, **kwargs):
+            self._calls.append((row, method_name, args, kwargs))
+
+        return call
 
-        response = HttpResponse(
-            output,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename=%s' % filename
+    def flush(self):
+        # sorted() is stable: the calls for the same row are done in the same order that they were received
+        for row, method_name, args, kwargs in sorted(self._calls, key=lambda call: call[0]):
+            getattr(self._worksheet, method_name)(row, *args, **kwargs)
 
-        return response
+        self._calls = []
@@ -1,4 +1,4 @@
-import io
+import contextlib
 import zipfile
 
 from django.http import FileResponse
@@ -7,54 +7,70 @@ from django.views import View
 
 from evaluation.models import Reviewer
 from project_core.models import Call, Proposal
-from project_core.views.common.proposal_zip import add_proposal_to_zip
+from project_core.views.common.proposal_pdf import create_pdfs_for_proposals
+from project_core.views.common.proposal_zip import proposal_directory_name, write_proposal_to_zip
 
 
-class CreateZipFile:
-    def __init__(self, proposals, request):
-        self._proposals = iter(proposals)
-        self._request = request
+class ZipStream:
+    """Non seekable file for ZipFile (it then uses data descriptors instead of seeking back to write the sizes).
+    The written bytes are only kept until they are read"""
 
-        self._buffer = io.BytesIO()
-        self._zipfile = zipfile.ZipFile(self._buffer, 'w')
+    def __init__(self):
+        self._buffer = bytearray()
 
-        self._used_directory_names = []
+    def write(self, data):
+        self._buffer += data
+        return len(data)
 
-        self._last_read_position = 0
+    def flush(self):
+        pass
 
-        with self._zipfile.open('README.txt', mode='w') as readme_file:
-            readme_file.write(b'This ZIP file includes confidential proposals and personal information. Please keep it private and confidential.')
+    def read_all(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
 
-        self._last_wrote_position = self._buffer.tell()
+    def __len__(self):
+        return len(self._buffer)
 
-    def _add_new_proposal(self):
-        try:
-            proposal = next(self._proposals)
-        except StopIteration:
-            self._zipfile.close()
-            return
 
-        self._buffer.seek(self._last_wrote_position)
-        directory_name = add_proposal_to_zip(proposal, self._zipfile,
-                                             self._request, self._used_directory_names)
-        self._last_wrote_position = self._buffer.tell()
+class CreateZipFile:
+    """File-like object for FileResponse: the ZIP file is written while it is being read. Only the PDF being added
+    and a chunk of the current file are kept in memory"""
 
-        self._used_directory_names.append(directory_name)
+    def __init__(self, proposals, request):
+        self._stream = ZipStream()
+        self._zip_writer = self._write_zip(proposals, request)
 
-    def read(self, size):
-        first_read = self._last_read_position == 0
+    def _write_zip(self, proposals, request):
+        with zipfile.ZipFile(self._stream, 'w') as zip_archive:
+            with zip_archive.open('README.txt', mode='w') as readme_file:
+                readme_file.write(b'This ZIP file includes confidential proposals and personal information. Please keep it private and confidential.')
+
+            used_directory_names = []
 
-        self._buffer.seek(self._last_read_position)
-        read_buffer = self._buffer.read(size)
-        self._last_read_position = self._buffer.tell()
+            # The PDFs of the next proposals are generated while the current one is being sent
+            with contextlib.closing(create_pdfs_for_proposals(proposals, request)) as proposals_with_pdfs:
+                for proposal, proposal_pdf_future in proposals_with_pdfs:
+                    directory_name = proposal_directory_name(proposal, used_directory_names)
+                    used_directory_names.append(directory_name)
 
-        if len(read_buffer) < size and not first_read:
-            self._add_new_proposal()
-            self._buffer.seek(self._last_read_position)
-            read_buffer += self._buffer.read(size - len(read_buffer))
-            self._last_read_position = self._buffer.tell()
+                    yield from write_proposal_to_zip(proposal, zip_archive, directory_name, request,
+                                                     proposal_pdf_future)
 
-        return read_buffer
+    def read(self, size):
+        # It might return more than size bytes (what has been written while adding the last chunk)
+        while len(self._stream) < size:
+            try:
+                next(self._zip_writer)
+            except StopIteration:
+                break
+
+        return self._stream.read_all()
+
+    def close(self):
+        # Called by FileResponse, also if the download is interrupted: it waits for the PDFs being generated
+        self._zip_writer.close()
 
 
 class ProposalsExportZip(View):
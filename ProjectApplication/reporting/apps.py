@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ReportingConfig(AppConfig):
     name = 'reporting'
+
+    def ready(self):
+        # Connects the signals that keep ProjectFinanceSummary updated
+        from . import signals
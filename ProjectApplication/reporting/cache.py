@@ -0,0 +1,57 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+# All the reporting tables are cached using keys that contain the current version. Changing the version
+# (see invalidate()) makes all the cached tables unreachable: they expire with REPORTING_CACHE_TIMEOUT.
+VERSION_KEY = 'reporting-version'
+
+
+def _new_version():
+    # Random instead of incremental: if the version key is evicted from the cache
+    # a new one cannot match old (stale) tables
+    version = uuid.uuid4().hex
+    cache.set(VERSION_KEY, version, timeout=None)
+
+    return version
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        version = _new_version()
+
+    return version
+
+
+def invalidate():
+    _new_version()
+
+
+def invalidate_on_commit():
+    # If the tables were invalidated before the commit another request could cache them
+    # again without the changes of the transaction
+    transaction.on_commit(invalidate)
+
+
+def get_table(name, calculate_function, refresh=False):
+    """
+    Returns a dictionary with the keys 'table' (the result of calculate_function) and 'computed_at'.
+    calculate_function is called only if the table is not in the cache or refresh is True.
+    """
+    # The key is generated before the calculation: if the data changes while calculating
+    # the table is stored with the old version
+    key = f'reporting-{_current_version()}-{name}'
+
+    result = None if refresh else cache.get(key)
+
+    if result is None:
+        result = {'table': calculate_function(),
+                  'computed_at': timezone.now()}
+        cache.set(key, result, settings.REPORTING_CACHE_TIMEOUT)
+
+    return result
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from reporting.models import ProjectFinanceSummary
+
+
+class Command(BaseCommand):
+    help = 'Calculates again the finance summaries of all the projects (used by the reporting)'
+
+    def handle(self, *args, **options):
+        number_of_summaries = ProjectFinanceSummary.rebuild()
+
+        self.stdout.write(f'Finance summaries rebuilt for {number_of_summaries} projects')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+import reporting.cache
+from reporting.views import REPORTING_TABLES
+
+
+class Command(BaseCommand):
+    help = 'Calculates the reporting tables that are not in the cache (e.g. run it periodically after data changes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true',
+                            help='Calculates all the tables even if they are in the cache')
+
+    def handle(self, *args, **options):
+        for table_name, calculate_function in REPORTING_TABLES.items():
+            reporting.cache.get_table(table_name, calculate_function, refresh=options['refresh'])
+
+        self.stdout.write(f'Reporting cache warmed: {len(REPORTING_TABLES)} tables')
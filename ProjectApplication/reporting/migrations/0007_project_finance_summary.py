@@ -0,0 +1,54 @@
+# Generated by Django 3.2.11 on 2026-10-18 19:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Q, Sum
+
+
+def create_finance_summaries(apps, schema_editor):
+    Project = apps.get_model('project_core', 'Project')
+    ProjectFinanceSummary = apps.get_model('reporting', 'ProjectFinanceSummary')
+
+    projects = Project.objects.annotate(paid=Sum('invoice__amount', filter=Q(invoice__paid_date__isnull=False)),
+                                        sent_for_payment=Sum('invoice__amount',
+                                                             filter=Q(invoice__sent_for_payment_date__isnull=False)))
+
+    for project in projects:
+        paid = project.paid or 0
+        open_for_payment = project.allocated_budget - paid if project.status == 'Ongoing' else 0
+
+        ProjectFinanceSummary.objects.create(project=project,
+                                             committed=project.allocated_budget,
+                                             paid=paid,
+                                             sent_for_payment=project.sent_for_payment or 0,
+                                             open_for_payment=open_for_payment)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_core', '0177_add_on_webite_field'),
+        ('reporting', '0006_new_missing_data_type'),
+        ('grant_management', '0061_key_and_primary_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectFinanceSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('committed', models.DecimalField(decimal_places=2, help_text='Budget allocated to the project', max_digits=20)),
+                ('paid', models.DecimalField(decimal_places=2, help_text='Total of the paid invoices', max_digits=20)),
+                ('sent_for_payment', models.DecimalField(decimal_places=2, help_text='Total of the invoices sent for payment', max_digits=20)),
+                ('open_for_payment', models.DecimalField(decimal_places=2, help_text='Committed but not paid yet. Zero if the project is closed', max_digits=20)),
+                ('updated_on', models.DateTimeField(auto_now=True, help_text='Date and time at which the summary was calculated')),
+                ('project', models.OneToOneField(help_text='Project that this summary belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='finance_summary', to='project_core.project')),
+            ],
+            options={
+                'verbose_name_plural': 'Project finance summaries',
+            },
+        ),
+        migrations.RunPython(
+            create_finance_summaries
+        ),
+    ]
@@ -1,7 +1,7 @@
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Q, Sum
 
-from project_core.models import FundingInstrument
+from project_core.models import FundingInstrument, Project
 
 
 class FundingInstrumentYearMissingData(models.Model):
@@ -43,3 +43,99 @@ class FundingInstrumentYearMissingData(models.Model):
             return True, rows.first().description
         else:
             return False, None
+
+    @staticmethod
+    def missing_data_lookup(missing_data_type):
+        """
+        Returns a function with the same parameters and results as is_missing_data for missing_data_type.
+        It reads the rows once: useful when it is called for every funding instrument and year of a table.
+        """
+        if missing_data_type is None:
+            rows = []
+        else:
+            rows = list(FundingInstrumentYearMissingData.objects.
+                        filter(missing_data_type=missing_data_type).
+                        order_by('pk'))
+
+        def is_missing_data(*, funding_instrument=None, year=None):
+            funding_instrument_id = None if funding_instrument is None else funding_instrument.pk
+
+            for row in rows:
+                if row.funding_instrument_id in (None, funding_instrument_id) and row.finance_year in (None, year):
+                    return True, row.description
+
+            return False, None
+
+        return is_missing_data
+
+
+class ProjectFinanceSummary(models.Model):
+    """Finance amounts of a project pre-calculated for the reporting. They are updated when the project or its
+    invoices change (see reporting/signals.py) and can be rebuilt using the command rebuildfinancesummaries"""
+
+    project = models.OneToOneField(Project, help_text='Project that this summary belongs to',
+                                   related_name='finance_summary', on_delete=models.CASCADE)
+    committed = models.DecimalField(help_text='Budget allocated to the project', decimal_places=2, max_digits=20)
+    paid = models.DecimalField(help_text='Total of the paid invoices', decimal_places=2, max_digits=20)
+    sent_for_payment = models.DecimalField(help_text='Total of the invoices sent for payment', decimal_places=2,
+                                           max_digits=20)
+    open_for_payment = models.DecimalField(help_text='Committed but not paid yet. Zero if the project is closed',
+                                           decimal_places=2, max_digits=20)
+    updated_on = models.DateTimeField(help_text='Date and time at which the summary was calculated', auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Project finance summaries'
+
+    def __str__(self):
+        return f'{self.project.key}: committed {self.committed} paid {self.paid}'
+
+    @staticmethod
+    def _projects_with_amounts(projects):
+        return projects.annotate(paid=Sum('invoice__amount', filter=Q(invoice__paid_date__isnull=False)),
+                                 sent_for_payment=Sum('invoice__amount',
+                                                      filter=Q(invoice__sent_for_payment_date__isnull=False)))
+
+    @staticmethod
+    def _from_project_with_amounts(project):
+        paid = project.paid or 0
+
+        if project.is_active():
+            open_for_payment = project.allocated_budget - paid
+        else:
+            # If the project is closed
+            open_for_payment = 0
+
+        return ProjectFinanceSummary(project=project,
+                                     committed=project.allocated_budget,
+                                     paid=paid,
+                                     sent_for_payment=project.sent_for_payment or 0,
+                                     open_for_payment=open_for_payment)
+
+    @staticmethod
+    def update_for_project(project):
+        project_with_amounts = ProjectFinanceSummary._projects_with_amounts(Project.objects.filter(pk=project.pk)). \
+            first()
+
+        if project_with_amounts is None:
+            # The project is being deleted
+            return
+
+        summary = ProjectFinanceSummary._from_project_with_amounts(project_with_amounts)
+
+        ProjectFinanceSummary.objects.update_or_create(project=project,
+                                                       defaults={'committed': summary.committed,
+                                                                 'paid': summary.paid,
+                                                                 'sent_for_payment': summary.sent_for_payment,
+                                                                 'open_for_payment': summary.open_for_payment})
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild():
+        """Deletes and calculates again the summaries of all the projects. Returns the number of summaries"""
+        summaries = [ProjectFinanceSummary._from_project_with_amounts(project) for project in
+                     ProjectFinanceSummary._projects_with_amounts(Project.objects.all())]
+
+        ProjectFinanceSummary.objects.all().delete()
+        ProjectFinanceSummary.objects.bulk_create(summaries)
+
+        return len(summaries)
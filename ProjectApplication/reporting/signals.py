@@ -0,0 +1,45 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+import reporting.cache
+from evaluation.models import CallEvaluation
+from grant_management.models import Invoice
+from project_core.models import Project, Proposal, PersonPosition, PhysicalPerson, Call, FundingInstrument, Gender, \
+    CareerStage
+from reporting.models import ProjectFinanceSummary, FundingInstrumentYearMissingData
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def update_finance_summary_invoice(sender, instance, raw=False, **kwargs):
+    if raw:
+        # Loading fixtures: the related objects might not exist yet
+        return
+
+    ProjectFinanceSummary.update_for_project(instance.project)
+
+
+@receiver(post_save, sender=Project)
+def update_finance_summary_project(sender, instance, raw=False, **kwargs):
+    # The allocated budget or the status (open for payment is zero for closed projects) might have changed
+    if raw:
+        return
+
+    ProjectFinanceSummary.update_for_project(instance)
+
+
+# Models used to calculate the reporting tables (gender is in PhysicalPerson, career stage in PersonPosition).
+# FundingInstrument, Gender and CareerStage: their names and order are the rows and columns of the tables
+@receiver([post_save, post_delete], sender=Proposal)
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Invoice)
+@receiver([post_save, post_delete], sender=PersonPosition)
+@receiver([post_save, post_delete], sender=PhysicalPerson)
+@receiver([post_save, post_delete], sender=Call)
+@receiver([post_save, post_delete], sender=CallEvaluation)
+@receiver([post_save, post_delete], sender=FundingInstrumentYearMissingData)
+@receiver([post_save, post_delete], sender=FundingInstrument)
+@receiver([post_save, post_delete], sender=Gender)
+@receiver([post_save, post_delete], sender=CareerStage)
+def invalidate_reporting_cache(sender, **kwargs):
+    reporting.cache.invalidate_on_commit()
@@ -1,34 +1,217 @@
 import datetime
+import io
+import zipfile
 from decimal import Decimal
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 
+import reporting.cache
 from grant_management.models import GrantAgreement, Invoice
-from project_core.models import OrganisationName
+from project_core.models import OrganisationName, Gender, CareerStage, FundingInstrument, Project
 from project_core.tests import database_population
-from reporting.models import FundingInstrumentYearMissingData
-from reporting.views import ProjectsBalanceExcel, ProjectsAllInformationExcel
+from reporting.models import FundingInstrumentYearMissingData, ProjectFinanceSummary
+from reporting.views import ProjectsBalanceExcel, ProjectsAllInformationExcel, gender_proposal_applicants_per_call, \
+    career_stage_project_principal_investigator_per_call, projects_per_funding_instrument, \
+    career_stage_proposal_applicants_per_year, excel_dict_writer, NOT_IN_DB_TOOLTIP, REPORTING_TABLES, \
+    calculate_number_of_calls, allocated_budget_per_year, allocated_budget_per_call, \
+    gender_project_principal_investigator_per_call, career_stage_projects_principal_investigators_per_year, \
+    career_stage_proposal_applicants_per_call, proposals_per_funding_instrument
 
 
 class ReportingTest(TestCase):
     def setUp(self):
+        # The cache is not a test database: tables from other tests might be there
+        reporting.cache.invalidate()
+
         self._project = database_population.create_project()
         self._client_management = database_population.create_management_logged_client()
 
     def test_get(self):
-        response = self._client_management.get(reverse('logged-reporting'))
+        response = self._client_management.get(reverse('logged-reporting'), {'tab': 'finance'})
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Big Expeditions')
         self.assertContains(response, '20&#x27;000.00')
 
-    def test_financial_information(self):
+    def test_get_only_active_tab_tables(self):
         response = self._client_management.get(reverse('logged-reporting'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('calls_per_year', response.context)
+        self.assertNotIn('allocated_budget_per_call', response.context)
+        self.assertNotContains(response, '20&#x27;000.00')
+        self.assertContains(response, reverse('logged-reporting-table', kwargs={'table_name': 'allocated_budget_per_call'}))
+
+    def test_get_table_html(self):
+        response = self._client_management.get(reverse('logged-reporting-table',
+                                                       kwargs={'table_name': 'allocated_budget_per_call'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<table id="allocated_budget_per_call"')
+        self.assertContains(response, '20&#x27;000.00')
+
+    def test_get_table_json(self):
+        response = self._client_management.get(reverse('logged-reporting-table',
+                                                       kwargs={'table_name': 'allocated_budget_per_call'}),
+                                               {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['table_id'], 'allocated_budget_per_call')
+        self.assertEqual(len(data['table']['data']), 1)
+        self.assertEqual(data['table']['data'][0]['Commitment (CHF)'], "20'000.00")
+
+    def test_get_table_not_found(self):
+        response = self._client_management.get(reverse('logged-reporting-table', kwargs={'table_name': 'does_not_exist'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_financial_information(self):
+        response = self._client_management.get(reverse('logged-reporting'), {'tab': 'finance'})
         create_project_with_invoices()
         self.assertContains(response, 'Big Expeditions')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context['allocated_budget_per_call']['data']), 1)
 
+    def test_tables_cached_until_data_changes(self):
+        response = self._client_management.get(reverse('logged-reporting'), {'tab': 'finance'})
+        self.assertEqual(len(response.context['allocated_budget_per_call']['data']), 1)
+        computed_at = response.context['computed_at']
+
+        # The cache is invalidated on commit
+        with self.captureOnCommitCallbacks(execute=False):
+            create_project_with_invoices()
+
+        response = self._client_management.get(reverse('logged-reporting'), {'tab': 'finance'})
+        self.assertEqual(response.context['computed_at'], computed_at)
+        self.assertContains(response, "20&#x27;000.00")
+        self.assertNotContains(response, "35&#x27;000.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.create(project=self._project, amount=100)
+
+        response = self._client_management.get(reverse('logged-reporting'), {'tab': 'finance'})
+        self.assertGreater(response.context['computed_at'], computed_at)
+        self.assertContains(response, "35&#x27;000.00")
+
+    def test_tables_invalidated_by_lookup_tables(self):
+        # The names of the funding instruments, genders and career stages are in the tables
+        for lookup_object in [self._project.funding_instrument, database_population.create_genders()[0],
+                              database_population.create_career_stage()]:
+            computed_at = self._client_management.get(reverse('logged-reporting')).context['computed_at']
+
+            with self.captureOnCommitCallbacks(execute=True):
+                lookup_object.save()
+
+            response = self._client_management.get(reverse('logged-reporting'))
+            self.assertGreater(response.context['computed_at'], computed_at, lookup_object)
+
+    def test_refresh(self):
+        response = self._client_management.get(reverse('logged-reporting'), {'tab': 'finance', 'refresh': '1'})
+        self.assertRedirects(response, reverse('logged-reporting') + '?tab=finance')
+
+    def test_warm_reporting_cache_command(self):
+        call_command('warmreportingcache', stdout=io.StringIO())
+
+        def not_called():
+            assert False
+
+        for table_name in REPORTING_TABLES.keys():
+            self.assertIn('table', reporting.cache.get_table(table_name, not_called))
+
+
+class ReportingTablesTest(TestCase):
+    def setUp(self):
+        self._project = database_population.create_project()
+
+        person = self._project.principal_investigator.person
+        person.gender = Gender.objects.create(name='Woman')
+        person.save()
+
+        self._career_stage = CareerStage.objects.create(name='Early career', list_order=1)
+        self._project.principal_investigator.career_stage = self._career_stage
+        self._project.principal_investigator.save()
+
+    def test_gender_proposal_applicants_per_call(self):
+        FundingInstrumentYearMissingData.objects.create(
+            missing_data_type=FundingInstrumentYearMissingData.MissingDataType.GENDER_PROPOSAL_APPLICANT,
+            finance_year=2020,
+            description='Data not imported')
+
+        # The proposal of the project does not have a call evaluation: the years come from the project
+        self.assertEqual(gender_proposal_applicants_per_call(),
+                         {'headers': ['Grant Scheme', 'Year', 'Woman', 'Not in DB'],
+                          'data': [{'Woman': 'Data not imported', 'Not in DB': 'Data not imported',
+                                    'Grant Scheme': 'Big Expeditions', 'Year': 2020}],
+                          'header_tooltips': {'Not in DB': NOT_IN_DB_TOOLTIP}})
+
+    def test_career_stage_project_principal_investigator_per_call(self):
+        result = career_stage_project_principal_investigator_per_call()
+
+        self.assertEqual(result['headers'], ['Grant Scheme', 'Year', 'Early career', 'Not in DB'])
+        self.assertEqual(result['data'], [{'Early career': 1, 'Not in DB': 0,
+                                           'Grant Scheme': 'GreenLAnd Circumnavigation Expedition 2018',
+                                           'Year': 2020}])
+
+    def test_career_stage_proposal_applicants_per_year(self):
+        result = career_stage_proposal_applicants_per_year()
+
+        self.assertEqual(result['data'], [{'Year': 2020, 'Early career': 1, 'Not in DB': 0}])
+
+    def test_projects_per_funding_instrument(self):
+        FundingInstrument.objects.create(long_name='Another funding instrument')
+
+        self.assertEqual(projects_per_funding_instrument(),
+                         {'headers': ['Year', 'Another funding instrument', 'Big Expeditions'],
+                          'data': [{'Year': 2020, 'Another funding instrument': 0, 'Big Expeditions': 1}]})
+
+    def test_calculate_number_of_calls(self):
+        self.assertEqual(calculate_number_of_calls(),
+                         {'data': [{'Year': 2020, 'Calls': 1}], 'headers': ['Year', 'Calls']})
+
+    def test_allocated_budget_per_year(self):
+        self.assertEqual(allocated_budget_per_year()['data'],
+                         [{'Year': 2020, 'Commitment (CHF)': "20'000.00", 'Paid to date (CHF)': '0.00',
+                           'Open for payment (CHF)': "20'000.00"}])
+
+    def test_allocated_budget_per_call(self):
+        self.assertEqual(allocated_budget_per_call()['data'],
+                         [{'Grant Scheme': 'Big Expeditions', 'Account Number': None, 'Year': 2020,
+                           'Commitment (CHF)': "20'000.00", 'Paid to date (CHF)': '0.00',
+                           'Open for payment (CHF)': "20'000.00"}])
+
+    def test_gender_project_principal_investigator_per_call(self):
+        self.assertEqual(gender_project_principal_investigator_per_call(),
+                         {'headers': ['Grant Scheme', 'Year', 'Woman', 'Not in DB'],
+                          'data': [{'Woman': 1, 'Not in DB': 0, 'Grant Scheme': 'Big Expeditions', 'Year': 2020}],
+                          'header_tooltips': {'Not in DB': NOT_IN_DB_TOOLTIP}})
+
+    def test_career_stage_projects_principal_investigators_per_year(self):
+        self.assertEqual(career_stage_projects_principal_investigators_per_year(),
+                         {'headers': ['Year', 'Early career', 'Not in DB'],
+                          'data': [{'Year': 2020, 'Early career': 1, 'Not in DB': 0}],
+                          'header_tooltips': {'Not in DB': NOT_IN_DB_TOOLTIP}})
+
+    def test_career_stage_proposal_applicants_per_call(self):
+        self.assertEqual(career_stage_proposal_applicants_per_call()['data'],
+                         [{'Early career': 1, 'Not in DB': 0,
+                           'Grant Scheme': 'GreenLAnd Circumnavigation Expedition 2018', 'Year': 2020}])
+
+    def test_proposals_per_funding_instrument(self):
+        FundingInstrument.objects.create(long_name='Another funding instrument')
+
+        # The funding instrument without calls has no data for the year
+        self.assertEqual(proposals_per_funding_instrument(),
+                         {'headers': ['Year', 'Another funding instrument', 'Big Expeditions'],
+                          'data': [{'Year': 2020, 'Another funding instrument': '-', 'Big Expeditions': 1}]})
+
+    def test_number_of_queries_does_not_depend_on_the_data(self):
+        for i in range(3):
+            FundingInstrument.objects.create(long_name=f'Funding instrument {i}')
+
+        with self.assertNumQueries(6):
+            gender_proposal_applicants_per_call()
+
+        with self.assertNumQueries(4):
+            career_stage_project_principal_investigator_per_call()
+
 
 class FundingInstrumentYearMissingDataModelTest(TestCase):
     def setUp(self):
@@ -80,6 +263,22 @@ class FundingInstrumentYearMissingDataModelTest(TestCase):
             funding_instrument=self._funding_instrument,
             year=2016)[0])
 
+    def test_missing_data_lookup(self):
+        FundingInstrumentYearMissingData.objects.create(
+            missing_data_type=FundingInstrumentYearMissingData.MissingDataType.CAREER_STAGE_PROPOSAL_APPLICANT,
+            finance_year=2016,
+            funding_instrument=self._funding_instrument,
+            description='Not imported')
+
+        is_missing_data = FundingInstrumentYearMissingData.missing_data_lookup(
+            FundingInstrumentYearMissingData.MissingDataType.CAREER_STAGE_PROPOSAL_APPLICANT)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(is_missing_data(funding_instrument=self._funding_instrument, year=2016),
+                             (True, 'Not imported'))
+            self.assertEqual(is_missing_data(funding_instrument=self._funding_instrument, year=2017), (False, None))
+            self.assertEqual(is_missing_data(year=2016), (False, None))
+
 
 def create_project_with_invoices():
     project2 = database_population.create_project(key='SPI-2020-002', title='Second test')
@@ -105,6 +304,63 @@ def create_project_with_invoices():
                                                     signed_date=datetime.datetime(2020, 1, 4))
 
 
+class ProjectFinanceSummaryTest(TestCase):
+    def setUp(self):
+        self._project = database_population.create_project()
+
+    def test_project_created(self):
+        self.assertEqual(self._project.finance_summary.committed, 20_000)
+        self.assertEqual(self._project.finance_summary.paid, 0)
+        self.assertEqual(self._project.finance_summary.open_for_payment, 20_000)
+
+    def test_invoices_changes(self):
+        invoice = Invoice.objects.create(project=self._project,
+                                         sent_for_payment_date=datetime.date(2021, 4, 5),
+                                         amount=1_000)
+
+        finance_summary = ProjectFinanceSummary.objects.get(project=self._project)
+        self.assertEqual(finance_summary.sent_for_payment, 1_000)
+        self.assertEqual(finance_summary.paid, 0)
+
+        invoice.paid_date = datetime.date(2021, 4, 10)
+        invoice.save()
+
+        finance_summary.refresh_from_db()
+        self.assertEqual(finance_summary.paid, 1_000)
+        self.assertEqual(finance_summary.open_for_payment, 19_000)
+
+        invoice.delete()
+
+        finance_summary.refresh_from_db()
+        self.assertEqual(finance_summary.sent_for_payment, 0)
+        self.assertEqual(finance_summary.paid, 0)
+
+    def test_project_closed(self):
+        self._project.status = Project.COMPLETED
+        self._project.save()
+
+        self._project.finance_summary.refresh_from_db()
+        self.assertEqual(self._project.finance_summary.open_for_payment, 0)
+
+    def test_rebuild_command(self):
+        create_project_with_invoices()
+        ProjectFinanceSummary.objects.all().delete()
+
+        call_command('rebuildfinancesummaries', stdout=io.StringIO())
+
+        self.assertEqual(ProjectFinanceSummary.objects.count(), 2)
+        finance_summary = ProjectFinanceSummary.objects.get(project__key='SPI-2020-002')
+        self.assertEqual(finance_summary.committed, 15_000)
+        self.assertEqual(finance_summary.paid, 1_500)
+        self.assertEqual(finance_summary.sent_for_payment, 2_500)
+        self.assertEqual(finance_summary.open_for_payment, 13_500)
+
+
+def sheet_xml(response):
+    with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as excel_file:
+        return excel_file.read('xl/worksheets/sheet1.xml').decode('utf-8')
+
+
 class ProjectsBalanceExcelTest(TestCase):
     def setUp(self):
         self._client_management = database_population.create_management_logged_client()
@@ -115,7 +371,9 @@ class ProjectsBalanceExcelTest(TestCase):
         response = self._client_management.get(reverse('logged-reporting-finance-projects_balance-excel'))
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response['content-disposition'].endswith('.xlsx"'))
-        self.assertGreaterEqual(int(response['content-length']), 5600)
+        self.assertGreaterEqual(int(response['content-length']), 5300)
+        self.assertIn('SPI-2020-001', sheet_xml(response))
+        self.assertTrue(response.streaming)
 
     def test_get_two_projects_ok(self):
         project1 = database_population.create_project()
@@ -128,7 +386,8 @@ class ProjectsBalanceExcelTest(TestCase):
         response = self._client_management.get(reverse('logged-reporting-finance-projects_balance-excel'))
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response['content-disposition'].endswith('.xlsx"'))
-        self.assertGreaterEqual(int(response['content-length']), 5650)
+        self.assertGreaterEqual(int(response['content-length']), 5350)
+        self.assertIn('SPI-2020-002', sheet_xml(response))
 
     def data_one_project(self):
         database_population.create_project()
@@ -165,6 +424,16 @@ class ProjectsBalanceExcelTest(TestCase):
                            'End date': datetime.date(2022, 5, 7), 'Allocated budget': Decimal('15000.00'),
                            'Balance due': Decimal('13500.00')}])
 
+    def test_excel_dict_writer(self):
+        rows = ({'Key': f'SPI-{number}', 'Allocated budget': Decimal(number)} for number in range(3))
+
+        excel_file = excel_dict_writer('test.xlsx', ['Key', 'Allocated budget'], rows, {'Key': 15})
+
+        self.assertEqual(excel_file.tell(), 0)
+        self.assertTrue(zipfile.is_zipfile(excel_file))
+
+        excel_file.close()
+
 
 class ProjectsAllInformationExcelTest(TestCase):
     def setUp(self):
@@ -176,7 +445,8 @@ class ProjectsAllInformationExcelTest(TestCase):
         response = self._client_management.get(reverse('logged-reporting-projects_information-excel'))
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response['content-disposition'].endswith('.xlsx"'))
-        self.assertGreaterEqual(int(response['content-length']), 5800)
+        self.assertGreaterEqual(int(response['content-length']), 5500)
+        self.assertIn('SPI-2020-001', sheet_xml(response))
 
     def test_get_two_projects_ok(self):
         project1 = database_population.create_project()
@@ -189,7 +459,40 @@ class ProjectsAllInformationExcelTest(TestCase):
         response = self._client_management.get(reverse('logged-reporting-projects_information-excel'))
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response['content-disposition'].endswith('.xlsx"'))
-        self.assertGreaterEqual(int(response['content-length']), 5900)
+        self.assertGreaterEqual(int(response['content-length']), 5600)
+        self.assertIn('SPI-2020-002', sheet_xml(response))
+
+    def test_number_of_queries_does_not_depend_on_the_projects(self):
+        project1 = database_population.create_project()
+
+        with self.assertNumQueries(5):
+            self.assertEqual(len(ProjectsAllInformationExcel._rows()), 1)
+
+        organisation_name = OrganisationName.objects.create(name='Some organisation')
+        project1.principal_investigator.organisation_names.add(organisation_name)
+        create_project_with_invoices()
+
+        with self.assertNumQueries(5):
+            rows = ProjectsAllInformationExcel._rows()
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['Organisation'], 'Some organisation')
+        self.assertEqual(rows[0]['Keywords'], 'Algae')
+        self.assertEqual(rows[0]['Geographic focus'], 'Arctic')
+        self.assertEqual(rows[1]['Name of PI'], 'James Alan')
+        self.assertEqual(rows[1]['Signed date'], datetime.date(2020, 1, 4))
+        self.assertEqual(rows[1]['Balance due'], Decimal('13500.00'))
+
+        with self.assertNumQueries(5):
+            self.assertEqual(len(ProjectsBalanceExcel.rows()), 2)
+
+        # The paid amount is annotated: it does not use (or need) the finance summaries
+        ProjectFinanceSummary.objects.all().delete()
+
+        with self.assertNumQueries(5):
+            rows = ProjectsBalanceExcel.rows()
+
+        self.assertEqual(rows[1]['Balance due'], Decimal('13500.00'))
 
     def data_one_project(self):
         database_population.create_project()
@@ -5,6 +5,9 @@ urlpatterns = [
     path('logged/reporting/',
          reporting.views.Reporting.as_view(),
          name='logged-reporting'),
+    path('logged/reporting/table/<str:table_name>/',
+         reporting.views.ReportingTable.as_view(),
+         name='logged-reporting-table'),
     path('logged/reporting/excel/downloads/projects_balance',
          reporting.views.ProjectsBalanceExcel.as_view(),
          name='logged-reporting-finance-projects_balance-excel'),
@@ -1,54 +1,78 @@
 import datetime
-import io
+import tempfile
 from decimal import Decimal
 
 import xlsxwriter
-from django.db.models import Count, F, Sum, Min, Max
-from django.http import HttpResponse
+from django.db.models import Count, F, Sum, Min, Max, Prefetch, OuterRef, Subquery
+from django.http import Http404, JsonResponse, FileResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import urlencode
 from django.views import View
 from django.views.generic import TemplateView
 
-from project_core.models import Call, Project, Gender, CareerStage, Proposal, FundingInstrument
+from grant_management.models import Invoice
+from project_core.models import Call, Project, Gender, CareerStage, Proposal, FundingInstrument, OrganisationName
 from project_core.templatetags.thousands_separator import thousands_separator
+from project_core.utils.utils import iterate_in_chunks
+import reporting.cache
 from reporting.models import FundingInstrumentYearMissingData
 
 NOT_IN_DB_HEADER = 'Not in DB'
 NOT_IN_DB_TOOLTIP = 'Probably data imported before the Projects Application existed'
 
 
+def count_per_group(queryset, *fields):
+    """
+    Counts the objects of queryset grouped by fields using one query.
+
+    Returns a dictionary: the keys are tuples with the values of the fields (in the same order as fields), the values
+    are the number of objects. Groups without objects are not in the dictionary.
+    """
+    result = {}
+
+    for row in queryset.values(*fields).annotate(count=Count('*')).order_by():
+        result[tuple(row[field] for field in fields)] = row['count']
+
+    return result
+
+
 class CareerStagePerCallCalculator:
     def __init__(self, career_stage_field: str, foreign_key, missing_data):
         self._career_stage_field = career_stage_field
         self._foreign_key = foreign_key
         self._missing_data = missing_data
 
-        self._career_stages = None
-
-    def calculate_career_stage_stats(self, generic_queryset):
-        if self._career_stages is None:
-            self._career_stages = CareerStagePerYearCalculator._career_stages_sorted()
-
+    def calculate_career_stage_stats(self, counts, call, career_stages):
         result = {}
-        for career_stage in self._career_stages:
-            result[career_stage.name] = generic_queryset.filter(**{self._career_stage_field: career_stage}).count()
+        for career_stage in career_stages:
+            result[career_stage.name] = counts.get((call.id, career_stage.id), 0)
 
-        result[NOT_IN_DB_HEADER] = generic_queryset.filter(**{f'{self._career_stage_field}__isnull': True}).count()
+        result[NOT_IN_DB_HEADER] = counts.get((call.id, None), 0)
 
         return result
 
     def calculate_result(self):
-        data = []
-        for call in Call.objects.filter(submission_deadline__lte=timezone.now()). \
-                order_by('long_name'):
-            is_missing_data, missing_data_reason = FundingInstrumentYearMissingData.is_missing_data(
-                self._missing_data,
-                funding_instrument=call.funding_instrument,
-                year=call.finance_year)
+        career_stages = list(CareerStagePerYearCalculator._career_stages_sorted())
+        is_missing_data_call = FundingInstrumentYearMissingData.missing_data_lookup(self._missing_data)
+
+        calls = Call.objects.filter(submission_deadline__lte=timezone.now())
+
+        # self._foreign_key is the reverse relation from Call (e.g. proposal_set): counts the objects
+        # of the related model (e.g. Proposal) per call and career stage
+        relation = getattr(Call, self._foreign_key).rel
+        call_field = relation.field.name
+
+        counts = count_per_group(relation.related_model.objects.filter(**{f'{call_field}__in': calls}),
+                                 call_field, self._career_stage_field)
 
-            generic_queryset = getattr(call, self._foreign_key)
+        data = []
+        for call in calls.select_related('funding_instrument').order_by('long_name'):
+            is_missing_data, missing_data_reason = is_missing_data_call(funding_instrument=call.funding_instrument,
+                                                                        year=call.finance_year)
 
-            stats = self.calculate_career_stage_stats(generic_queryset)
+            stats = self.calculate_career_stage_stats(counts, call, career_stages)
 
             for stat_key in stats.keys():
                 if is_missing_data:
@@ -59,7 +83,7 @@ class CareerStagePerCallCalculator:
             data.append(stats)
 
         result = {}
-        result['headers'] = ['Grant Scheme', 'Year'] + CareerStagePerYearCalculator._header_names()
+        result['headers'] = ['Grant Scheme', 'Year'] + CareerStagePerYearCalculator._header_names(career_stages)
         result['data'] = data
         result['header_tooltips'] = {NOT_IN_DB_HEADER: NOT_IN_DB_TOOLTIP}
 
@@ -79,82 +103,64 @@ class CareerStagePerYearCalculator:
         else:
             assert False
 
-    def calculate_career_stage_stats(self, generic_queryset):
-        if self._career_stages is None:
-            self._career_stages = CareerStage.objects.all()
-
-        result = {}
-        for career_stage in self._career_stages:
-            result[career_stage.name] = generic_queryset.filter(**{self._career_stage_field: career_stage}).count()
-
-        result[NOT_IN_DB_HEADER] = generic_queryset.filter(**{f'{self._career_stage_field}__isnull': True}).count()
-
-        return result
-
     @staticmethod
     def _career_stages_sorted():
         return CareerStage.objects.order_by('list_order')
 
     @staticmethod
-    def _header_names():
+    def _header_names(career_stages):
         result = []
 
-        for career_stage in CareerStagePerYearCalculator._career_stages_sorted():
+        for career_stage in career_stages:
             result.append(career_stage.name)
 
         result.append(NOT_IN_DB_HEADER)
 
         return result
 
-    def _calculate_min_year(self) -> int:
-        # Using the minimum to have '-' if needed for old calls
-        # (see _calculate_max_year)
-        return min(
-            Call.objects.aggregate(Min('finance_year'))['finance_year__min'],
-            Project.objects.aggregate(Min('finance_year'))['finance_year__min']
-        )
-
-    def _calculate_max_year(self) -> int:
+    def _calculate_min_max_year(self):
+        # Using the minimum to have '-' if needed for old calls.
         # Using the maximum because there might not be calls for a year but
         # there might be funded projects (created not from a call)
-        return max(
-            Call.objects.aggregate(Max('finance_year'))['finance_year__max'],
-            Project.objects.aggregate(Max('finance_year'))['finance_year__max']
-        )
+        calls_years = Call.objects.aggregate(Min('finance_year'), Max('finance_year'))
+        projects_years = Project.objects.aggregate(Min('finance_year'), Max('finance_year'))
+
+        return not_none_or_function(calls_years['finance_year__min'], projects_years['finance_year__min'], min), \
+               not_none_or_function(calls_years['finance_year__max'], projects_years['finance_year__max'], max)
 
     def calculate_result(self):
         data = []
 
-        for funding_instrument in FundingInstrument.objects.all().order_by('long_name'):
-            min_year = self._calculate_min_year()
-            max_year = self._calculate_max_year()
+        career_stages = list(CareerStagePerYearCalculator._career_stages_sorted())
+        is_missing_data_year = FundingInstrumentYearMissingData.missing_data_lookup(self._missing_data_type)
 
-        # for year in Call.objects.all().values_list('finance_year', flat=True).distinct().order_by('finance_year'):
-        for year in range(self._calculate_min_year(), self._calculate_max_year() + 1):
+        counts = count_per_group(self._model.objects.all(), self._finance_year_filter_key, self._career_stage_field)
+
+        min_year, max_year = self._calculate_min_max_year()
+
+        if min_year is None:
+            years = []
+        else:
+            years = range(min_year, max_year + 1)
+
+        for year in years:
             row = {}
             row['Year'] = year
-            is_missing_data, missing_data_reason = FundingInstrumentYearMissingData.is_missing_data(
-                self._missing_data_type, year=year)
+            is_missing_data, missing_data_reason = is_missing_data_year(year=year)
 
-            for career_stage in CareerStagePerYearCalculator._career_stages_sorted():
+            for career_stage in career_stages:
                 row[career_stage.name] = value_or_missing_data(is_missing_data,
                                                                missing_data_reason,
-                                                               self._model.objects.
-                                                               filter(**{self._finance_year_filter_key: year}).
-                                                               filter(**{self._career_stage_field: career_stage}).
-                                                               count())
+                                                               counts.get((year, career_stage.id), 0))
 
             row[NOT_IN_DB_HEADER] = value_or_missing_data(is_missing_data,
                                                           missing_data_reason,
-                                                          self._model.objects.
-                                                          filter(**{self._finance_year_filter_key: year}).
-                                                          filter(**{f'{self._career_stage_field}__isnull': True}).
-                                                          count())
+                                                          counts.get((year, None), 0))
 
             data.append(row)
 
         result = {}
-        result['headers'] = ['Year'] + CareerStagePerYearCalculator._header_names()
+        result['headers'] = ['Year'] + CareerStagePerYearCalculator._header_names(career_stages)
         result['data'] = data
         result['header_tooltips'] = {NOT_IN_DB_HEADER: NOT_IN_DB_TOOLTIP}
 
@@ -172,26 +178,31 @@ def not_none_or_function(item1, item2, function):
         return function(item1, item2)
 
 
-def calculate_min_year_for_funding_instrument(funding_instrument):
-    projects_min_year = Project.objects.filter(funding_instrument=funding_instrument).aggregate(Min('finance_year'))[
-        'finance_year__min']
-    proposals_min_year = \
-        Proposal.objects.filter(call__funding_instrument=funding_instrument).filter(
-            call__callevaluation__isnull=False).aggregate(Min('call__finance_year'))[
-            'call__finance_year__min']
+def calculate_min_max_year_per_funding_instrument():
+    """
+    Returns a dictionary with funding instrument ids as keys and (min_year, max_year) as values. The years
+    are calculated from the projects and the proposals of calls with an evaluation.
+    """
+    projects_years = Project.objects. \
+        values('funding_instrument'). \
+        annotate(min_year=Min('finance_year'), max_year=Max('finance_year')). \
+        order_by()
+
+    proposals_years = Proposal.objects. \
+        filter(call__callevaluation__isnull=False). \
+        values(funding_instrument=F('call__funding_instrument')). \
+        annotate(min_year=Min('call__finance_year'), max_year=Max('call__finance_year')). \
+        order_by()
 
-    return not_none_or_function(projects_min_year, proposals_min_year, min)
+    result = {}
 
+    for row in list(projects_years) + list(proposals_years):
+        min_year, max_year = result.get(row['funding_instrument'], (None, None))
 
-def calculate_max_year_for_funding_instrument(funding_instrument):
-    projects_max_year = Project.objects.filter(funding_instrument=funding_instrument).aggregate(Max('finance_year'))[
-        'finance_year__max']
-    proposals_max_year = \
-        Proposal.objects.filter(call__funding_instrument=funding_instrument).filter(
-            call__callevaluation__isnull=False).aggregate(Max('call__finance_year'))[
-            'call__finance_year__max']
+        result[row['funding_instrument']] = (not_none_or_function(min_year, row['min_year'], min),
+                                             not_none_or_function(max_year, row['max_year'], max))
 
-    return not_none_or_function(projects_max_year, proposals_max_year, max)
+    return result
 
 
 class GenderCalculator:
@@ -207,8 +218,12 @@ class GenderCalculator:
         self._gender_name_list = []
 
         if self._main_model == Proposal:
+            self._funding_instrument_field = 'call__funding_instrument'
+            self._finance_year_field = 'call__finance_year'
             self._gender_field = 'applicant__person__gender'
         elif self._main_model == Project:
+            self._funding_instrument_field = 'funding_instrument'
+            self._finance_year_field = 'finance_year'
             self._gender_field = 'principal_investigator__person__gender'
         else:
             assert False
@@ -216,50 +231,37 @@ class GenderCalculator:
         for gender in self._gender_list:
             self._gender_name_list.append(gender.name)
 
-    def _calculate_genders(self, generic_queryset):
+    def _calculate_genders(self, counts, funding_instrument, finance_year):
         result = {}
         for gender in self._gender_list:
-            result[gender.name] = generic_queryset.filter(**{self._gender_field: gender.id}).count()
+            result[gender.name] = counts.get((funding_instrument.id, finance_year, gender.id), 0)
 
-        result[NOT_IN_DB_HEADER] = generic_queryset.filter(**{f'{self._gender_field}__isnull': True}).count()
+        result[NOT_IN_DB_HEADER] = counts.get((funding_instrument.id, finance_year, None), 0)
 
         return result
 
-    def _calculate_min_year_for_funding_instrument(self, funding_instrument):
-        return Project.objects.filter(funding_instrument=funding_instrument).aggregate(Min('finance_year'))[
-            'finance_year__min']
-
-    def _calculate_max_year_for_funding_instrument(self, funding_instrument):
-        return Project.objects.filter(funding_instrument=funding_instrument).aggregate(Max('finance_year'))[
-            'finance_year__max']
-
     def calculate_result(self):
         data = []
 
+        is_missing_data_funding_instrument_year = FundingInstrumentYearMissingData.missing_data_lookup(
+            self._missing_data_type)
+
+        min_max_years = calculate_min_max_year_per_funding_instrument()
+
+        counts = count_per_group(self._main_model.objects.all(),
+                                 self._funding_instrument_field, self._finance_year_field, self._gender_field)
+
         for funding_instrument in FundingInstrument.objects.all().order_by('long_name'):
-            min_year = calculate_min_year_for_funding_instrument(funding_instrument)
-            max_year = calculate_max_year_for_funding_instrument(funding_instrument)
+            min_year, max_year = min_max_years.get(funding_instrument.id, (None, None))
 
             if min_year is None or max_year is None:
                 continue
 
             for finance_year in range(min_year, max_year + 1):
-                if self._main_model == Proposal:
-                    generic_queryset = Proposal.objects. \
-                        filter(call__finance_year=finance_year). \
-                        filter(call__funding_instrument=funding_instrument). \
-                        order_by('call__long_name')
-                elif self._main_model == Project:
-                    generic_queryset = Project.objects.filter(finance_year=finance_year). \
-                        filter(funding_instrument=funding_instrument). \
-                        order_by('funding_instrument__long_name')
-                else:
-                    assert False
+                percentages = self._calculate_genders(counts, funding_instrument, finance_year)
 
-                percentages = self._calculate_genders(generic_queryset)
-
-                missing_data, missing_data_reason = FundingInstrumentYearMissingData.is_missing_data(
-                    self._missing_data_type, funding_instrument=funding_instrument, year=finance_year)
+                missing_data, missing_data_reason = is_missing_data_funding_instrument_year(
+                    funding_instrument=funding_instrument, year=finance_year)
 
                 if missing_data:
                     for key in percentages.keys():
@@ -288,41 +290,64 @@ class ObjectsPerFundingInstrumentPerYear:
         for funding_instrument in self._funding_instruments:
             self._funding_instruments_long_names.append(funding_instrument.long_name)
 
-        self._start_year = Project.objects.aggregate(Min('finance_year'))['finance_year__min']
-        self._end_year = Project.objects.aggregate(Max('finance_year'))['finance_year__max']
+        years = Project.objects.aggregate(Min('finance_year'), Max('finance_year'))
+        self._start_year = years['finance_year__min']
+        self._end_year = years['finance_year__max']
 
     def _get_headers(self):
         return ['Year'] + self._funding_instruments_long_names
 
-    def _count_objects(self, funding_instrument, year):
+    def _count_objects_per_funding_instrument_year(self):
+        """
+        Returns a function that returns the number of objects for a funding instrument and year
+        (or '-' if there are no calls for proposals)
+        """
         if self._model == Proposal:
-            calls = Call.objects.filter(funding_instrument=funding_instrument).filter(finance_year=year)
+            counts = count_per_group(self._model.objects.all(), 'call__funding_instrument', 'call__finance_year')
+            calls_funding_instrument_year = set(Call.objects.values_list('funding_instrument', 'finance_year'))
+
+            def count_objects(funding_instrument, year):
+                if (funding_instrument.id, year) in calls_funding_instrument_year:
+                    return counts.get((funding_instrument.id, year), 0)
+                else:
+                    return '-'
 
-            if calls.exists():
-                return self._model.objects.filter(call__in=calls).count()
-            else:
-                return '-'
         elif self._model == Project:
-            return self._model.objects.filter(funding_instrument=funding_instrument).filter(finance_year=year).count()
+            counts = count_per_group(self._model.objects.all(), 'funding_instrument', 'finance_year')
+
+            def count_objects(funding_instrument, year):
+                return counts.get((funding_instrument.id, year), 0)
+
         else:
             assert False
 
+        return count_objects
+
     def calculate_result(self):
         data = []
-        for year in range(self._start_year, self._end_year + 1):
+
+        if self._start_year is None:
+            years = []
+        else:
+            years = range(self._start_year, self._end_year + 1)
+
+        is_missing_data_funding_instrument_year = FundingInstrumentYearMissingData.missing_data_lookup(
+            self._missing_data)
+        count_objects = self._count_objects_per_funding_instrument_year()
+
+        for year in years:
             row = {}
             row['Year'] = year
 
             for funding_instrument in self._funding_instruments:
-                is_missing_data, missing_data_reason = FundingInstrumentYearMissingData.is_missing_data(
-                    self._missing_data,
+                is_missing_data, missing_data_reason = is_missing_data_funding_instrument_year(
                     funding_instrument=funding_instrument,
                     year=year)
                 if is_missing_data:
                     row[funding_instrument.long_name] = missing_data_reason
                     continue
 
-                row[funding_instrument.long_name] = self._count_objects(funding_instrument, year)
+                row[funding_instrument.long_name] = count_objects(funding_instrument, year)
 
             data.append(row)
 
@@ -347,40 +372,21 @@ def calculate_number_of_calls():
         annotate(Calls=Count('*')). \
         order_by('finance_year')
 
-    result['data'] = calls_per_year
+    result['data'] = list(calls_per_year)
     result['headers'] = ['Year', 'Calls']
 
     return result
 
 
-def calculate_paid_so_far_year(year):
-    total = 0
-
-    for project in Project.objects.filter(finance_year=year):
-        total += project.invoices_paid_amount()
-
-    return total
-
-
-def calculate_open_for_payment(year):
-    total = 0
-
-    for project in Project.objects.filter(finance_year=year):
-        if project.is_active():
-            total += project.allocated_budget - project.invoices_paid_amount()
-        else:
-            # If the project is closed
-            pass
-
-    return total
-
-
 def allocated_budget_per_year():
     result = {}
 
+    # The paid and open for payment amounts are pre-calculated in ProjectFinanceSummary
     financial_support_per_year = Project.objects. \
         values(year=F('finance_year')). \
-        annotate(commitment=Sum('allocated_budget')). \
+        annotate(commitment=Sum('allocated_budget'),
+                 paid=Sum('finance_summary__paid'),
+                 open_for_payment=Sum('finance_summary__open_for_payment')). \
         order_by('finance_year')
 
     data = []
@@ -391,8 +397,8 @@ def allocated_budget_per_year():
 
         data.append({'Year': year,
                      'Commitment (CHF)': thousands_separator(commitment),
-                     'Paid to date (CHF)': thousands_separator(calculate_paid_so_far_year(year)),
-                     'Open for payment (CHF)': thousands_separator(calculate_open_for_payment(year)),
+                     'Paid to date (CHF)': thousands_separator(row['paid'] or 0),
+                     'Open for payment (CHF)': thousands_separator(row['open_for_payment'] or 0),
                      })
 
     result['data'] = data
@@ -404,30 +410,6 @@ def allocated_budget_per_year():
     return result
 
 
-def calculate_paid_so_far_funding_instrument_year(funding_instrument_long_name, year):
-    total = 0
-
-    for project in Project.objects.filter(funding_instrument__long_name=funding_instrument_long_name). \
-            filter(finance_year=year):
-        total += project.invoices_paid_amount()
-
-    return total
-
-
-def calculate_open_for_payment_funding_instrument_year(funding_instrument_long_name, year):
-    total = 0
-
-    for project in Project.objects.filter(funding_instrument__long_name=funding_instrument_long_name). \
-            filter(finance_year=year):
-        if project.is_active():
-            total += project.allocated_budget - project.invoices_paid_amount()
-        else:
-            # If the project is closed
-            pass
-
-    return total
-
-
 def allocated_budget_per_call():
     result = {}
 
@@ -435,23 +417,19 @@ def allocated_budget_per_call():
         values(call_name=F('funding_instrument__long_name'),
                account_number=F('funding_instrument__short_name__account_number'),
                finance_year_=F('finance_year')). \
-        annotate(financial_support=Sum('allocated_budget')). \
+        annotate(financial_support=Sum('allocated_budget'),
+                 paid=Sum('finance_summary__paid'),
+                 open_for_payment=Sum('finance_summary__open_for_payment')). \
         order_by('finance_year')
 
     data = []
     for row in allocated_budget_per_call:
-        funding_instrument_long_name = row['call_name']
-        year = row['finance_year_']
-
-        paid_so_far = calculate_paid_so_far_funding_instrument_year(funding_instrument_long_name, year)
-        open_for_payment = calculate_open_for_payment_funding_instrument_year(funding_instrument_long_name, year)
-
         data.append({'Grant Scheme': row['call_name'],
                      'Account Number': row['account_number'],
                      'Year': row['finance_year_'],
                      'Commitment (CHF)': thousands_separator(row['financial_support']),
-                     'Paid to date (CHF)': thousands_separator(paid_so_far),
-                     'Open for payment (CHF)': thousands_separator(open_for_payment),
+                     'Paid to date (CHF)': thousands_separator(row['paid'] or 0),
+                     'Open for payment (CHF)': thousands_separator(row['open_for_payment'] or 0),
                      })
 
     result['headers'] = ['Grant Scheme', 'Account Number', 'Year', 'Commitment (CHF)', 'Paid to date (CHF)',
@@ -518,46 +496,100 @@ def projects_per_funding_instrument():
     return projects_calculator.calculate_result()
 
 
-class Reporting(TemplateView):
-    template_name = 'reporting/reporting.tmpl'
+# The keys are the names used in the templates
+REPORTING_TABLES = {
+    'calls_per_year': calculate_number_of_calls,
+    'allocated_budget_per_year': allocated_budget_per_year,
+    'allocated_budget_per_call': allocated_budget_per_call,
+    'proposals_genders': gender_proposal_applicants_per_call,
+    'projects_genders': gender_project_principal_investigator_per_call,
+    'career_stage_proposal_applicants_per_year': career_stage_proposal_applicants_per_year,
+    'career_stage_projects_principal_investigators_per_year': career_stage_projects_principal_investigators_per_year,
+    'career_stage_proposal_applicants_per_call': career_stage_proposal_applicants_per_call,
+    'career_stage_project_principal_investigator_per_call': career_stage_project_principal_investigator_per_call,
+    'proposals_per_funding_instrument': proposals_per_funding_instrument,
+    'projects_per_funding_instrument': projects_per_funding_instrument,
+}
+
+# Tables displayed in each tab of the reporting page
+REPORTING_TABS = {
+    'overview': ['calls_per_year', 'proposals_per_funding_instrument', 'projects_per_funding_instrument'],
+    'finance': ['allocated_budget_per_year', 'allocated_budget_per_call'],
+    'diversity': ['career_stage_proposal_applicants_per_year', 'career_stage_projects_principal_investigators_per_year',
+                  'career_stage_proposal_applicants_per_call', 'career_stage_project_principal_investigator_per_call',
+                  'proposals_genders', 'projects_genders'],
+    'downloads': [],
+}
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
 
-        context['calls_per_year'] = calculate_number_of_calls()
+class Reporting(TemplateView):
+    template_name = 'reporting/reporting.tmpl'
 
-        context['allocated_budget_per_year'] = allocated_budget_per_year()
+    def get(self, request, *args, **kwargs):
+        if 'refresh' in request.GET:
+            reporting.cache.invalidate()
 
-        context['allocated_budget_per_call'] = allocated_budget_per_call()
+            url = reverse('logged-reporting')
+            if 'tab' in request.GET:
+                url += '?' + urlencode({'tab': request.GET['tab']})
 
-        context['proposals_genders'] = gender_proposal_applicants_per_call()
+            return redirect(url)
 
-        context['projects_genders'] = gender_project_principal_investigator_per_call()
+        return super().get(request, *args, **kwargs)
 
-        context['career_stage_proposal_applicants_per_year'] = career_stage_proposal_applicants_per_year()
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
 
-        context[
-            'career_stage_projects_principal_investigators_per_year'] = career_stage_projects_principal_investigators_per_year()
+        active_tab = self.request.GET.get('tab', 'overview')
 
-        context['career_stage_proposal_applicants_per_call'] = career_stage_proposal_applicants_per_call()
+        # Only the tables of the active tab are calculated: the other tabs load their tables
+        # from ReportingTable when they are shown
+        computed_at = []
 
-        context[
-            'career_stage_project_principal_investigator_per_call'] = career_stage_project_principal_investigator_per_call()
+        for table_name in REPORTING_TABS.get(active_tab, []):
+            cached_table = reporting.cache.get_table(table_name, REPORTING_TABLES[table_name])
 
-        context['proposals_per_funding_instrument'] = proposals_per_funding_instrument()
+            context[table_name] = cached_table['table']
+            computed_at.append(cached_table['computed_at'])
 
-        context['projects_per_funding_instrument'] = projects_per_funding_instrument()
+        # The oldest table: all the tables are up to date since then
+        context['computed_at'] = min(computed_at, default=None)
 
         context.update({'active_section': 'reporting',
                         'active_subsection': 'reporting',
                         'sidebar_template': 'reporting/_sidebar-reporting.tmpl',
                         'breadcrumb': [{'name': 'Reporting'}]})
 
-        context['active_tab'] = self.request.GET.get('tab', 'overview')
+        context['active_tab'] = active_tab
 
         return context
 
 
+class ReportingTable(View):
+    """Returns one reporting table: JSON if the parameter format=json is used or, by default, the HTML
+    fragment rendered by reporting/_table.tmpl (used to load the tables of a tab when it is shown)"""
+
+    def get(self, request, *args, **kwargs):
+        table_name = kwargs['table_name']
+
+        if table_name not in REPORTING_TABLES:
+            raise Http404('Reporting table not found')
+
+        cached_table = reporting.cache.get_table(table_name, REPORTING_TABLES[table_name])
+
+        if request.GET.get('format') == 'json':
+            data = {}
+            data['table_id'] = table_name
+            data['computed_at'] = cached_table['computed_at']
+            data['table'] = cached_table['table']
+
+            return JsonResponse(data=data, status=200, json_dumps_params={'indent': 2})
+
+        return render(request, 'reporting/_table.tmpl', {'table': cached_table['table'],
+                                                         'table_id': table_name,
+                                                         'computed_at': cached_table['computed_at']})
+
+
 def format_number_for_swiss_locale(number):
     return str(number).replace('.', ',')
 
@@ -578,9 +610,11 @@ class ProjectsAllInformationExcel(View):
 
     @staticmethod
     def _rows():
-        rows = []
+        return list(ProjectsAllInformationExcel._rows_iterator())
 
-        for project in Project.objects.all().order_by('key'):
+    @staticmethod
+    def _rows_iterator():
+        for project in iterate_in_chunks(ProjectsBalanceExcel.projects()):
             financial_information = ProjectsBalanceExcel.financial_information(project)
 
             if project.principal_investigator.person.gender:
@@ -593,7 +627,7 @@ class ProjectsAllInformationExcel(View):
             else:
                 career_stage = 'N/A'
 
-            geographical_areas = ', '.join([str(area) for area in project.geographical_areas.order_by('name')])
+            geographical_areas = ', '.join([area.name for area in project.geographical_areas_ordered_by_name()])
 
             extra_information = {
                 'Grant scheme': project.funding_instrument.long_name,
@@ -606,9 +640,7 @@ class ProjectsAllInformationExcel(View):
                 'Status': project.status,
             }
 
-            rows.append({**financial_information, **extra_information})
-
-        return rows
+            yield {**financial_information, **extra_information}
 
     @staticmethod
     def _col_widths():
@@ -627,15 +659,13 @@ class ProjectsAllInformationExcel(View):
         now = timezone.localtime()
         filename = f'projects-information-{now:%Y%m%d-%H%M}.xlsx'
 
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        excel_file = excel_dict_writer(filename,
+                                       ProjectsAllInformationExcel._headers(),
+                                       ProjectsAllInformationExcel._rows_iterator(),
+                                       ProjectsAllInformationExcel._col_widths())
 
-        response.content = excel_dict_writer(filename,
-                                             ProjectsAllInformationExcel._headers(),
-                                             ProjectsAllInformationExcel._rows(),
-                                             ProjectsAllInformationExcel._col_widths())
-
-        return response
+        return FileResponse(excel_file, as_attachment=True, filename=filename,
+                            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
 
 
@@ -649,6 +679,25 @@ class ProjectsBalanceExcel(View):
         return ['Key', 'Signed date', 'Organisation', 'Title', 'Start date', 'End date', 'Allocated budget',
                 'Balance due']
 
+    @staticmethod
+    def projects():
+        """Projects with the related objects used by the rows of the spreadsheets: the number of queries does not
+        depend on the number of projects. paid_invoices_amount is the total of the paid invoices (None if none)"""
+        paid_invoices_amount = Invoice.objects. \
+            filter(project=OuterRef('pk'), paid_date__isnull=False). \
+            values('project'). \
+            annotate(total=Sum('amount')). \
+            values('total')
+
+        return Project.objects. \
+            annotate(paid_invoices_amount=Subquery(paid_invoices_amount)). \
+            select_related('grantagreement', 'funding_instrument',
+                           'principal_investigator__person__gender', 'principal_investigator__career_stage'). \
+            prefetch_related(Prefetch('principal_investigator__organisation_names',
+                                      queryset=OrganisationName.objects.select_related('organisation')),
+                             'geographical_areas', 'keywords'). \
+            order_by('key')
+
     @staticmethod
     def financial_information(project):
         pi_organisations = project.principal_investigator.organisations_ordered_by_name_str()
@@ -661,7 +710,7 @@ class ProjectsBalanceExcel(View):
         else:
             grant_agreement_signed_date = 'No grant agreement attached'
 
-        balance_due = project.allocated_budget - project.invoices_paid_amount()
+        balance_due = project.allocated_budget - (project.paid_invoices_amount or 0)
 
         return {'Key': project.key,
                 'Signed date': grant_agreement_signed_date,
@@ -675,11 +724,12 @@ class ProjectsBalanceExcel(View):
 
     @staticmethod
     def rows():
-        rows = []
-        for project in Project.objects.all().order_by('key'):
-            rows.append(ProjectsBalanceExcel.financial_information(project))
+        return list(ProjectsBalanceExcel.rows_iterator())
 
-        return rows
+    @staticmethod
+    def rows_iterator():
+        for project in iterate_in_chunks(ProjectsBalanceExcel.projects()):
+            yield ProjectsBalanceExcel.financial_information(project)
 
     @staticmethod
     def col_widths():
@@ -698,33 +748,41 @@ class ProjectsBalanceExcel(View):
         now = timezone.localtime()
         filename = f'projects-balance-{now:%Y%m%d-%H%M}.xlsx'
 
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        response.content = excel_dict_writer(filename,
-                                             ProjectsBalanceExcel.headers(),
-                                             ProjectsBalanceExcel.rows(),
-                                             ProjectsBalanceExcel.col_widths())
+        excel_file = excel_dict_writer(filename,
+                                       ProjectsBalanceExcel.headers(),
+                                       ProjectsBalanceExcel.rows_iterator(),
+                                       ProjectsBalanceExcel.col_widths())
 
-        return response
+        return FileResponse(excel_file, as_attachment=True, filename=filename,
+                            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
 
 def excel_dict_writer(filename, headers, rows, col_widths):
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output)
+    """Writes rows (an iterable of dictionaries with headers as keys) into a temporary file that is returned
+    positioned at the beginning. The rows are written in constant_memory mode: only the current row is kept
+    in memory, so rows can be a generator"""
+    output = tempfile.NamedTemporaryFile(suffix='.xlsx')
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
     worksheet = workbook.add_worksheet()
 
+    column_indexes = {header: column_index for column_index, header in enumerate(headers)}
+
+    # In constant_memory mode the columns need to be set before writing any row
+    for col_width_name, col_width in col_widths.items():
+        column_index = column_indexes[col_width_name]
+
+        worksheet.set_column(column_index, column_index, col_width)
+
     worksheet.write_row(0, 0, headers)
 
     date_format = workbook.add_format({'num_format': 'dd-mm-yyyy'})
     decimal_format = workbook.add_format({'num_format': "#,##0.00"})
 
     for row_index, row in enumerate(rows, 1):
-        to_use_headers = headers.copy()
+        assert row.keys() == column_indexes.keys()
 
         for header_name, cell_value in row.items():
-            column_index = headers.index(header_name)
-            to_use_headers.remove(header_name)
+            column_index = column_indexes[header_name]
 
             if isinstance(cell_value, datetime.date):
                 worksheet.write_datetime(row_index, column_index, cell_value, date_format)
@@ -733,13 +791,6 @@ def excel_dict_writer(filename, headers, rows, col_widths):
             else:
                 worksheet.write(row_index, column_index, cell_value)
 
-        assert to_use_headers == []
-
-    for col_width_name, col_width in col_widths.items():
-        column_index = headers.index(col_width_name)
-
-        worksheet.set_column(column_index, column_index, col_width)
-
     workbook.close()
 
     output.seek(0)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class TemplatesConfig(AppConfig):
     name = 'variable_templates'
+
+    def ready(self):
+        # Connects the signals that invalidate the cached values of the variables
+        from . import signals
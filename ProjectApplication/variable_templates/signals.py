@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+import variable_templates.utils
+from project_core.models import Call
+from variable_templates.models import TemplateVariableName, FundingInstrumentVariableTemplate, CallVariableTemplate
+
+
+# The funding instrument of a Call might change: its values change
+@receiver([post_save, post_delete], sender=Call)
+@receiver([post_save, post_delete], sender=TemplateVariableName)
+@receiver([post_save, post_delete], sender=FundingInstrumentVariableTemplate)
+@receiver([post_save, post_delete], sender=CallVariableTemplate)
+def invalidate_variable_templates_cache(sender, **kwargs):
+    variable_templates.utils.invalidate()
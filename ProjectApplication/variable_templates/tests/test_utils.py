@@ -1,9 +1,12 @@
 import unittest
 from collections import OrderedDict
+from unittest import mock
 
 from django import forms
+from django.core.cache import cache
 from django.test import TestCase
 
+from project_core.models import Call
 from project_core.tests import database_population as project_core_database_population
 from . import database_population
 from .. import utils
@@ -115,3 +118,37 @@ class UtilsTest(TestCase):
     @unittest.expectedFailure
     def test_get_template_value_for_call_does_not_exist(self):
         utils.get_template_value_for_call('does_not_exist', self._call)
+
+    def test_apply_templates_to_string_cached(self):
+        self.assertEqual(utils.apply_templates_to_string('Your {{ activity }}', self._call), 'Your proposal')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(utils.apply_templates_to_string('Title of the {{ activity }}: {{ activity }}', self._call),
+                             'Title of the proposal: proposal')
+            self.assertEqual(utils.apply_templates_to_string('{{ does_not_exist }}', self._call),
+                             '{{ does_not_exist }}')
+
+        # Saving a variable invalidates the cache
+        CallVariableTemplate.objects.create(call=self._call,
+                                            name=TemplateVariableName.objects.get(name='activity'),
+                                            value='expedition')
+
+        self.assertEqual(utils.apply_templates_to_string('Your {{ activity }}', self._call), 'Your expedition')
+
+    def test_cache_read_once_per_call(self):
+        utils.apply_templates_to_string('Your {{ activity }}', self._call)
+
+        with mock.patch.object(utils, 'cache') as cache_mock:
+            for i in range(3):
+                self.assertEqual(utils.apply_templates_to_string('Your {{ activity }}', self._call), 'Your proposal')
+
+        cache_mock.get.assert_not_called()
+
+        call = Call.objects.get(id=self._call.id)
+
+        with mock.patch.object(utils, 'cache', wraps=cache) as cache_mock:
+            for i in range(3):
+                self.assertEqual(utils.apply_templates_to_string('Your {{ activity }}', call), 'Your proposal')
+
+        # The version and the values
+        self.assertEqual(cache_mock.get.call_count, 2)
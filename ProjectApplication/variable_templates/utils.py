@@ -1,7 +1,13 @@
+import functools
+import re
+import uuid
 from collections import OrderedDict
 from typing import Optional
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.forms import Field
 
 from project_core.models import Call, FundingInstrument
@@ -37,28 +43,103 @@ def copy_template_variables_from_funding_instrument_to_call(call: Call):
         call_template_variable.save()
 
 
-def apply_templates_to_string(string: Optional[str], call: Call) -> Optional[str]:
-    if string is None:
-        return None
+# The values of the variables of each call are cached using keys that contain the current version. Changing the
+# version (see invalidate()) makes all of them unreachable
+VERSION_KEY = 'variable-templates-version'
 
-    # Replaces the {{ name }}
+# The values are also memoized in the Call instance (the cache is read once per call in each request) with the
+# number of invalidations done by this process: the changes done in the same request are seen
+_local_invalidations = 0
+
+
+def _new_version():
+    global _local_invalidations
+
+    version = uuid.uuid4().hex
+    cache.set(VERSION_KEY, version, timeout=None)
+    _local_invalidations += 1
+
+    return version
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        version = _new_version()
+
+    return version
+
+
+def invalidate():
+    # Now (so the changes are seen by the transaction that did them) and on commit (another request could
+    # have cached the values before the changes were committed)
+    _new_version()
+    transaction.on_commit(_new_version)
+
+
+def _calculate_template_values_for_call(call: Call) -> dict:
     template_name_values = {}
 
     for template_name_value in TemplateVariableName.objects.all():
         template_name_values[template_name_value.name] = template_name_value.default
 
     for template_name_value in FundingInstrumentVariableTemplate.objects.filter(
-            funding_instrument=call.funding_instrument):
+            funding_instrument=call.funding_instrument).select_related('name'):
         template_name_values[template_name_value.name.name] = template_name_value.value
 
-    for template_name_value in CallVariableTemplate.objects.filter(call=call).all():
+    for template_name_value in CallVariableTemplate.objects.filter(call=call).select_related('name'):
         template_name_values[template_name_value.name.name] = template_name_value.value
 
-    for template_name, template_value in template_name_values.items():
-        string = string.replace(f'{{{{ {template_name} }}}}',
-                                template_value)
+    return template_name_values
+
+
+def get_template_values_for_call(call: Call) -> dict:
+    """Returns a dictionary with the value of each variable for the call (from the call, its funding instrument
+    or the default)"""
+    if call.pk is None:
+        return _calculate_template_values_for_call(call)
+
+    memoized = getattr(call, '_template_name_values', None)
+
+    if memoized is not None and memoized[0] == _local_invalidations:
+        return memoized[1]
+
+    local_invalidations = _local_invalidations
+    key = f'variable-templates-{_current_version()}-{call.pk}'
+
+    template_name_values = cache.get(key)
+
+    if template_name_values is None:
+        template_name_values = _calculate_template_values_for_call(call)
+        cache.set(key, template_name_values, settings.VARIABLE_TEMPLATES_CACHE_TIMEOUT)
+
+    call._template_name_values = (local_invalidations, template_name_values)
+
+    return template_name_values
 
-    return string
+
+@functools.lru_cache(maxsize=128)
+def _template_names_regex(template_names):
+    return re.compile(r'\{\{ (' + '|'.join(re.escape(template_name) for template_name in template_names) + r') \}\}')
+
+
+def apply_templates_to_string(string: Optional[str], call: Call) -> Optional[str]:
+    if string is None:
+        return None
+
+    if '{{' not in string:
+        return string
+
+    template_name_values = get_template_values_for_call(call)
+
+    if not template_name_values:
+        return string
+
+    # Replaces the {{ name }}
+    regex = _template_names_regex(tuple(sorted(template_name_values.keys())))
+
+    return regex.sub(lambda match: template_name_values[match.group(1)], str(string))
 
 
 def apply_templates_to_fields(fields: OrderedDict, call):
@@ -100,29 +181,9 @@ def get_template_value_for_funding_instrument(name, funding_instrument):
 
 def get_template_value_for_call(name, call):
     # Returns the template value of the template name for call or the default
-    try:
-        template_variable_name = CallVariableTemplate.objects.get(call=call, name__name=name)
-        value = template_variable_name.value
-        return value
-
-    except ObjectDoesNotExist:
-        pass
-
-    if call.funding_instrument:
-        try:
-            template_variable_name = FundingInstrumentVariableTemplate.objects.get(
-                funding_instrument=call.funding_instrument,
-                name__name=name)
-            value = template_variable_name.value
-            return value
-        except ObjectDoesNotExist:
-            pass
+    template_name_values = get_template_values_for_call(call)
 
-    try:
-        template_variable_name = TemplateVariableName.objects.get(name=name)
-        value = template_variable_name.default
-        return value
-    except ObjectDoesNotExist:
-        pass
+    if name in template_name_values:
+        return template_name_values[name]
 
     assert False
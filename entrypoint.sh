@@ -10,6 +10,24 @@ python3 manage.py check --deploy --fail-level WARNING
 python3 manage.py migrate
 python3 manage.py collectstatic --no-input --clear
 
+# Sends the emails queued by the application (e.g. proposal submitted). Started again if it exits
+while true; do
+	python3 manage.py sendqueuedemails --loop || true
+	sleep 10
+done &
+
+# Deletes the oldest cached PDFs of the proposals if they use too much space. Once an hour
+while true; do
+	python3 manage.py evictproposalpdfs || true
+	sleep 3600
+done &
+
+# Deletes the files uploaded directly to the bucket that were not saved in a proposal. Once a day
+while true; do
+	python3 manage.py deleteunuseddirectuploads || true
+	sleep 86400
+done &
+
 gunicorn ProjectApplication.wsgi:application \
         --bind 0.0.0.0:8085 \
         --workers 20 \